@@ -1,48 +1,49 @@
-from guppy import hpy
-
 import board
+import cancellation
 import heapq
-import numpy as np
+import pagoda
+import solution_cache
+import state_store
 import time
 
 
 class Graph:
     """Graph class that models a graph.
 
-    This class has stores the hash table containing board state hash as key
-    and board state as the value. It has methods to get neighbors, get edge
-    cost and update the hash table. The methods in this class use Board class
-    methods for some of its operations.
+    The hash of a board state is its canonical key, which is also the
+    bitboard of its canonical image, so the state is read back from its
+    hash without storing it. Symmetric states share a key and are used in
+    their canonical orientation, so the transitions returned by neighbors
+    refer to that orientation. It has methods to get neighbors and get edge
+    cost. The methods in this class use Board class methods for some of its
+    operations.
 
     Attributes:
-        hash_table: A python dictionary containing hash of the board state as
-        key and board state as value.
+        symmetries: A tuple of the symmetries states are reduced by.
     """
-    def __init__(self, board_object):
-        """Constructor that initializes hash table using passed Board class
+    def __init__(self, board_object, symmetries=board.ALL_SYMMETRIES):
+        """Constructor that initializes the graph using passed Board class
         object."""
-        self.hash_table = {}
-        board_hash = hash(board_object)
-        self.hash_table[board_hash] = board_object.get_board_state()
+        self.symmetries = symmetries
 
     def neighbors(self, state_hash):
         """Gets the hashes of neighbor states using hash of current state."""
         state = self.get_state_from_hash(state_hash)
         neighbors = self.get_neighbors(state)
-        neighbor_hashes = self.update_hash_table(neighbors)
+        neighbor_hashes = self.get_neighbor_hashes(neighbors)
         return neighbor_hashes
 
-    def get_state_from_hash(self, state_hash):
-        """Returns Board state given its hash."""
-        return self.hash_table[state_hash]
+    @staticmethod
+    def get_state_from_hash(state_hash):
+        """Returns Board state bitboard given its hash."""
+        return state_hash
 
-    def update_hash_table(self, neighbors):
-        """Updates the class variable and returns neighbor hashes."""
+    def get_neighbor_hashes(self, neighbors):
+        """Returns neighbor hashes."""
         _neighbor_hashes = []
         for transition, neighbor in neighbors:
-            temp_board = board.Board(neighbor)
-            self.hash_table[hash(temp_board)] = neighbor
-            _neighbor_hashes.append((transition, hash(temp_board)))
+            neighbor_hash = board.get_canonical_key(neighbor, self.symmetries)
+            _neighbor_hashes.append((transition, neighbor_hash))
         return _neighbor_hashes
 
     @staticmethod
@@ -52,14 +53,14 @@ class Graph:
 
     @staticmethod
     def get_neighbors(state):
-        """Gets the neighbor states using current state."""
-        input_state = board.Board(state)
+        """Gets the neighbor state bitboards using current state bitboard."""
+        input_state = board.Board.from_bitboard(state)
         transitions = input_state.get_possible_transitions()
         states = []
         for transition in transitions:
-            current_state = input_state.copy()
-            current_state.move(*transition)
-            states.append((transition, current_state.get_board_state()))
+            input_state.make_move(*transition)
+            states.append((transition, input_state.pegs))
+            input_state.unmake_move(*transition)
         return states
 
 
@@ -77,7 +78,9 @@ class PriorityQueue:
     def __init__(self):
         self.elements = []
 
-    def put(self, item, priority):
+    def put(self, item, priority, depth=0):
+        """Puts item with priority. The depth is not used, items of the same
+        priority come out in increasing order."""
         heapq.heappush(self.elements, (priority, item))
 
     def get(self):
@@ -86,12 +89,76 @@ class PriorityQueue:
     def is_empty(self):
         return len(self.elements) == 0
 
+    def __len__(self):
+        return len(self.elements)
+
+
+class BucketQueue(object):
+    """BucketQueue class that models a priority queue for small non negative
+    integer priorities, with the methods of PriorityQueue.
+
+    Items are kept in one bucket per priority, split by depth, so put and
+    get take constant time. Of the items with the least priority the
+    deepest is returned first, and among them the last one put.
+
+    Putting an item again with another priority leaves its earlier entry in
+    its bucket. Only the latest entry of an item is live; get skips the
+    stale ones instead of returning the item twice.
+
+    Attributes:
+        buckets: A python list holding for every priority a python list of
+            the items put at every depth. Empty depths at the end of a
+            bucket are dropped.
+        priorities: A python dictionary containing the priority of the live
+            entry of every item in the queue.
+        min_priority: A number no larger than the least priority of an item
+            in the queue.
+        stale: A number representing how many stale entries were skipped,
+            each one a state that is not expanded again.
+    """
+    def __init__(self):
+        self.buckets = []
+        self.priorities = {}
+        self.min_priority = 0
+        self.stale = 0
+
+    def put(self, item, priority, depth=0):
+        while len(self.buckets) <= priority:
+            self.buckets.append([])
+        bucket = self.buckets[priority]
+        while len(bucket) <= depth:
+            bucket.append([])
+        bucket[depth].append(item)
+        self.priorities[item] = priority
+        if priority < self.min_priority:
+            self.min_priority = priority
+
+    def get(self):
+        while True:
+            bucket = self.buckets[self.min_priority]
+            while not bucket:
+                self.min_priority += 1
+                bucket = self.buckets[self.min_priority]
+            item = bucket[-1].pop()
+            while bucket and not bucket[-1]:
+                bucket.pop()
+            if self.priorities.get(item) == self.min_priority:
+                del self.priorities[item]
+                return item
+            self.stale += 1
+
+    def is_empty(self):
+        return not self.priorities
+
+    def __len__(self):
+        return len(self.priorities)
+
 
 def heuristic_cost_1(graph, goal_state, node_hash):
     """Returns the difference between the number of pegs in the node and the
     goal states."""
     node_state = graph.get_state_from_hash(node_hash)
-    node_state_board = board.Board(node_state)
+    node_state_board = board.Board.from_bitboard(node_state)
     node_state_stats = node_state_board.get_board_stats()
     goal_state_board = board.Board(goal_state)
     goal_state_stats = goal_state_board.get_board_stats()
@@ -100,19 +167,135 @@ def heuristic_cost_1(graph, goal_state, node_hash):
 
 def heuristic_cost_2(graph, goal_state, node_hash):
     """Returns the sum of manhattan distances of every peg from the peg in the
-    center of the board."""
-    node_state = graph.get_state_from_hash(node_hash)
+    center of the board.
+
+    Unlike heuristic_cost_1 it can exceed the number of moves left, which
+    is always the peg difference: the Cross configuration has 5 moves left
+    and a cost of 8. Every solution has the same length, so the solution
+    depth does not change, only which states are expanded first.
+    """
+    node_state = board.get_state_from_bitboard(
+        graph.get_state_from_hash(node_hash))
     distance = []
-    for i in node_state:
-        if i == 1:
-            x_loc, y_loc = board.get_peg_coordinates_from_number(i)
+    for number, value in enumerate(node_state, 1):
+        if value == board.FILLED_PEG:
+            x_loc, y_loc = board.get_peg_coordinates_from_number(number)
             manhattan_distance = (abs(4 - x_loc) + abs(4 - y_loc))
             distance.append(manhattan_distance)
-    average_distance = np.array(distance).sum()
-    return average_distance
+    return sum(distance)
+
 
+class WeightHeuristic(object):
+    """WeightHeuristic class that models a heuristic summing a weight over
+    the pegs of a state.
 
-def a_star_search(start, goal, simple=False):
+    Like PagodaPruner, the heuristic is evaluated once for a state with
+    get_values and then for every move out of it with get_child_values,
+    which only subtracts the precomputed change of the jump.
+
+    Attributes:
+        value_tables: The lookup tables of the weights, as returned by
+            pagoda.get_value_tables.
+        offset: A number subtracted from the sum of the weights, computed
+            once from goal state.
+        deltas: A python dictionary containing the decrease of the sum of
+            the weights keyed by (init_pos, final_pos) move.
+    """
+    def __init__(self, weights, offset=0):
+        """Initializes the heuristic using a list of weights indexed by bit
+        and the offset."""
+        self.value_tables = pagoda.get_value_tables(weights)
+        self.offset = offset
+        self.deltas = {}
+        for init_pos, middle_peg, final_pos in board.JUMPS:
+            self.deltas[(init_pos, final_pos)] = (
+                weights[board.HOLES.index(init_pos)] +
+                weights[board.HOLES.index(middle_peg)] -
+                weights[board.HOLES.index(final_pos)])
+
+    def get_values(self, pegs):
+        """Returns the values of the heuristic for the bitboard pegs."""
+        size = board.SYMMETRY_CHUNK_SIZE
+        mask = board.SYMMETRY_CHUNK_MASK
+        low, middle, high = self.value_tables
+        return (low[pegs & mask] + middle[pegs >> size & mask] +
+                high[pegs >> 2 * size] - self.offset)
+
+    def get_child_values(self, values, transition):
+        """Returns the values after the move transition from a state with
+        values."""
+        return values - self.deltas[transition]
+
+    @staticmethod
+    def get_cost(values):
+        """Returns the cost of a state from its values."""
+        return values
+
+
+class PatternDatabaseHeuristic(object):
+    """PatternDatabaseHeuristic class that models the pattern database
+    heuristic, with the same methods as WeightHeuristic.
+
+    The cost of a state is twice the difference between its number of pegs
+    and the number of pegs of goal state plus its pattern database cost, or
+    None if the pattern database shows that goal state can not be reached.
+    Counting the pegs twice makes the search go deeper first, and the
+    pattern database cost orders the states of one depth.
+
+    Attributes:
+        database: An object of PatternDatabase class built for goal state.
+        goal_pegs: A number indicating how many pegs goal state has.
+    """
+    def __init__(self, database):
+        self.database = database
+        self.goal_pegs = bin(database.goal).count("1")
+
+    def get_values(self, pegs):
+        """Returns the peg difference and the region patterns of the
+        bitboard pegs."""
+        return (bin(pegs).count("1") - self.goal_pegs,
+                self.database.get_patterns(pegs))
+
+    def get_child_values(self, values, transition):
+        """Returns the values after the move transition from a state with
+        values."""
+        peg_difference, patterns = values
+        return (peg_difference - 1,
+                self.database.get_child_patterns(patterns, transition))
+
+    def get_cost(self, values):
+        """Returns the cost of a state from its values."""
+        peg_difference, patterns = values
+        cost = self.database.get_patterns_cost(patterns)
+        if cost is None:
+            return None
+        return 2 * peg_difference + cost
+
+
+def get_heuristic(goal, simple=False, database=None):
+    """Returns the heuristic object a_star_search uses for the bitboard
+    goal.
+
+    The heuristic_cost_1 and heuristic_cost_2 functions are sums of a weight
+    over the pegs, so they become WeightHeuristic objects whose weight for
+    a hole is the value of the function for that peg alone. Goal state is
+    only looked at here, once per search.
+    """
+    if database is not None:
+        return PatternDatabaseHeuristic(database)
+    if simple:
+        return WeightHeuristic([1] * len(board.HOLES),
+                               bin(goal).count("1"))
+    weights = []
+    for bit in range(len(board.HOLES)):
+        graph = Graph(board.Board.from_bitboard(1 << bit), ())
+        weights.append(int(heuristic_cost_2(graph, goal, 1 << bit)))
+    return WeightHeuristic(weights)
+
+
+def a_star_search(start, goal, simple=False, pruner=None, database=None,
+                  heuristic=None, fringe=None, instrument=None, cache=None,
+                  token=None):
     """A* Search method.
 
     Args:
@@ -121,76 +304,213 @@ def a_star_search(start, goal, simple=False):
         simple: A boolean which is used to switch between the two heuristics.
             If this is set as true, heuristic_cost_1 is chosen otherwise,
             heuristic_cost_2 is chosen. By default it is set as false.
-
-    Returns: A tuple containing the number of nodes expanded and a python
-    dictionary containing parent pointers of every explored state's hash.
+            heuristic_cost_1 never overestimates and expands fewer nodes
+            on most configurations of benchmark; heuristic_cost_2 does on
+            Up.
+        pruner: An object of PagodaPruner class that cuts the moves to
+            states which can not reach goal state, and counts them. One is
+            created for goal state if it is None.
+        database: An object of PatternDatabase class built for goal state.
+            If it is given, PatternDatabaseHeuristic is chosen over the
+            other two heuristics.
+        heuristic: An object with the methods of WeightHeuristic, used
+            instead of the one picked by simple and database. The states
+            it gives no cost for are dropped.
+        fringe: An empty object of PriorityQueue or BucketQueue class used
+            as open list. A PriorityQueue is used if it is None; its order
+            among states of the same cost leads to the fewest expansions on
+            the configurations in main.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot every instrument.interval expansions,
+            and the heuristic evaluations are timed.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for start and goal state, the store of its path is
+            returned without searching; otherwise the solution found is
+            added to it.
+        token: An object of CancellationToken class or None. If it is
+            given, it is checked every token.interval expansions and
+            cancellation.SearchStopped is raised, with the number of nodes
+            expanded and the largest g cost reached, once it tells the
+            search to stop.
+
+    Returns: A tuple containing the number of nodes expanded and an object
+    of StateStore class holding the parent pointer, g cost and move of every
+    explored state's canonical key.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out start and goal state,
+            which are then not searched at all.
     """
     start_state = board.Board(start)
-    start_hash = hash(start_state)
     goal_state = board.Board(goal)
-    goal_hash = hash(goal_state)
-
-    graph = Graph(start_state)
-    parent = dict()
-    parent[start_hash] = None
-    path_cost = dict()
-    path_cost[start_hash] = 0
-
-    fringe = PriorityQueue()
+    board.check_solvable(start_state.pegs, goal_state.pegs)
+    symmetries = board.get_symmetries(goal_state.pegs)
+    if cache is not None:
+        options = get_cache_options(simple, database, heuristic)
+        moves = cache.get(start, goal, options)
+        if moves is not None:
+            return 0, get_path_store(start_state, moves, symmetries)
+        count, store = a_star_search(start, goal, simple, pruner, database,
+                                     heuristic, fringe, instrument,
+                                     token=token)
+        answer = backtrack(store, start, goal)
+        if answer is not None:
+            cache.put(start, goal, options, [move for move, _ in answer])
+        return count, store
+    start_hash = start_state.canonical_key(symmetries)
+    goal_hash = goal_state.canonical_key(symmetries)
+
+    graph = Graph(start_state, symmetries)
+    if pruner is None:
+        pruner = pagoda.PagodaPruner(goal_state.pegs)
+    if heuristic is None:
+        heuristic = get_heuristic(goal_state.pegs, simple, database)
+    # The checkpoints are never reached by count when nothing is measured
+    # or checked.
+    checkpoint = -1
+    check_at = -1
+    if token is not None:
+        check_at = token.check()
+    if instrument is not None:
+        heuristic = instrument.wrap_heuristic(heuristic)
+        checkpoint = instrument.start("A* Search", pruner)
+    store = state_store.StateStore()
+    store.add(start_hash)
+
+    if fringe is None:
+        fringe = PriorityQueue()
     fringe.put(start_hash, 0)
     count = 0
+    duplicates = 0
+    reopened = 0
 
     while not fringe.is_empty():
         current = fringe.get()
         count += 1
+        if count == checkpoint:
+            checkpoint = instrument.progress(
+                count, len(store) - 1 + reopened + duplicates, duplicates,
+                len(fringe))
+        if count == check_at:
+            try:
+                check_at = token.check(count)
+            except cancellation.SearchStopped as error:
+                error.depth = max(store.g_costs)
+                if instrument is not None:
+                    instrument.finish(count)
+                raise
 
         if current == goal_hash:
             break
 
+        # The transitions are made on the canonical orientation of current,
+        # which the pagoda slacks and heuristic values are computed for.
+        # Symmetries preserve the goal state, so pruning canonical states is
+        # safe and the cost of a child does not depend on its orientation.
+        current_state = graph.get_state_from_hash(current)
+        current_index = store.find(current)
+        slacks = pruner.get_slacks(current_state)
+        values = heuristic.get_values(current_state)
+        g_cost = store.g_costs[current_index] + graph.edge_cost()
         for transition, child_hash in graph.neighbors(current):
-            g_cost = path_cost[current] + graph.edge_cost()
-            if child_hash not in path_cost or g_cost < path_cost[child_hash]:
-                parent[child_hash] = (transition, current)
-                path_cost[child_hash] = g_cost
-                if simple:
-                    h_cost = heuristic_cost_1(graph, goal, child_hash)
-                else:
-                    h_cost = heuristic_cost_2(graph, goal, child_hash)
-                f_cost = g_cost + h_cost
-                fringe.put(child_hash, f_cost)
-    return count, parent
-
-
-def backtrack(parent, start, goal):
+            if pruner.get_child_slacks(slacks, transition) is None:
+                continue
+            child_index = store.find(child_hash)
+            if child_index == state_store.NOT_FOUND:
+                store.add(child_hash, current_index, g_cost, transition)
+            elif g_cost < store.g_costs[child_index]:
+                store.update(child_index, current_index, g_cost, transition)
+                reopened += 1
+            else:
+                duplicates += 1
+                continue
+            h_cost = heuristic.get_cost(
+                heuristic.get_child_values(values, transition))
+            if h_cost is None:
+                continue
+            f_cost = g_cost + h_cost
+            fringe.put(child_hash, f_cost, g_cost)
+    if instrument is not None:
+        instrument.finish(count, len(store) - 1 + reopened + duplicates,
+                          duplicates, len(fringe))
+    return count, store
+
+
+def get_cache_options(simple=False, database=None, heuristic=None):
+    """Returns the options string of the heuristic a_star_search picks, for
+    SolutionCache."""
+    if heuristic is not None:
+        return "astar:%s" % type(heuristic).__name__
+    if database is not None:
+        return "astar:database"
+    if simple:
+        return "astar:simple"
+    return "astar:distance"
+
+
+def get_path_store(start_state, moves, symmetries):
+    """Returns a StateStore holding only the states along moves from
+    start_state, which is left unchanged, as a_star_search would have
+    stored them, so that backtrack follows moves."""
+    state = start_state.copy()
+    store = state_store.StateStore()
+    index = store.add(state.canonical_key(symmetries))
+    for g_cost, move in enumerate(moves, 1):
+        symmetry = board.get_symmetry_between(
+            state.pegs, store.keys[index], symmetries)
+        state.move(*move)
+        index = store.add(state.canonical_key(symmetries), index, g_cost,
+                          board.get_symmetric_transition(move, symmetry))
+    return store
+
+
+def backtrack(store, start, goal):
     """This methods backtracks and returns the path to the goal from start
-    state using parent pointer dictionary, start state and goal state as
-    inputs"""
+    state using the StateStore returned by a_star_search, start state and
+    goal state as inputs. It returns None if goal state was not reached.
+
+    The transitions in store are made on the canonical orientation of each
+    state, so every move is mapped back onto the state actually reached from
+    start.
+    """
     start_state = board.Board(start)
-    start_hash = hash(start_state)
     goal_state = board.Board(goal)
-    state = hash(goal_state)
+    symmetries = board.get_symmetries(goal_state.pegs)
+    index = store.find(goal_state.canonical_key(symmetries))
+    if index == state_store.NOT_FOUND:
+        return None
+
+    steps = []
+    while store.parents[index] != state_store.NO_PARENT:
+        parent_index = store.parents[index]
+        steps.append((store.get_transition(index), store.keys[parent_index],
+                      store.keys[index]))
+        index = parent_index
 
     answer = []
-    while state != start_hash:
-        cur_state = state
-        transition, state = parent[state]
-        answer.append((transition, cur_state))
-    return answer[::-1]
-
-
-def plot_path(answer, start):
-    """Plots the path and saves it as a set of images showing moves taken to
-    reach goal state from start state."""
-    my_board = board.Board(start)
-    my_board.plot_board(name="move 0")
-    for m_num, step in enumerate(answer):
-        move, state_hash = step
-        my_board.move(*move)
-        name = "move %d" % (m_num + 1)
-        my_board.plot_board(name=name)
+    for transition, state, cur_state in reversed(steps):
+        symmetry = board.get_symmetry_between(start_state.pegs, state,
+                                              symmetries)
+        move = board.get_symmetric_transition(
+            transition, board.INVERSE_SYMMETRIES[symmetry])
+        start_state.move(*move)
+        answer.append((move, cur_state))
+    return answer
+
+
+def plot_path(answer, start, path=None):
+    """Plots the path to a single animated GIF or sprite sheet showing moves
+    taken to reach goal state from start state, with render.plot_path. The
+    file is render's default if path is None."""
+    import render
+    if path is None:
+        return render.plot_path(answer, start)
+    return render.plot_path(answer, start, path)
 
 
 def main():
+    from guppy import hpy
+
     # Cross Configuration
     root = board.translate_input_to_array(['--000--',
                                            '--0X0--',
@@ -266,16 +586,20 @@ def main():
     hp = hpy()
     before = hp.heap()
     start_time = time.time()
-    count, parent = a_star_search(root, goal, simple=False)
+    count, store = a_star_search(root, goal, simple=False,
+                                 cache=solution_cache.SolutionCache())
     end_time = time.time()
     after = hp.heap()
     leftover = after - before
-    answer = backtrack(parent, root, goal)
+    answer = backtrack(store, root, goal)
 
     print "Total number of nodes expanded: %d" % count
-    print "Answer depth: %d" % len([move for move, _ in answer])
-    print "Moves: %s" % [move for move, _ in answer]
-    print "Time: %d seconds\n" % (end_time - start_time)
+    if answer is None:
+        print "No solution"
+    else:
+        print "Answer depth: %d" % len(answer)
+        print "Moves: %s" % [move for move, _ in answer]
+    print "Time: %.3f seconds\n" % (end_time - start_time)
     print leftover
 
     # plot_path(answer, root)
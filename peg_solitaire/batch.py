@@ -0,0 +1,328 @@
+import argparse
+import benchmark
+import board
+import json
+import multiprocessing
+import multiprocessing.queues
+import os
+import Queue
+import signal
+import sys
+import time
+
+# Solvers a batch can use: those of the benchmark that do not start a pool
+# of their own, which a worker process of the batch can not do.
+SOLVER_NAMES = [name for name in benchmark.SOLVER_NAMES
+                if name not in ("parallel", "parallel_ids")]
+
+# Number of puzzles handed to the pool per worker process ahead of the
+# results, which bounds the puzzles held in memory.
+TASKS_PER_PROCESS = 4
+
+# Seconds run_batch waits for a result before it looks for puzzles lost to
+# a worker process that died or overran its timeout by LOST_GRACE seconds.
+RESULT_WAIT = 1
+LOST_GRACE = 10
+
+# Queue a worker process of run_batch announces the puzzles it starts on.
+_started = None
+
+
+class PuzzleTimeout(Exception):
+    """Raised in a worker process when a puzzle runs out of time."""
+    pass
+
+
+def read_puzzles(lines):
+    """Yields the puzzles of lines, a file object or another iterable of
+    lines, one at a time.
+
+    Lines starting with "{" are JSON objects holding the board rows in
+    "board", and optionally an "id" and the goal rows in "goal". The other
+    lines hold boards in 0X- format, one row per line, separated by blank
+    lines; lines starting with "#" are skipped.
+
+    Yields: Tuples of the puzzle id, the board rows, the goal rows or None,
+    and an error message or None. Puzzles without an id are numbered from
+    1. A malformed record is yielded with its error message instead of
+    stopping the reading, so that it costs one puzzle only.
+    """
+    number = 0
+    rows = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            number += 1
+            try:
+                puzzle = json.loads(line)
+            except ValueError as error:
+                yield number, None, None, "invalid JSON: %s" % error
+                continue
+            if not isinstance(puzzle, dict) or "board" not in puzzle:
+                yield number, None, None, "no board: %s" % line
+                continue
+            yield (puzzle.get("id", number), puzzle["board"],
+                   puzzle.get("goal"), None)
+        elif line:
+            rows.append(line)
+            if len(rows) == board.BOARD_SIZE:
+                number += 1
+                yield number, rows, None, None
+                rows = []
+        elif rows:
+            number += 1
+            yield number, rows, None, "incomplete board: %s" % rows
+            rows = []
+    if rows:
+        number += 1
+        yield number, rows, None, "incomplete board: %s" % rows
+
+
+def get_state(rows):
+    """Returns the state list of the board rows in 0X- format, checking that
+    they fit the board geometry."""
+    if (not isinstance(rows, list) or
+            not all(isinstance(row, basestring) for row in rows)):
+        raise ValueError("not a board: %r" % (rows,))
+    state = board.translate_input_to_array(rows)
+    blanks = [number for number, value in enumerate(state, 1)
+              if value == board.BLANK]
+    if (len(state) != board.BOARD_SIZE * board.BOARD_SIZE or
+            len(blanks) + len(board.HOLES) != len(state) or
+            any(number in board.HOLE_BITS for number in blanks)):
+        raise ValueError("not a board: %s" % rows)
+    return state
+
+
+def _raise_timeout(signum, frame):
+    raise PuzzleTimeout()
+
+
+def solve_puzzle(args):
+    """Solves one puzzle in a worker process.
+
+    Args:
+        args: A tuple of the puzzle id, board rows, goal rows, error message
+            of read_puzzles, solver name and the number of seconds allowed,
+            or None for no limit.
+
+    Returns: A python dictionary holding the puzzle id, a status of
+    "solved", "unsolvable", "timeout" or "error", the moves, the number of
+    nodes expanded and the seconds taken. An "unsolvable" result also holds
+    the reason: the message of the board.Unsolvable raised before
+    searching, or "no solution found".
+    """
+    puzzle_id, rows, goal_rows, error, solver, timeout = args
+    result = {"id": puzzle_id, "solver": solver}
+    start_time = time.time()
+    try:
+        # The timer is cleared before the outer handlers run, and fires
+        # once, so an alarm going off after the solver returned is caught
+        # here as well.
+        try:
+            if timeout:
+                signal.signal(signal.SIGALRM, _raise_timeout)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            if error is not None:
+                raise ValueError(error)
+            root = get_state(rows)
+            goal = get_state(goal_rows or benchmark.GOAL)
+            reason = "no solution found"
+            try:
+                count, moves = dict(benchmark.SOLVERS)[solver](root, goal)
+            except board.Unsolvable as unsolvable:
+                count, moves, reason = 0, None, str(unsolvable)
+            result.update({"status": "unsolvable" if moves is None
+                           else "solved",
+                           "moves": moves, "nodes": count})
+            if moves is None:
+                result["reason"] = reason
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except PuzzleTimeout:
+        result = {"id": puzzle_id, "solver": solver, "status": "timeout"}
+    except Exception as error:
+        result.update({"status": "error", "error": str(error)})
+    result["time"] = time.time() - start_time
+    return result
+
+
+def _init_worker(started):
+    """Keeps the queue started in a worker process of run_batch."""
+    global _started
+    _started = started
+
+
+def _run_task(task):
+    """Runs one task of run_batch in a worker process.
+
+    Announces the task on the started queue, then returns a tuple of the
+    task index and the result of solve_puzzle, or an "error" result for
+    any exception it lets through, so that every task gets a result.
+    """
+    index, args = task
+    _started.put((index, os.getpid(), time.time()))
+    try:
+        return index, solve_puzzle(args)
+    except Exception as error:
+        return index, {"id": args[0], "solver": args[4], "status": "error",
+                       "error": str(error)}
+
+
+def _is_alive(pid):
+    """Returns true if the process pid exists."""
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def run_batch(puzzles, output, solver="bidirectional", processes=None,
+              timeout=None):
+    """Solves puzzles on a pool of worker processes and writes one JSON line
+    per result to output as soon as it is ready, in order of completion.
+
+    Only TASKS_PER_PROCESS puzzles per process are handed to the pool
+    ahead of the results, so puzzles is read as the workers need more and
+    memory does not grow with the number of puzzles.
+
+    A puzzle whose worker process died gets an "error" result, and one
+    still running LOST_GRACE seconds past its timeout gets a "timeout"
+    result and its worker is killed, so that the pool replaces it.
+
+    The files solver needs for the default goal state are built before the
+    pool starts, see benchmark.prepare_solver.
+
+    Args:
+        puzzles: An iterable of tuples as yielded by read_puzzles.
+        output: A file object the results are written to.
+        solver: A name of SOLVER_NAMES.
+        processes: A number indicating the number of worker processes. It
+            defaults to the number of CPUs.
+        timeout: The number of seconds allowed per puzzle, or None.
+
+    Returns: A python dictionary containing the number of results of every
+    status.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    window = TASKS_PER_PROCESS * processes
+    results = Queue.Queue()
+    # A SimpleQueue is written without a feeder thread, so an announcement
+    # is not lost when the worker dies right after it.
+    started = multiprocessing.queues.SimpleQueue()
+    totals = {}
+    benchmark.prepare_solver(solver,
+                             board.translate_input_to_array(benchmark.GOAL))
+    pool = multiprocessing.Pool(processes, _init_worker, (started,))
+    try:
+        # The puzzle id of every task without a result, and the worker
+        # process and start time of the ones started.
+        pending = {}
+        running = {}
+        index = 0
+        puzzles = iter(puzzles)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                try:
+                    puzzle_id, rows, goal_rows, error = next(puzzles)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pool.apply_async(_run_task,
+                                 [(index, (puzzle_id, rows, goal_rows, error,
+                                           solver, timeout))],
+                                 callback=results.put)
+                pending[index] = puzzle_id
+                index += 1
+            if not pending:
+                continue
+            finished = []
+            try:
+                finished.append(results.get(timeout=RESULT_WAIT))
+            except Queue.Empty:
+                finished = _get_lost(pending, running, started, solver,
+                                     timeout)
+            for task, result in finished:
+                if pending.pop(task, None) is None:
+                    continue
+                running.pop(task, None)
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                totals[result["status"]] = totals.get(result["status"],
+                                                      0) + 1
+    finally:
+        pool.terminate()
+        pool.join()
+    return totals
+
+
+def _get_lost(pending, running, started, solver, timeout):
+    """Returns (task index, result) tuples for the pending tasks of
+    run_batch whose worker process died or which overran timeout by
+    LOST_GRACE seconds, killing the workers of the latter.
+
+    Args:
+        pending: A python dictionary of the puzzle id of every task
+            without a result, by task index.
+        running: A python dictionary of the worker process id and start
+            time of the started tasks, by task index, updated from started.
+        started: The queue the workers announce the tasks they start on.
+        solver: The solver name of the batch.
+        timeout: The number of seconds allowed per puzzle, or None.
+    """
+    while not started.empty():
+        task, pid, start_time = started.get()
+        if task in pending:
+            running[task] = (pid, start_time)
+    lost = []
+    for task, (pid, start_time) in running.items():
+        result = {"id": pending[task], "solver": solver,
+                  "time": time.time() - start_time}
+        if not _is_alive(pid):
+            result.update({"status": "error",
+                           "error": "worker process died"})
+        elif (timeout is not None and
+              time.time() - start_time > timeout + LOST_GRACE):
+            os.kill(pid, signal.SIGKILL)
+            result["status"] = "timeout"
+        else:
+            continue
+        lost.append((task, result))
+    return lost
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solves a stream of puzzles on a pool of processes.")
+    parser.add_argument("input", help="JSONL or 0X- text file, - for stdin")
+    parser.add_argument("--output", help="JSONL file the results are "
+                        "written to, stdout by default")
+    parser.add_argument("--solver", choices=SOLVER_NAMES,
+                        default="bidirectional")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--timeout", type=float,
+                        help="seconds allowed per puzzle")
+    args = parser.parse_args()
+
+    lines = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        totals = run_batch(read_puzzles(lines), output, args.solver,
+                           args.processes, args.timeout)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if output is not sys.stdout:
+            output.close()
+    sys.stderr.write("%s\n" % ", ".join(
+        "%s: %d" % item for item in sorted(totals.items())))
+
+
+if __name__ == '__main__':
+    main()
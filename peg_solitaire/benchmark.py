@@ -0,0 +1,435 @@
+import argparse
+import astar
+import bidirectional
+import board
+import external
+import idastar
+import ids
+import json
+import layered
+import multiprocessing
+import os
+import parallel
+import parallel_ids
+import pattern_database
+import platform
+import pruned_ids
+import Queue
+import resource
+import subprocess
+import sys
+import time
+import transposition
+
+# Named board configurations, in order of increasing size, all solved
+# towards GOAL.
+CONFIGURATIONS = [
+    ("Cross", ['--000--',
+               '--0X0--',
+               '00XXX00',
+               '000X000',
+               '000X000',
+               '--000--',
+               '--000--']),
+    ("Plus", ['--000--',
+              '--0X0--',
+              '000X000',
+              '0XXXXX0',
+              '000X000',
+              '--0X0--',
+              '--000--']),
+    ("Fireplace", ['--XXX--',
+                   '--XXX--',
+                   '00XXX00',
+                   '00X0X00',
+                   '0000000',
+                   '--000--',
+                   '--000--']),
+    ("Up", ['--0X0--',
+            '--XXX--',
+            '0XXXXX0',
+            '000X000',
+            '000X000',
+            '--XXX--',
+            '--XXX--']),
+    ("Pyramid", ['--000--',
+                 '--0X0--',
+                 '00XXX00',
+                 '0XXXXX0',
+                 'XXXXXXX',
+                 '--000--',
+                 '--000--']),
+    ("Diamond", ['--0X0--',
+                 '--XXX--',
+                 '0XXXXX0',
+                 'XXX0XXX',
+                 '0XXXXX0',
+                 '--XXX--',
+                 '--0X0--']),
+    ("Start", ['--XXX--',
+               '--XXX--',
+               'XXXXXXX',
+               'XXX0XXX',
+               'XXXXXXX',
+               '--XXX--',
+               '--XXX--']),
+]
+CONFIGURATION_NAMES = [name for name, _ in CONFIGURATIONS]
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+# A result is flagged when its best time or peak RSS grows by more than
+# this fraction of the baseline, and its best time by more than
+# MIN_TIME_CHANGE seconds, below which timings are noise.
+TOLERANCE = 0.2
+MIN_TIME_CHANGE = 0.05
+
+# Modules the solvers are made of, which must import with only the
+# standard library and NumPy, within IMPORT_BUDGET seconds each in a fresh
+# interpreter; the plotting libraries are only imported by render.
+CORE_MODULES = ["board", "pagoda", "state_store", "transposition",
+                "move_order", "instrument", "cancellation", "solution_cache",
+                "astar", "ids", "pruned_ids", "idastar", "layered",
+                "bidirectional", "external", "parallel", "parallel_ids",
+                "pattern_database", "service", "batch"]
+HEAVY_MODULES = ["matplotlib", "scipy", "seaborn", "guppy"]
+IMPORT_BUDGET = 0.5
+
+# Core modules on the search path of the solvers that do not work on numpy
+# arrays, which must not load NumPy either.
+STDLIB_MODULES = ["board", "pagoda", "state_store", "transposition",
+                  "move_order", "instrument", "cancellation",
+                  "solution_cache", "astar", "ids", "pruned_ids", "layered",
+                  "bidirectional", "parallel_ids", "service"]
+
+# Run in a fresh interpreter by measure_import with the module name.
+IMPORT_SCRIPT = """
+import json, sys, time
+start_time = time.time()
+__import__(sys.argv[1])
+print(json.dumps([time.time() - start_time, sorted(
+    name for name in sys.modules if name.split(".")[0] in sys.argv[2:])]))
+"""
+
+
+def get_configuration(name):
+    """Returns the state list of the configuration name."""
+    return board.translate_input_to_array(dict(CONFIGURATIONS)[name])
+
+
+def run_a_star(root, goal):
+    count, store = astar.a_star_search(root, goal)
+    answer = astar.backtrack(store, root, goal)
+    return count, answer and [move for move, _ in answer]
+
+
+def run_ida_star(root, goal):
+    database = pattern_database.get_pattern_database(
+        board.get_bitboard_from_state(goal))
+    _, count, moves = idastar.ida_star_search(
+        root, goal, database=database,
+        table=transposition.TranspositionTable())
+    return count, moves
+
+
+def run_ids(root, goal):
+    _, count, moves = ids.iterative_deepening_search(root, goal)
+    return count, moves
+
+
+def run_pruned_ids(root, goal):
+    _, count, moves = pruned_ids.iterative_deepening_search(root, goal)
+    return count, moves
+
+
+def run_parallel_ids(root, goal):
+    _, count, moves = parallel_ids.parallel_iterative_deepening_search(
+        root, goal, pruned=True)
+    return count, moves
+
+
+def run_external(root, goal):
+    count, moves, _ = external.external_search(root, goal)
+    return count, moves
+
+
+# Solvers by name, each a function of the start and goal state lists
+# returning the number of nodes expanded and the moves found, or None. They
+# raise board.Unsolvable for the states board.is_solvable rules out.
+SOLVERS = [
+    ("astar", run_a_star),
+    ("idastar", run_ida_star),
+    ("ids", run_ids),
+    ("pruned_ids", run_pruned_ids),
+    ("parallel_ids", run_parallel_ids),
+    ("layered", layered.layered_search),
+    ("bidirectional", bidirectional.bidirectional_search),
+    ("external", run_external),
+    ("parallel", parallel.parallel_search),
+]
+SOLVER_NAMES = [name for name, _ in SOLVERS]
+
+
+def prepare_solver(solver, goal):
+    """Builds the files solver needs for the goal state list, so that they
+    are ready before worker processes start or a run is timed."""
+    if solver == "idastar":
+        pattern_database.get_pattern_database(
+            board.get_bitboard_from_state(goal))
+
+
+# Solvers whose node count depends on which worker process finishes first,
+# so that compare does not check it.
+NONDETERMINISTIC_SOLVERS = ("parallel", "parallel_ids")
+
+
+def measure(solver, configuration, repeats, warmup):
+    """Runs the solver named solver on the configuration named
+    configuration warmup times untimed and repeats times timed.
+
+    Returns: A python dictionary holding the number of nodes expanded, the
+    solution depth, or None if there is no solution, the wall time of every
+    timed run, the best of them, nodes per second over the best time and
+    the peak RSS of the process in bytes.
+    """
+    run = dict(SOLVERS)[solver]
+    root = get_configuration(configuration)
+    goal = board.translate_input_to_array(GOAL)
+    for _ in range(warmup):
+        run(root, goal)
+    times = []
+    for _ in range(repeats):
+        start_time = time.time()
+        count, moves = run(root, goal)
+        times.append(time.time() - start_time)
+    best_time = min(times)
+    return {
+        "solver": solver,
+        "configuration": configuration,
+        "status": "ok",
+        "nodes": count,
+        "depth": None if moves is None else len(moves),
+        "times": times,
+        "best_time": best_time,
+        "nodes_per_second": count / best_time if best_time else None,
+        "peak_rss": resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def _measure_in_child(queue, args):
+    """Puts the result of measure(*args) on queue, in a child process."""
+    queue.put(measure(*args))
+
+
+def run_benchmark(solver, configuration, repeats=3, warmup=1, timeout=None):
+    """Measures one solver on one configuration in a new process, so that
+    the peak RSS is the one of that benchmark alone and a run over timeout
+    seconds can be stopped.
+
+    Returns: A python dictionary as returned by measure, or holding only
+    the solver, configuration and a status of "timeout" or "error".
+    """
+    prepare_solver(solver, board.translate_input_to_array(GOAL))
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_measure_in_child,
+        args=(queue, (solver, configuration, repeats, warmup)))
+    process.start()
+    deadline = None
+    if timeout is not None:
+        deadline = time.time() + timeout
+    result = None
+    status = "error"
+    while result is None and process.is_alive():
+        if deadline is not None and time.time() > deadline:
+            process.terminate()
+            status = "timeout"
+            break
+        try:
+            result = queue.get(timeout=1)
+        except Queue.Empty:
+            pass
+    if result is None and status == "error":
+        # The child may have put its result just before exiting.
+        try:
+            result = queue.get(timeout=1)
+        except Queue.Empty:
+            pass
+    process.join()
+    if result is None:
+        result = {"solver": solver, "configuration": configuration,
+                  "status": status}
+    return result
+
+
+def run_matrix(solvers=SOLVER_NAMES, configurations=CONFIGURATION_NAMES,
+               repeats=3, warmup=1, timeout=None):
+    """Runs every solver on every configuration.
+
+    Returns: A python dictionary holding the settings of the run and the
+    list of results of run_benchmark.
+    """
+    results = []
+    for configuration in configurations:
+        for solver in solvers:
+            result = run_benchmark(solver, configuration, repeats, warmup,
+                                   timeout)
+            print format_result(result)
+            results.append(result)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "warmup": warmup,
+        "timeout": timeout,
+        "results": results,
+    }
+
+
+def measure_import(module, repeats=3, heavy_modules=HEAVY_MODULES):
+    """Imports module in repeats fresh interpreters.
+
+    Returns: A python dictionary holding the best import time in seconds
+    and the sorted names of the heavy_modules it loaded.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeats):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT, module] + heavy_modules,
+            cwd=directory)
+        import_time, heavy = json.loads(output.splitlines()[-1])
+        times.append(import_time)
+    return {"module": module, "time": min(times), "heavy": heavy}
+
+
+def check_imports(modules=CORE_MODULES, budget=IMPORT_BUDGET):
+    """Checks that every module of modules imports within budget seconds
+    without loading any of HEAVY_MODULES, nor NumPy if it is one of
+    STDLIB_MODULES.
+
+    Returns: A list of strings describing the violations.
+    """
+    violations = []
+    for module in modules:
+        heavy_modules = HEAVY_MODULES
+        if module in STDLIB_MODULES:
+            heavy_modules = HEAVY_MODULES + ["numpy"]
+        result = measure_import(module, heavy_modules=heavy_modules)
+        print "import %s: %.3f seconds" % (module, result["time"])
+        if result["heavy"]:
+            violations.append("import %s loads %s" % (
+                module, ", ".join(result["heavy"])))
+        if result["time"] > budget:
+            violations.append("import %s: %.3f seconds, budget %.3f" % (
+                module, result["time"], budget))
+    return violations
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """Compares the results of report with the ones of baseline for the
+    same solver and configuration.
+
+    A result is a regression if it is no longer solved, finds another
+    depth, expands more nodes, unless its solver is one of
+    NONDETERMINISTIC_SOLVERS, or its best time or peak RSS grew by more
+    than tolerance. Best times within MIN_TIME_CHANGE seconds of the
+    baseline are never flagged.
+
+    Returns: A list of strings describing the regressions.
+    """
+    expected = dict(((result["solver"], result["configuration"]), result)
+                    for result in baseline["results"])
+    regressions = []
+    for result in report["results"]:
+        key = (result["solver"], result["configuration"])
+        if key not in expected or expected[key]["status"] != "ok":
+            continue
+        old = expected[key]
+        name = "%s on %s" % key
+        if result["status"] != "ok":
+            regressions.append("%s: %s" % (name, result["status"]))
+            continue
+        if result["depth"] != old["depth"]:
+            regressions.append("%s: depth %s, was %s" % (
+                name, result["depth"], old["depth"]))
+        if (result["solver"] not in NONDETERMINISTIC_SOLVERS and
+                result["nodes"] > old["nodes"]):
+            regressions.append("%s: %d nodes, was %d" % (
+                name, result["nodes"], old["nodes"]))
+        if (result["best_time"] > old["best_time"] * (1 + tolerance) and
+                result["best_time"] > old["best_time"] + MIN_TIME_CHANGE):
+            regressions.append("%s: %.3f seconds, was %.3f" % (
+                name, result["best_time"], old["best_time"]))
+        if result["peak_rss"] > old["peak_rss"] * (1 + tolerance):
+            regressions.append("%s: peak RSS %.1f MB, was %.1f MB" % (
+                name, result["peak_rss"] / 1e6, old["peak_rss"] / 1e6))
+    return regressions
+
+
+def format_result(result):
+    """Returns a one line summary of a result of run_benchmark."""
+    name = "%s on %s" % (result["solver"], result["configuration"])
+    if result["status"] != "ok":
+        return "%s: %s" % (name, result["status"])
+    return ("%s: depth %s, %d nodes, %.3f seconds, %.0f nodes/s, "
+            "peak RSS %.1f MB" % (name, result["depth"], result["nodes"],
+                                  result["best_time"],
+                                  result["nodes_per_second"] or 0,
+                                  result["peak_rss"] / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs the solvers on the named configurations.")
+    parser.add_argument("--solvers", nargs="+", choices=SOLVER_NAMES,
+                        default=SOLVER_NAMES)
+    parser.add_argument("--configurations", nargs="+",
+                        choices=CONFIGURATION_NAMES,
+                        default=CONFIGURATION_NAMES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="seconds allowed per solver and configuration")
+    parser.add_argument("--output", help="JSON file the results are saved to")
+    parser.add_argument("--baseline", help="JSON file of earlier results")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET,
+                        help="seconds allowed to import each core module")
+    parser.add_argument("--imports-only", action="store_true",
+                        help="only check the imports of the core modules")
+    args = parser.parse_args()
+
+    violations = check_imports(budget=args.import_budget)
+    for violation in violations:
+        print "Regression: %s" % violation
+    if args.imports_only:
+        if violations:
+            raise SystemExit(1)
+        return
+
+    report = run_matrix(args.solvers, args.configurations, args.repeats,
+                        args.warmup, args.timeout)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(report, json.load(baseline),
+                                  args.tolerance)
+        for regression in regressions:
+            print "Regression: %s" % regression
+        violations += regressions
+    if violations:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import board
+import layered
+import pagoda
+import time
+
+
+def bidirectional_search(start, goal, pruner=None, instrument=None,
+                         cache=None):
+    """Bidirectional Layered Search method.
+
+    A forward frontier is grown from start by jumps and a backward frontier
+    from goal by reverse jumps, which take a peg back over two empty holes.
+    Both are kept as sets of canonical keys one peg count layer at a time,
+    and the smaller one is grown until both reach the same peg count. A
+    state in both layers lies on a solution; the moves from start to it and
+    from it to goal are then recomputed with layered.solve_layers, each
+    over about half the depth. Only the two current layers are kept in
+    memory. States of the forward frontier which can not reach goal state
+    according to the pagoda functions of pruner are left out.
+
+    Args:
+        start: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            moves. One is created for goal state if it is None.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every layer, with the size of
+            both frontiers.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for start and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+
+    Returns: A tuple containing the number of nodes expanded and a list of
+    tuples representing the moves required to reach goal state, or None if
+    goal state can not be reached.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out start and goal state,
+            which are then not searched at all.
+    """
+    if cache is not None:
+        moves = cache.get(start, goal, "bidirectional")
+        if moves is not None:
+            return 0, moves
+    start_state = board.Board(start)
+    goal_state = board.Board(goal)
+    board.check_solvable(start_state.pegs, goal_state.pegs)
+    if pruner is None:
+        pruner = pagoda.PagodaPruner(goal_state.pegs)
+    if instrument is not None:
+        instrument.start("Bidirectional Layered Search", pruner)
+    count, moves = meet_in_the_middle(start_state, goal_state, pruner,
+                                      instrument)
+    if instrument is not None:
+        instrument.finish(count)
+    if cache is not None and moves is not None:
+        cache.put(start, goal, "bidirectional", moves)
+    return count, moves
+
+
+def meet_in_the_middle(start_state, goal_state, pruner, instrument=None):
+    """Returns the number of nodes expanded and the moves from start_state
+    to goal_state, or None, as bidirectional_search once the start and goal
+    states passed board.is_solvable."""
+    symmetries = board.get_symmetries(goal_state.pegs)
+    goal_key = goal_state.canonical_key(symmetries)
+
+    forward_pegs = start_state.count_pegs()
+    backward_pegs = goal_state.count_pegs()
+    forward = set([start_state.canonical_key(symmetries)])
+    backward = set([goal_key])
+    count = 0
+    while forward_pegs > backward_pegs:
+        if len(forward) <= len(backward):
+            count += len(forward)
+            forward = expand_forward(forward, symmetries, pruner)
+            forward_pegs -= 1
+        else:
+            count += len(backward)
+            backward = expand_backward(backward, symmetries)
+            backward_pegs += 1
+        if instrument is not None:
+            instrument.progress(count, frontier=len(forward) + len(backward))
+        if not forward or not backward:
+            return count, None
+    middle = forward & backward
+    if not middle:
+        return count, None
+    middle_key = min(middle)
+    del forward, backward, middle
+
+    depth = start_state.count_pegs() - forward_pegs
+    # The two halves expand states the frontiers already expanded, so the
+    # moves they prune are not counted again.
+    pruned = pruner.pruned
+    first_count, first_moves = layered.solve_layers(
+        start_state.pegs, middle_key, depth, symmetries, pruner)
+    for transition in first_moves:
+        start_state.make_move(*transition)
+    second_count, second_moves = layered.solve_layers(
+        start_state.pegs, goal_key, forward_pegs - goal_state.count_pegs(),
+        symmetries, pruner)
+    pruner.pruned = pruned
+    count += first_count + second_count
+    return count, first_moves + second_moves
+
+
+def expand_forward(layer, symmetries, pruner):
+    """Returns the canonical keys of the states one jump away from the
+    states of layer, leaving out the moves pruner cuts."""
+    next_layer = set()
+    for key in layer:
+        slacks = pruner.get_slacks(key)
+        for transition, source, target in board.JUMP_TABLE:
+            if ((key & source) == source and not key & target and
+                    pruner.get_child_slacks(slacks, transition) is not None):
+                next_layer.add(board.get_canonical_key(key ^ source ^ target,
+                                                       symmetries))
+    return next_layer
+
+
+def expand_backward(layer, symmetries):
+    """Returns the canonical keys of the states one reverse jump away from
+    the states of layer, that is the states with one more peg from which a
+    jump leads to a state of layer."""
+    next_layer = set()
+    for key in layer:
+        for _, source, target in board.JUMP_TABLE:
+            if (key & target) == target and not key & source:
+                next_layer.add(board.get_canonical_key(key ^ source ^ target,
+                                                       symmetries))
+    return next_layer
+
+
+def main():
+    from guppy import hpy
+
+    # Diamond Configuration
+    root = board.translate_input_to_array(['--0X0--',
+                                           '--XXX--',
+                                           '0XXXXX0',
+                                           'XXX0XXX',
+                                           '0XXXXX0',
+                                           '--XXX--',
+                                           '--0X0--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    count, moves = bidirectional_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Total number of nodes expanded: %d" % count
+    if moves is None:
+        print "No solution"
+    else:
+        print "Answer depth: %d" % len(moves)
+        print "Moves: %s" % moves
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
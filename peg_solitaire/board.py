@@ -1,19 +1,4 @@
-from matplotlib import pyplot as plt
-from matplotlib import rc
-from scipy.stats import itemfreq
-
-import copy
-import numpy as np
-import seaborn
-
-# configure plot parameters
-rc("figure", facecolor="white")
-rc("axes", facecolor="white")
-rc("axes", edgecolor="grey")
-rc("grid", alpha=0.9)
-rc("grid", linewidth=0.2)
-rc("grid", linestyle=":")
-colors = seaborn.color_palette()
+import collections
 
 
 # Peg Solitaire board model
@@ -24,16 +9,110 @@ BOARD_SIZE = 7
 COL_MOVE = "|"
 ROW_MOVE = "--"
 
-
-class Board:
+# Board geometry: HOLES holds the numbers (1 to 49) of the 33 playable holes
+# of the English board. A bitboard is an integer whose bit i is set when the
+# hole HOLES[i] has a peg in it.
+HOLES = tuple(number for number in range(1, BOARD_SIZE * BOARD_SIZE + 1)
+              if 2 <= (number - 1) % BOARD_SIZE <= 4 or
+              2 <= (number - 1) // BOARD_SIZE <= 4)
+HOLE_BITS = dict((number, 1 << bit) for bit, number in enumerate(HOLES))
+
+# Jump table: every legal (init_pos, middle_peg, final_pos) jump of the board
+# geometry, in the order moves are generated (going right, left, up and down
+# from each hole). The English board has 76 of them.
+JUMPS = tuple((init_pos, init_pos + step, init_pos + 2 * step)
+              for init_pos in HOLES
+              for step in (1, -1, -BOARD_SIZE, BOARD_SIZE)
+              if init_pos + 2 * step in HOLE_BITS and
+              (abs(step) == BOARD_SIZE or
+               (init_pos - 1) // BOARD_SIZE ==
+               (init_pos + 2 * step - 1) // BOARD_SIZE))
+# The same jumps as ((init_pos, final_pos), source, target) where source is
+# the mask of the two holes that must hold pegs and target the mask of the
+# hole that must be empty.
+JUMP_TABLE = tuple(((init_pos, final_pos),
+                    HOLE_BITS[init_pos] | HOLE_BITS[middle_peg],
+                    HOLE_BITS[final_pos])
+                   for init_pos, middle_peg, final_pos in JUMPS)
+JUMP_MASKS = dict((transition, (source, target))
+                  for transition, source, target in JUMP_TABLE)
+
+# Symmetries of the board: the 4 rotations and the 4 reflections of the
+# square, as maps of 0-based (row, col) coordinates. SYMMETRY_CELLS[k] maps
+# every hole number to its image under symmetry k.
+_LAST = BOARD_SIZE - 1
+_SQUARE_SYMMETRIES = (lambda r, c: (r, c),
+                      lambda r, c: (c, _LAST - r),
+                      lambda r, c: (_LAST - r, _LAST - c),
+                      lambda r, c: (_LAST - c, r),
+                      lambda r, c: (r, _LAST - c),
+                      lambda r, c: (c, r),
+                      lambda r, c: (_LAST - r, c),
+                      lambda r, c: (_LAST - c, _LAST - r))
+SYMMETRY_CELLS = tuple(
+    dict((number, BOARD_SIZE * image[0] + image[1] + 1)
+         for number in HOLES
+         for image in [symmetry(*divmod(number - 1, BOARD_SIZE))])
+    for symmetry in _SQUARE_SYMMETRIES)
+ALL_SYMMETRIES = tuple(range(len(SYMMETRY_CELLS)))
+INVERSE_SYMMETRIES = tuple(
+    next(inverse for inverse in ALL_SYMMETRIES
+         if all(SYMMETRY_CELLS[inverse][image] == number
+                for number, image in cells.items()))
+    for cells in SYMMETRY_CELLS)
+
+
+def _get_symmetry_table(cells, offset, size):
+    """Returns the lookup table that maps the size bits of a bitboard starting
+    at bit offset to their image under the symmetry given by cells."""
+    table = [0]
+    for number in HOLES[offset:offset + size]:
+        image = HOLE_BITS[cells[number]]
+        table += [entry | image for entry in table]
+    return table
+
+
+# Applying a symmetry to a bitboard costs three table lookups, one per
+# chunk of 11 bits.
+SYMMETRY_CHUNK_SIZE = (len(HOLES) + 2) // 3
+SYMMETRY_CHUNK_MASK = (1 << SYMMETRY_CHUNK_SIZE) - 1
+SYMMETRY_TABLES = tuple(
+    tuple(_get_symmetry_table(cells, offset, SYMMETRY_CHUNK_SIZE)
+          for offset in range(0, 3 * SYMMETRY_CHUNK_SIZE, SYMMETRY_CHUNK_SIZE))
+    for cells in SYMMETRY_CELLS)
+
+# Position classes: the holes of each diagonal direction are coloured with
+# (row + col) mod 3 and (row - col) mod 3. The three holes of a jump get the
+# three colours of either direction, and a jump flips the state of all
+# three, so it flips the parity of the number of pegs of every colour. The
+# parity of the pegs on any two colours is thus never changed by a move.
+# POSITION_CLASS_MASKS holds the masks of colours 0 and 1 and of colours 1
+# and 2 for each direction; their four parities give one of 16 classes and
+# two states in different classes can never reach one another.
+_DIAGONAL_COLOURS = tuple(
+    tuple(sum(HOLE_BITS[number] for number in HOLES
+              if colour(*divmod(number - 1, BOARD_SIZE)) % 3 == value)
+          for value in range(3))
+    for colour in (lambda r, c: r + c, lambda r, c: r - c))
+POSITION_CLASS_MASKS = tuple(colours[first] | colours[first + 1]
+                             for colours in _DIAGONAL_COLOURS
+                             for first in (0, 1))
+
+
+class Board(object):
     """Board class that models Peg Solitaire game.
 
     This class has setters, getters, methods that get all possible moves,
     check validity of a move, make a move, plot the board state and
-    other useful utilities.
+    other useful utilities. The state is stored as a bitboard, the python
+    list format is only produced on demand.
 
     Attributes:
-        board: A python list indicating initial state of the board.
+        pegs: A bitboard (integer) with one bit set for every filled hole.
+            The bitboard is also the hash of the board.
+        peg_count: A number indicating how many pegs are on the board.
+        board: A python list indicating the state of the board. This is
+            converted from and to pegs when accessed.
     """
     __init_state = [-1, -1, 1, 1, 1, -1, -1,
                     -1, -1, 1, 1, 1, -1, -1,
@@ -47,20 +126,49 @@ class Board:
         """Initializes Board with __init_state."""
         self.board = board
 
+    @classmethod
+    def from_bitboard(cls, pegs, peg_count=None):
+        """Returns a Board instance for the bitboard pegs without going
+        through the list format."""
+        instance = cls.__new__(cls)
+        instance.pegs = pegs
+        if peg_count is None:
+            peg_count = bin(pegs).count("1")
+        instance.peg_count = peg_count
+        return instance
+
     def __eq__(self, other):
         """Checks of two instance of a board are equal."""
         if other is None:
             return False
-        return self.board == other.board
+        return self.pegs == other.pegs
+
+    def __ne__(self, other):
+        """Checks of two instance of a board are different."""
+        return not self == other
 
     def __hash__(self):
-        """Gets hash of a board state."""
-        __board_state = self.get_string_state()
-        return hash(''.join(__board_state))
+        """Gets hash of a board state.
+
+        The bitboard fits in a machine integer, so its hash is the bitboard
+        itself and two different states never collide.
+        """
+        return hash(self.pegs)
+
+    @property
+    def board(self):
+        """Returns the board state as a list."""
+        return get_state_from_bitboard(self.pegs)
+
+    @board.setter
+    def board(self, state):
+        """Sets the board state using a input list."""
+        self.pegs = get_bitboard_from_state(state)
+        self.peg_count = bin(self.pegs).count("1")
 
     def copy(self):
-        """Returns a deepcopy of board instance."""
-        return copy.deepcopy(self)
+        """Returns a copy of board instance."""
+        return Board.from_bitboard(self.pegs, self.peg_count)
 
     def get_board_state(self):
         """Returns a board state as a list."""
@@ -70,13 +178,48 @@ class Board:
         """Sets the board state using a input list."""
         self.board = state
 
+    def canonical_key(self, symmetries=ALL_SYMMETRIES):
+        """Returns the key shared by all symmetric images of the board state.
+
+        Args:
+            symmetries: A tuple of symmetry numbers to reduce the state by.
+                Searches should pass the symmetries that preserve their goal,
+                as returned by get_symmetries.
+        """
+        return get_canonical_key(self.pegs, symmetries)
+
+    def position_class(self):
+        """Returns the position class of the board state, see
+        get_position_class."""
+        return get_position_class(self.pegs)
+
+    def count_pegs(self):
+        """Returns the number of pegs on the board."""
+        return self.peg_count
+
     def move(self, init_pos, final_pos):
         """Moves a peg from init_pos to final_pos."""
         if self.is_valid(init_pos, final_pos):
-            middle_peg, _ = self.get_middle_peg(init_pos, final_pos)
-            self.board[final_pos - 1] = FILLED_PEG
-            self.board[init_pos - 1] = EMPTY_PEG
-            self.board[middle_peg - 1] = EMPTY_PEG
+            self.make_move(init_pos, final_pos)
+
+    def make_move(self, init_pos, final_pos):
+        """Moves a peg from init_pos to final_pos in place, without checking
+        that the move is valid.
+
+        The bitboard (and so the hash) and the peg count are updated
+        incrementally. The move is taken back with unmake_move, which lets a
+        depth first search run on a single Board instance.
+        """
+        source, target = JUMP_MASKS[(init_pos, final_pos)]
+        self.pegs ^= source | target
+        self.peg_count -= 1
+
+    def unmake_move(self, init_pos, final_pos):
+        """Takes back the move from init_pos to final_pos made by
+        make_move."""
+        source, target = JUMP_MASKS[(init_pos, final_pos)]
+        self.pegs ^= source | target
+        self.peg_count += 1
 
     @staticmethod
     def get_middle_peg(init_pos, final_pos):
@@ -102,90 +245,39 @@ class Board:
     def is_valid(self, init_pos, final_pos):
         """Checks if a move fromi nit_pos to final_pos is valid.
 
+        - Has checks to ensure that the move is in the jump table, that is,
+        a peg moves 2 positions either horizontally(ROW_MOVE) or
+        vertically(COL_MOVE) inside the movable board area and not the 2x2
+        blank squares on the corners of the board.
         - Has checks to ensure that init_pos and middle_peg has pegs while
         final_pos is empty.
-        - Has checks to ensure that we are moving
-        in the movable board area and not the 2x2 blank squares on the corners
-        of the board.
-        - Has checks to ensure that a board move involves a peg move 2 position
-        either horizontally(ROW_MOVE) or vertically(COL_MOVE).
 
         Args:
             init_pos: A number indicating initial position of the move.
             final_pos: A number indicating final position of the move.
         """
-        middle_peg, move_type = self.get_middle_peg(init_pos, final_pos)
-        if self.board[final_pos - 1] == FILLED_PEG:
-            return False
-        if self.board[init_pos - 1] == EMPTY_PEG:
-            return False
-        if self.board[middle_peg - 1] == EMPTY_PEG:
+        masks = JUMP_MASKS.get((init_pos, final_pos))
+        if masks is None:
             return False
-        if ((self.board[init_pos - 1] == BLANK) or
-                (self.board[middle_peg - 1] == BLANK) or
-                (self.board[final_pos - 1] == BLANK)):
-            return False
-        if move_type == COL_MOVE:
-            if not (init_pos % 7 and middle_peg % 7 and final_pos % 7):
-                return False
-            if abs(final_pos - init_pos) != BOARD_SIZE * 2:
-                return False
-        else:
-            if abs(final_pos - init_pos) != 2:
-                return False
-            _, init_row = get_peg_coordinates_from_number(init_pos)
-            _, final_row = get_peg_coordinates_from_number(final_pos)
-            if init_row != final_row:
-                return False
-        return True
+        source, target = masks
+        return (self.pegs & source) == source and not self.pegs & target
 
     def plot_board(self, text=True, name=None):
-        """ Plots the current state of the board as a grid.
+        """ Plots the current state of the board as a grid with
+        render.plot_board. Matplotlib is only imported on the first call.
 
         Args:
             text: A boolean which indicates whether to overlay the plot with
                 numbers.
         """
-        n_rows, n_cols = BOARD_SIZE, BOARD_SIZE
-        x = np.arange(n_rows + 1)
-        y = np.arange(n_cols + 1)
-        x, y = np.meshgrid(x, y)
-        board = np.array(self.board)
-        z = board.reshape((n_rows, n_cols))
-
-        fig = plt.figure(figsize=(3, 3))
-        ax = fig.add_subplot(111, aspect='equal')
-        ax.invert_yaxis()
-
-        ax.pcolormesh(x, y, z,
-                      edgecolor='1',
-                      linewidth=1.5)
-        ax.axis('off')
-
-        width = 1
-        if text:
-            for r in range(1, n_rows + 1):
-                for c in range(1, n_cols + 1):
-                    plt.text((c - 1) + width / 2.,
-                             (r - 1) + width / 2.,
-                             str(((r - 1) * n_cols) + c),
-                             horizontalalignment='center',
-                             verticalalignment='center',
-                             fontsize=9,
-                             color="white")
-
-        plt.xticks([])
-        plt.yticks([])
-        if name:
-            plt.savefig(name + '.png', bbox_inches='tight')
-        # else:
-        #     plt.show()
+        import render
+        render.plot_board(self.board, text, name)
 
     def get_board_stats(self):
         """Returns board statistics which include number of pegs, holes and
         empty spaces.
         """
-        return dict(itemfreq(self.board))
+        return dict(collections.Counter(self.board))
 
     def get_string_state(self):
         """Returns board state in 0X- string format.
@@ -216,35 +308,14 @@ class Board:
 
     def get_possible_transitions(self):
         """Returns all possible moves possible from the current state of the
-        board."""
-        __transitions = []
-        for box in range(1, 50):
-            (x, y) = get_peg_coordinates_from_number(box)
-            # go right
-            if 7 >= x + 2 >= 1:
-                init = get_number_from_peg_coordinates((x, y))
-                final = get_number_from_peg_coordinates((x+2, y))
-                if self.is_valid(init, final):
-                    __transitions.append((init, final))
-            # go left
-            if 7 >= x - 2 >= 1:
-                init = get_number_from_peg_coordinates((x, y))
-                final = get_number_from_peg_coordinates((x-2, y))
-                if self.is_valid(init, final):
-                    __transitions.append((init, final))
-            # go up
-            if 7 >= y - 2 >= 1:
-                init = get_number_from_peg_coordinates((x, y))
-                final = get_number_from_peg_coordinates((x, y-2))
-                if self.is_valid(init, final):
-                    __transitions.append((init, final))
-            # go down
-            if 7 >= y + 2 >= 1:
-                init = get_number_from_peg_coordinates((x, y))
-                final = get_number_from_peg_coordinates((x, y+2))
-                if self.is_valid(init, final):
-                    __transitions.append((init, final))
-        return __transitions
+        board.
+
+        Only the precomputed jump table is walked, so this costs one mask
+        test per legal jump of the board geometry.
+        """
+        pegs = self.pegs
+        return [transition for transition, source, target in JUMP_TABLE
+                if (pegs & source) == source and not pegs & target]
 
 
 # Utilities
@@ -277,6 +348,28 @@ def translate_input_to_array(inp_list):
     return state
 
 
+def get_bitboard_from_state(state):
+    """Converts a board state list to a bitboard.
+
+    Args:
+        state: A list of numbers representing the state of the board, as
+            returned by translate_input_to_array.
+    """
+    pegs = 0
+    for bit, number in enumerate(HOLES):
+        if state[number - 1] == FILLED_PEG:
+            pegs |= 1 << bit
+    return pegs
+
+
+def get_state_from_bitboard(pegs):
+    """Converts a bitboard to a board state list."""
+    state = [BLANK] * (BOARD_SIZE * BOARD_SIZE)
+    for bit, number in enumerate(HOLES):
+        state[number - 1] = FILLED_PEG if pegs >> bit & 1 else EMPTY_PEG
+    return state
+
+
 def get_peg_coordinates_from_number(number):
     """Return peg x and y co-ordinates from its number."""
     row = number % 7 if (number % 7 != 0) else 7
@@ -294,38 +387,127 @@ def get_number_from_peg_coordinates(peg_coordinates):
     return number
 
 
-def plot_answer(start, moves):
-    """Plots step by step moves made on board.
+def plot_answer(start, moves, path=None):
+    """Plots step by step moves made on board to a single animated GIF or
+    sprite sheet with render.plot_answer.
 
     Args:
-        board: An instance of Board class.
+        start: A list of numbers representing initial state.
         moves: A list of tuples representing moves.
+        path: The file written, or None for render's default.
     """
-    board = Board(start)
-    board.plot_board(name="move 0")
-    for m_num, move in enumerate(moves):
-        board.move(*move)
-        name = "move %d" % (m_num + 1)
-        board.plot_board(name=name)
+    import render
+    if path is None:
+        return render.plot_answer(start, moves)
+    return render.plot_answer(start, moves, path)
 
 
 def get_rotated_states(inp_state):
     """Returns 4 rotated and 4 flipped and rotated versions of
     Board state inp_state.
     """
-    state = np.array(inp_state).reshape(7, 7)
-    rotations = list()
-    # rotated states
-    rotations.append(np.rot90(state, k=0).ravel().tolist())
-    rotations.append(np.rot90(state, k=3).ravel().tolist())
-    rotations.append(np.rot90(state, k=2).ravel().tolist())
-    rotations.append(np.rot90(state, k=1).ravel().tolist())
-    # mirrored and rotated states
-    rotations.append(np.fliplr(np.rot90(state, k=0)).ravel().tolist())
-    rotations.append(np.fliplr(np.rot90(state, k=1)).ravel().tolist())
-    rotations.append(np.fliplr(np.rot90(state, k=2)).ravel().tolist())
-    rotations.append(np.fliplr(np.rot90(state, k=3)).ravel().tolist())
-    return rotations
+    pegs = get_bitboard_from_state(inp_state)
+    return [get_state_from_bitboard(get_symmetric_bitboard(pegs, symmetry))
+            for symmetry in ALL_SYMMETRIES]
+
+
+def get_symmetric_bitboard(pegs, symmetry):
+    """Returns the image of the bitboard pegs under symmetry."""
+    low, middle, high = SYMMETRY_TABLES[symmetry]
+    return (low[pegs & SYMMETRY_CHUNK_MASK] |
+            middle[pegs >> SYMMETRY_CHUNK_SIZE & SYMMETRY_CHUNK_MASK] |
+            high[pegs >> 2 * SYMMETRY_CHUNK_SIZE])
+
+
+def get_canonical_key(pegs, symmetries=ALL_SYMMETRIES):
+    """Returns the smallest image of the bitboard pegs under symmetries.
+
+    Two states get the same key exactly when one is the image of the other,
+    so a single lookup of the key replaces looking up every image.
+    """
+    key = pegs
+    for symmetry in symmetries:
+        low, middle, high = SYMMETRY_TABLES[symmetry]
+        image = (low[pegs & SYMMETRY_CHUNK_MASK] |
+                 middle[pegs >> SYMMETRY_CHUNK_SIZE & SYMMETRY_CHUNK_MASK] |
+                 high[pegs >> 2 * SYMMETRY_CHUNK_SIZE])
+        if image < key:
+            key = image
+    return key
+
+
+def get_position_class(pegs):
+    """Returns the position class of the bitboard pegs, a number from 0 to
+    15 that no move changes."""
+    position_class = 0
+    for bit, mask in enumerate(POSITION_CLASS_MASKS):
+        position_class |= (bin(pegs & mask).count("1") & 1) << bit
+    return position_class
+
+
+def is_solvable(start, goal):
+    """Checks the invariants a solution from the bitboard start to the
+    bitboard goal must keep.
+
+    Every move removes exactly one peg and keeps the position class, so
+    goal can not be reached if it has more pegs than start or is in another
+    position class. A state passing the check may still be unsolvable.
+    """
+    return (bin(goal).count("1") <= bin(start).count("1") and
+            get_position_class(start) == get_position_class(goal))
+
+
+class Unsolvable(Exception):
+    """Unsolvable exception raised by the solvers, before searching, for a
+    start and goal state that is_solvable rules out.
+
+    A solver that searched and found no solution returns None as its moves
+    instead.
+
+    Attributes:
+        start: A bitboard representing the start state.
+        goal: A bitboard representing the goal state.
+    """
+    def __init__(self, start, goal):
+        if bin(goal).count("1") > bin(start).count("1"):
+            message = "goal state has more pegs than start state"
+        else:
+            message = "start and goal state are in other position classes"
+        super(Unsolvable, self).__init__(message)
+        self.start = start
+        self.goal = goal
+
+
+def check_solvable(start, goal):
+    """Raises Unsolvable if is_solvable rules out the bitboards start and
+    goal."""
+    if not is_solvable(start, goal):
+        raise Unsolvable(start, goal)
+
+
+def get_symmetries(pegs):
+    """Returns the symmetries that map the bitboard pegs to itself.
+
+    Reducing states by these symmetries is safe when searching for pegs: a
+    state reaches the goal exactly when its images do.
+    """
+    return tuple(symmetry for symmetry in ALL_SYMMETRIES
+                 if get_symmetric_bitboard(pegs, symmetry) == pegs)
+
+
+def get_symmetry_between(pegs, image, symmetries=ALL_SYMMETRIES):
+    """Returns a symmetry that maps the bitboard pegs to image, or None."""
+    for symmetry in symmetries:
+        if get_symmetric_bitboard(pegs, symmetry) == image:
+            return symmetry
+    return None
+
+
+def get_symmetric_transition(transition, symmetry):
+    """Returns the image of the move transition under symmetry."""
+    cells = SYMMETRY_CELLS[symmetry]
+    init_pos, final_pos = transition
+    return cells[init_pos], cells[final_pos]
 
 
 def is_explored(state, explored):
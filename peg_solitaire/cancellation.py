@@ -0,0 +1,81 @@
+import time
+
+# Number of nodes expanded between two checks of a token.
+CHECK_INTERVAL = 1000
+
+# Reasons a search is stopped for.
+CANCELLED = "cancelled"
+DEADLINE = "deadline"
+
+
+class SearchStopped(Exception):
+    """SearchStopped exception raised out of a search whose token was
+    cancelled or whose deadline passed, carrying the partial result.
+
+    Attributes:
+        reason: CANCELLED or DEADLINE.
+        count: A number representing the number of nodes expanded before
+            the search stopped.
+        depth: A number representing the deepest depth the search reached,
+            or None if it was stopped before starting.
+    """
+    def __init__(self, reason, count=0, depth=None):
+        super(SearchStopped, self).__init__(reason)
+        self.reason = reason
+        self.count = count
+        self.depth = depth
+
+
+class CancellationToken(object):
+    """CancellationToken class that tells a running search to stop.
+
+    A search given a token calls check every interval nodes expanded, so
+    the token costs one comparison per node. A search is stopped once
+    cancel was called, once event is set, which lets another process
+    cancel it, or once the deadline passed.
+
+    Attributes:
+        deadline: The time.time() after which the search stops, or None.
+        event: An object with an is_set method, such as a
+            multiprocessing.Manager().Event(), or None.
+        interval: A number of nodes expanded between two checks.
+        cancelled: A boolean which is true once cancel was called.
+    """
+    def __init__(self, deadline=None, event=None, interval=CHECK_INTERVAL):
+        self.deadline = deadline
+        self.event = event
+        self.interval = interval
+        self.cancelled = False
+
+    @classmethod
+    def from_timeout(cls, timeout, event=None):
+        """Returns a token whose deadline is timeout seconds from now, or
+        which has none if timeout is None."""
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        return cls(deadline, event)
+
+    def cancel(self):
+        """Stops the search at its next check."""
+        self.cancelled = True
+
+    def get_reason(self):
+        """Returns the reason the search should stop, or None."""
+        if self.cancelled or (self.event is not None and
+                              self.event.is_set()):
+            return CANCELLED
+        if self.deadline is not None and time.time() >= self.deadline:
+            return DEADLINE
+        return None
+
+    def check(self, count=0, depth=None):
+        """Raises SearchStopped with the count and depth of the search if it
+        should stop.
+
+        Returns: The number of nodes expanded at the next check.
+        """
+        reason = self.get_reason()
+        if reason is not None:
+            raise SearchStopped(reason, count, depth)
+        return count + self.interval
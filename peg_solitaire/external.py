@@ -0,0 +1,417 @@
+import board
+import glob
+import numpy as np
+import os
+import pagoda
+import shutil
+import tempfile
+import time
+
+# States are stored on disk as fixed width canonical keys.
+KEY_TYPE = np.uint64
+KEY_SIZE = np.dtype(KEY_TYPE).itemsize
+
+# The jump table and symmetry tables as numpy arrays, so that a whole chunk
+# of states is expanded and reduced at once.
+_JUMPS = [(KEY_TYPE(source), KEY_TYPE(target), KEY_TYPE(source | target))
+          for _, source, target in board.JUMP_TABLE]
+_SYMMETRY_TABLES = [tuple(np.array(table, dtype=KEY_TYPE) for table in tables)
+                    for tables in board.SYMMETRY_TABLES]
+_SYMMETRY_CHUNK_SIZE = KEY_TYPE(board.SYMMETRY_CHUNK_SIZE)
+_SYMMETRY_CHUNK_MASK = KEY_TYPE(board.SYMMETRY_CHUNK_MASK)
+_HASH_MULTIPLIER = KEY_TYPE(0x9E3779B97F4A7C15)
+
+
+def external_search(start, goal, directory=None, buckets=64,
+                    chunk_size=1 << 20, pruner=None, instrument=None,
+                    cache=None):
+    """Disk Backed Layered Search method.
+
+    The states reachable from start are built one peg count layer at a time
+    like layered.layered_search, but every layer is written to disk. A layer
+    is split by hash into buckets, each stored as a sorted run of unique
+    canonical keys. The next layer is built by memory mapping the runs of
+    the current one and expanding chunk_size keys at a time; the children
+    are appended to unsorted bucket files which are then sorted and
+    deduplicated one bucket at a time. RAM use is bounded by a chunk and
+    its children plus the largest bucket, whatever the number of states.
+
+    The path is recovered from the layers kept on disk by looking up the
+    predecessors of the goal state, layer by layer, with a binary search in
+    the memory mapped runs. States which can not reach goal state according
+    to the pagoda functions of pruner are left out of the layers.
+
+    Args:
+        start: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        directory: The directory the layers are written to. A temporary
+            directory is created and removed afterwards if it is None.
+        buckets: A power of 2 indicating the number of runs per layer.
+        chunk_size: A number indicating how many states are expanded at
+            once.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            states. One is created for goal state if it is None.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every layer.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for start and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+
+    Returns: A tuple containing the number of nodes expanded, a list of
+    tuples representing the moves required to reach goal state or None if
+    goal state can not be reached, and a list with one dictionary per layer
+    holding its peg count, number of states, number of pruned states and
+    disk bytes read and written to build it.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out start and goal state,
+            which are then not searched at all.
+    """
+    if buckets & (buckets - 1):
+        raise ValueError("buckets must be a power of 2, got %d" % buckets)
+    if cache is not None:
+        moves = cache.get(start, goal, "external")
+        if moves is not None:
+            return 0, moves, []
+    start_state = board.Board(start)
+    goal_state = board.Board(goal)
+    board.check_solvable(start_state.pegs, goal_state.pegs)
+    symmetries = board.get_symmetries(goal_state.pegs)
+    goal_key = goal_state.canonical_key(symmetries)
+    start_pegs = start_state.count_pegs()
+    goal_pegs = goal_state.count_pegs()
+    if pruner is None:
+        pruner = pagoda.PagodaPruner(goal_state.pegs)
+    filters = get_pagoda_filters(pruner)
+    if instrument is not None:
+        instrument.start("Disk Backed Layered Search", pruner)
+
+    remove_directory = directory is None
+    if remove_directory:
+        directory = tempfile.mkdtemp(prefix="peg_solitaire_")
+    try:
+        layers = LayerStore(directory, buckets)
+        read, written = layers.write_layer(
+            start_pegs, [np.array([start_state.canonical_key(symmetries)],
+                                  dtype=KEY_TYPE)])
+        io_stats = [{"pegs": start_pegs, "states": 1, "pruned": 0,
+                     "bytes_read": read, "bytes_written": written}]
+        count = 0
+        for pegs in range(start_pegs - 1, goal_pegs - 1, -1):
+            states, pruned, read, written = layers.expand_layer(
+                pegs + 1, symmetries, chunk_size, filters)
+            count += layers.count_states(pegs + 1)
+            pruner.pruned += pruned
+            io_stats.append({"pegs": pegs, "states": states, "pruned": pruned,
+                             "bytes_read": read, "bytes_written": written})
+            if instrument is not None:
+                instrument.progress(count, frontier=states)
+            if not states:
+                return count, None, io_stats
+        if not layers.contains(goal_pegs, goal_key):
+            return count, None, io_stats
+        moves = backtrack(layers, start_state, goal_key, goal_pegs,
+                          symmetries)
+        if cache is not None:
+            cache.put(start, goal, "external", moves)
+        return count, moves, io_stats
+    finally:
+        if instrument is not None:
+            instrument.finish()
+        if remove_directory:
+            shutil.rmtree(directory)
+
+
+def backtrack(layers, start_state, goal_key, goal_pegs, symmetries):
+    """Returns the moves from start_state to the state with goal_key.
+
+    A predecessor of every state of the path is looked up in the layer
+    above it, starting from the goal, then the moves are replayed on
+    start_state so that they are in the orientation of the caller.
+    """
+    keys = [goal_key]
+    key = goal_key
+    for pegs in range(goal_pegs + 1, start_state.count_pegs() + 1):
+        for _, source, target in board.JUMP_TABLE:
+            # Taking back a jump: the target hole holds a peg and the two
+            # source holes are empty.
+            if key & target and not key & source:
+                parent_key = board.get_canonical_key(key ^ source ^ target,
+                                                     symmetries)
+                if layers.contains(pegs, parent_key):
+                    key = parent_key
+                    keys.append(key)
+                    break
+
+    moves = []
+    state = start_state.copy()
+    for key in reversed(keys[:-1]):
+        for transition in state.get_possible_transitions():
+            state.make_move(*transition)
+            if state.canonical_key(symmetries) == key:
+                moves.append(transition)
+                break
+            state.unmake_move(*transition)
+    return moves
+
+
+def get_canonical_keys(keys, symmetries):
+    """Returns the canonical keys of an array of bitboards."""
+    canonical_keys = keys.copy()
+    for symmetry in symmetries:
+        low, middle, high = _SYMMETRY_TABLES[symmetry]
+        images = (low[keys & _SYMMETRY_CHUNK_MASK] |
+                  middle[(keys >> _SYMMETRY_CHUNK_SIZE) &
+                         _SYMMETRY_CHUNK_MASK] |
+                  high[keys >> (_SYMMETRY_CHUNK_SIZE + _SYMMETRY_CHUNK_SIZE)])
+        np.minimum(canonical_keys, images, out=canonical_keys)
+    return canonical_keys
+
+
+def get_pagoda_filters(pruner):
+    """Returns the lookup tables of the pagoda functions of pruner as numpy
+    arrays, each with the value of the goal state."""
+    return [(tuple(np.array(table, dtype=np.int64) for table in tables),
+             goal_value)
+            for tables, goal_value in zip(pruner.value_tables,
+                                          pruner.goal_values)]
+
+
+def expand_keys(keys, symmetries, filters=()):
+    """Returns the sorted unique canonical keys of all the children of an
+    array of bitboards.
+
+    Children whose value for a pagoda function of filters, as returned by
+    get_pagoda_filters, is below the value of the goal state are dropped.
+    Symmetries preserve the goal state, so checking the canonical image of
+    a state is enough.
+
+    Returns: A tuple containing the array of children and the number of
+    children pruned.
+    """
+    children = []
+    for source, target, mask in _JUMPS:
+        movable = ((keys & source) == source) & ((keys & target) == 0)
+        children.append(keys[movable] ^ mask)
+    children = np.unique(get_canonical_keys(np.concatenate(children),
+                                            symmetries))
+    reachable = np.ones(len(children), dtype=bool)
+    for (low, middle, high), goal_value in filters:
+        values = (low[children & _SYMMETRY_CHUNK_MASK] +
+                  middle[(children >> _SYMMETRY_CHUNK_SIZE) &
+                         _SYMMETRY_CHUNK_MASK] +
+                  high[children >>
+                       (_SYMMETRY_CHUNK_SIZE + _SYMMETRY_CHUNK_SIZE)])
+        reachable &= values >= goal_value
+    kept = children[reachable]
+    return kept, len(children) - len(kept)
+
+
+class LayerStore(object):
+    """LayerStore class that keeps the layers of a search on disk.
+
+    A layer is stored in a directory named after its peg count, holding one
+    file of sorted unique keys per bucket. A key belongs to the bucket given
+    by the top bits of a multiplicative hash of the key, which spreads the
+    canonical keys evenly.
+
+    Attributes:
+        directory: The directory holding the layer directories.
+        buckets: A number indicating the number of buckets per layer.
+    """
+    def __init__(self, directory, buckets):
+        self.directory = directory
+        self.buckets = buckets
+        self.shift = KEY_TYPE(64 - (buckets.bit_length() - 1))
+
+    def get_bucket_path(self, pegs, bucket):
+        """Returns the path of the run of a bucket of a layer."""
+        return os.path.join(self.directory, "layer_%02d" % pegs,
+                            "bucket_%04d.keys" % bucket)
+
+    def get_buckets(self, keys):
+        """Returns the bucket of every key in an array of keys."""
+        if self.buckets == 1:
+            return np.zeros(len(keys), dtype=np.intp)
+        return ((keys * _HASH_MULTIPLIER) >> self.shift).astype(np.intp)
+
+    def read_bucket(self, pegs, bucket):
+        """Returns the memory mapped run of a bucket of a layer."""
+        path = self.get_bucket_path(pegs, bucket)
+        if not os.path.getsize(path):
+            return np.zeros(0, dtype=KEY_TYPE)
+        return np.memmap(path, dtype=KEY_TYPE, mode="r")
+
+    def count_states(self, pegs):
+        """Returns the number of states in a layer."""
+        return sum(os.path.getsize(self.get_bucket_path(pegs, bucket))
+                   for bucket in range(self.buckets)) // KEY_SIZE
+
+    def contains(self, pegs, key):
+        """Checks if a key is in a layer using binary search."""
+        key = KEY_TYPE(key)
+        run = self.read_bucket(pegs, int(self.get_buckets(np.array([key]))[0]))
+        index = np.searchsorted(run, key)
+        return index < len(run) and run[index] == key
+
+    def create_layer(self, pegs):
+        """Creates the directory of a layer."""
+        os.mkdir(os.path.join(self.directory, "layer_%02d" % pegs))
+
+    def scatter(self, pegs, chunks, source=0):
+        """Appends chunks of keys of a layer to the unsorted files of their
+        buckets and returns the number of bytes written.
+
+        Every source has its own unsorted file per bucket, so that several
+        processes can scatter keys to the same layer at once. A source may
+        scatter any number of times before the buckets are gathered.
+        """
+        unsorted = {}
+        written = 0
+        try:
+            for keys in chunks:
+                key_buckets = self.get_buckets(keys)
+                order = np.argsort(key_buckets, kind="mergesort")
+                keys = keys[order]
+                ends = np.cumsum(np.bincount(key_buckets,
+                                             minlength=self.buckets))
+                begin = 0
+                for bucket, end in enumerate(ends):
+                    if end > begin:
+                        if bucket not in unsorted:
+                            path = "%s.%04d.tmp" % (
+                                self.get_bucket_path(pegs, bucket), source)
+                            unsorted[bucket] = open(path, "ab")
+                        keys[begin:end].tofile(unsorted[bucket])
+                        written += (end - begin) * KEY_SIZE
+                    begin = end
+        finally:
+            for bucket_file in unsorted.values():
+                bucket_file.close()
+        return written
+
+    def gather(self, pegs, bucket):
+        """Sorts and deduplicates the unsorted files of a bucket of a layer
+        into its run.
+
+        Returns: A tuple containing the number of bytes read and written.
+        """
+        path = self.get_bucket_path(pegs, bucket)
+        unsorted_paths = glob.glob(path + ".*.tmp")
+        read = sum(os.path.getsize(unsorted_path)
+                   for unsorted_path in unsorted_paths)
+        keys = np.concatenate(
+            [np.zeros(0, dtype=KEY_TYPE)] +
+            [np.fromfile(unsorted_path, dtype=KEY_TYPE)
+             for unsorted_path in unsorted_paths])
+        np.unique(keys).tofile(path)
+        for unsorted_path in unsorted_paths:
+            os.remove(unsorted_path)
+        return read, os.path.getsize(path)
+
+    def gather_layer(self, pegs):
+        """Gathers every bucket of a layer.
+
+        Returns: A tuple containing the number of bytes read and written.
+        """
+        read = written = 0
+        for bucket in range(self.buckets):
+            bucket_read, bucket_written = self.gather(pegs, bucket)
+            read += bucket_read
+            written += bucket_written
+        return read, written
+
+    def write_layer(self, pegs, chunks):
+        """Writes a layer from chunks of keys.
+
+        The chunks are appended to one unsorted file per bucket, then every
+        bucket is sorted and deduplicated in memory on its own.
+
+        Returns: A tuple containing the number of bytes read and written.
+        """
+        self.create_layer(pegs)
+        written = self.scatter(pegs, chunks)
+        read, gather_written = self.gather_layer(pegs)
+        return read, written + gather_written
+
+    def read_bucket_chunks(self, pegs, bucket, chunk_size):
+        """Yields the keys of a bucket of a layer in chunks of at most
+        chunk_size."""
+        run = self.read_bucket(pegs, bucket)
+        for begin in range(0, len(run), chunk_size):
+            yield np.array(run[begin:begin + chunk_size])
+
+    def read_layer(self, pegs, chunk_size):
+        """Yields the keys of a layer in chunks of at most chunk_size."""
+        for bucket in range(self.buckets):
+            for keys in self.read_bucket_chunks(pegs, bucket, chunk_size):
+                yield keys
+
+    def expand_layer(self, pegs, symmetries, chunk_size, filters=()):
+        """Builds the layer with one peg less than the layer pegs.
+
+        Returns: A tuple containing the number of states in the new layer,
+        the number of children pruned by the pagoda functions of filters
+        and the number of disk bytes read and written to build it.
+        """
+        self.create_layer(pegs - 1)
+        pruned = written = 0
+        for keys in self.read_layer(pegs, chunk_size):
+            children, chunk_pruned = expand_keys(keys, symmetries, filters)
+            pruned += chunk_pruned
+            written += self.scatter(pegs - 1, [children])
+        read, gather_written = self.gather_layer(pegs - 1)
+        read += self.count_states(pegs) * KEY_SIZE
+        written += gather_written
+        return self.count_states(pegs - 1), pruned, read, written
+
+
+def main():
+    from guppy import hpy
+
+    # Start Configuration
+    root = board.translate_input_to_array(['--XXX--',
+                                           '--XXX--',
+                                           'XXXXXXX',
+                                           'XXX0XXX',
+                                           'XXXXXXX',
+                                           '--XXX--',
+                                           '--XXX--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    count, moves, io_stats = external_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    for layer in io_stats:
+        print "Pegs: %(pegs)2d\tStates: %(states)10d\t" \
+              "Read: %(bytes_read)12d bytes\t" \
+              "Written: %(bytes_written)12d bytes" % layer
+    print "Total number of nodes expanded: %d" % count
+    print "Total number of states pruned: %d" % sum(layer["pruned"]
+                                                    for layer in io_stats)
+    if moves is None:
+        print "No solution"
+    else:
+        print "Answer depth: %d" % len(moves)
+        print "Moves: %s" % moves
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import astar
+import board
+import pagoda
+import pattern_database
+import time
+import transposition
+
+# Stored in the transposition table for a state whose subtree holds no
+# state over the threshold: raising the threshold never helps it.
+UNBOUNDED = 1 << 30
+
+
+class IterativeDeepeningAStarSearch(object):
+    """IterativeDeepeningAStarSearch class that models an iterative
+    deepening A* search towards a goal state.
+
+    Every iteration is a depth first search that cuts states whose cost
+    g + h is over a threshold, starting from the cost of the root and
+    raised to the least cost cut by the previous iteration. The heuristics
+    of astar are used, evaluated incrementally along the moves. Apart from
+    the optional transposition table memory only grows with the depth of
+    the search.
+
+    Attributes:
+        goal_state: An object of Board class with the goal state.
+        heuristic: An object with the methods of astar.WeightHeuristic.
+        pruner: An object of PagodaPruner class that cuts the moves to
+            states which can not reach goal state.
+        table: An object of TranspositionTable class or None. It keeps for
+            the states whose subtree was searched in vain the largest
+            threshold minus g they are known to fail under, so that they are
+            not searched again under a smaller one.
+        symmetries: A tuple of the symmetries the table keys are reduced by.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every iteration and the
+            heuristic evaluations are timed.
+        solution_moves: A list of tuples representing the moves required to
+            reach goal state, in reverse order, filled by bounded_search.
+    """
+    def __init__(self, goal, simple=False, database=None, heuristic=None,
+                 pruner=None, table=None, instrument=None):
+        """Initializes the search using the goal state list.
+
+        The heuristic is picked by simple and database as in
+        astar.a_star_search, unless heuristic is given. A PagodaPruner for
+        goal state is used if pruner is None.
+        """
+        self.goal_state = board.Board(goal)
+        if heuristic is None:
+            heuristic = astar.get_heuristic(self.goal_state.pegs, simple,
+                                            database)
+        if instrument is not None:
+            heuristic = instrument.wrap_heuristic(heuristic)
+        self.heuristic = heuristic
+        if pruner is None:
+            pruner = pagoda.PagodaPruner(self.goal_state.pegs)
+        self.pruner = pruner
+        self.table = table
+        self.symmetries = board.get_symmetries(self.goal_state.pegs)
+        self.instrument = instrument
+        self.solution_moves = []
+
+    def search(self, root):
+        """Iterative Deepening A* Search method.
+
+        Args:
+            root: A list of numbers representing initial state.
+
+        Returns:
+            depth: A number representing the depth of the solution.
+            total_count: A number representing the total number of nodes
+                expanded.
+            solution_moves: A list of tuples representing the moves required
+                to reach goal state, or None if it can not be reached.
+
+        Raises:
+            board.Unsolvable: board.is_solvable rules out root and goal
+                state, which are then not searched at all.
+        """
+        root_state = board.Board(root)
+        board.check_solvable(root_state.pegs, self.goal_state.pegs)
+        instrument = self.instrument
+        hits_before = 0
+        if instrument is not None:
+            instrument.start("IDA* Search", self.pruner)
+            if self.table is not None:
+                hits_before = self.table.hits
+        values = self.heuristic.get_values(root_state.pegs)
+        threshold = self.heuristic.get_cost(values)
+        total_count = 0
+        moves = None
+        while threshold is not None:
+            count, moves, threshold = self.search_threshold(root_state,
+                                                            threshold)
+            total_count += count
+            if instrument is not None:
+                duplicates = None
+                if self.table is not None:
+                    duplicates = self.table.hits - hits_before
+                instrument.progress(total_count, total_count, duplicates)
+            if moves is not None:
+                break
+        if instrument is not None:
+            instrument.finish()
+        if moves is not None:
+            return len(moves), total_count, moves
+        return 0, total_count, None
+
+    def search_threshold(self, node_state, threshold):
+        """Runs one cost bounded search from node_state.
+
+        Returns: A tuple containing the number of nodes expanded, a list of
+        tuples representing the moves required to reach goal state or None
+        if it was not reached, and the threshold of the next iteration or
+        None if there is none.
+        """
+        self.solution_moves = []
+        self.pruner.reset(node_state.pegs)
+        values = self.heuristic.get_values(node_state.pegs)
+        found, count, next_threshold = self.bounded_search(
+            node_state, values, 0, threshold, 0)
+        if found:
+            return count, self.solution_moves[::-1], None
+        if next_threshold >= UNBOUNDED:
+            next_threshold = None
+        return count, None, next_threshold
+
+    def bounded_search(self, node_state, values, g_cost, threshold, count):
+        """Cost Bounded Search method.
+
+        Args:
+            node_state: An object of Board class with the intermediate state.
+                Moves are made and taken back on this object, it holds the
+                same state again when the method returns.
+            values: The heuristic values of node_state.
+            g_cost: A number representing the number of moves made to reach
+                node_state.
+            threshold: A number which represents the largest cost of a state
+                that is searched.
+            count: A number representing the total number of nodes expanded
+                till the method was called.
+
+        Returns: A tuple containing a boolean which is true if goal state was
+            reached, the updated number of nodes expanded and the least cost
+            over threshold of the states cut, UNBOUNDED if none was. The
+            moves are added to solution_moves.
+        """
+        if node_state == self.goal_state:
+            return True, count, threshold
+        key = None
+        if self.table is not None:
+            key = node_state.canonical_key(self.symmetries)
+            budget = self.table.lookup(key)
+            if budget >= threshold - g_cost:
+                return False, count, min(budget + g_cost + 1, UNBOUNDED)
+        next_threshold = UNBOUNDED
+        for transition in node_state.get_possible_transitions():
+            child_values = self.heuristic.get_child_values(values, transition)
+            h_cost = self.heuristic.get_cost(child_values)
+            if h_cost is None:
+                continue
+            f_cost = g_cost + 1 + h_cost
+            if f_cost > threshold:
+                next_threshold = min(next_threshold, f_cost)
+                continue
+            if not self.pruner.make_move(transition):
+                continue
+            count += 1
+            node_state.make_move(*transition)
+            found, count, child_threshold = self.bounded_search(
+                node_state, child_values, g_cost + 1, threshold, count)
+            node_state.unmake_move(*transition)
+            self.pruner.unmake_move()
+            if found:
+                self.solution_moves.append(transition)
+                return True, count, threshold
+            next_threshold = min(next_threshold, child_threshold)
+        if key is not None:
+            self.table.store(key, min(next_threshold - g_cost - 1, UNBOUNDED))
+        return False, count, next_threshold
+
+
+def ida_star_search(root, goal, simple=False, database=None, table=None,
+                    instrument=None, cache=None):
+    """Iterative Deepening A* Search method.
+
+    Args:
+        root: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        simple: A boolean which is used to switch between the two heuristics,
+            as in astar.a_star_search.
+        database: An object of PatternDatabase class built for goal state.
+            If it is given, the pattern database heuristic is used.
+        table: An object of TranspositionTable class or None.
+        instrument: An object of SearchInstrument class or None.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for root and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+
+    Returns:
+        depth: A number representing the depth of the solution.
+        total_count: A number representing the total number of nodes expanded.
+        solution_moves: A list of tuples representing the moves required to
+            reach goal state, or None if it can not be reached.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out root and goal state,
+            which are then not searched at all.
+    """
+    options = "ida" + astar.get_cache_options(simple, database)
+    if cache is not None:
+        moves = cache.get(root, goal, options)
+        if moves is not None:
+            return len(moves), 0, moves
+    depth, count, moves = IterativeDeepeningAStarSearch(
+        goal, simple, database, table=table,
+        instrument=instrument).search(root)
+    if cache is not None and moves is not None:
+        cache.put(root, goal, options, moves)
+    return depth, count, moves
+
+
+def main():
+    from guppy import hpy
+
+    # Diamond Configuration
+    root = board.translate_input_to_array(['--0X0--',
+                                           '--XXX--',
+                                           '0XXXXX0',
+                                           'XXX0XXX',
+                                           '0XXXXX0',
+                                           '--XXX--',
+                                           '--0X0--'])
+
+    # Pyramid Configuration
+    # root = board.translate_input_to_array(['--000--',
+    #                                        '--0X0--',
+    #                                        '00XXX00',
+    #                                        '0XXXXX0',
+    #                                        'XXXXXXX',
+    #                                        '--000--',
+    #                                        '--000--'])
+
+    # Start Configuration
+    # root = board.translate_input_to_array(['--XXX--',
+    #                                        '--XXX--',
+    #                                        'XXXXXXX',
+    #                                        'XXX0XXX',
+    #                                        'XXXXXXX',
+    #                                        '--XXX--',
+    #                                        '--XXX--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    database = pattern_database.get_pattern_database(
+        board.get_bitboard_from_state(goal))
+    table = transposition.TranspositionTable()
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    depth, count, moves = ida_star_search(root, goal, database=database,
+                                          table=table)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %d" % depth
+    print "Moves: %s" % moves
+    print "Transposition table hits: %d" % table.hits
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
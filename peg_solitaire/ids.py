@@ -1,79 +1,235 @@
-from guppy import hpy
-
 import board
+import cancellation
+import move_order
+import pagoda
+import solution_cache
 import time
 
-solution_moves = []
+MAX_DEPTH = 30
 
 
-def iterative_deepening_search(root, goal):
-    """Iterative Deepening Search method.
+class IterativeDeepeningSearch(object):
+    """IterativeDeepeningSearch class that models an iterative deepening
+    search towards a goal state.
 
-    Args:
-        root: A list of numbers representing initial state.
-        goal: A list of numbers representing final goal state.
+    All the state of a search is kept on the instance, so separate instances
+    can search at the same time, in threads or in worker processes.
 
-    Returns:
-        i: A number representing the depth of the solution.
-        total_count: A number representing the total number if nodes expanded.
+    Attributes:
+        goal_state: An object of Board class with the goal state.
+        max_depth: A number representing the depth after which the search
+            gives up, or None to stop at the difference of the peg counts of
+            the root and goal state, the only depth a solution can have.
+        pruner: An object of PagodaPruner class that cuts the moves to
+            states which can not reach goal state. Its pruned attribute
+            counts them.
+        ordering: An object of ScanOrder class or a subclass of it, which
+            gives the order the moves of every state are tried in and
+            learns from the moves that reached the depth limit, across the
+            depth limited searches.
+        leaves: A number representing how many states were reached at the
+            depth limit.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every depth limited search.
+        token: An object of CancellationToken class or None. If it is
+            given, it is checked every token.interval nodes expanded and
+            cancellation.SearchStopped is raised, with the total number of
+            nodes expanded and the depth limit being searched, once it
+            tells the search to stop.
+        check_at: The number of nodes expanded by the current depth limited
+            search at which the token is checked next, -1 if there is none.
         solution_moves: A list of tuples representing the moves required to
-            reach goal state.
+            reach goal state, in reverse order, filled by
+            depth_limited_search.
     """
-    root_state = board.Board(root)
-    goal_state = board.Board(goal)
-    root_hash = hash(root_state)
-    goal_hash = hash(goal_state)
-    i = 0
-    total_count = 0
-    while root_hash != goal_hash:
+    name = "Iterative Deepening Search"
+
+    def __init__(self, goal, max_depth=MAX_DEPTH, pruner=None,
+                 ordering=None, instrument=None, token=None):
+        """Initializes the search using the goal state list. A PagodaPruner
+        for goal state is used if pruner is None, and the order of the jump
+        table if ordering is None."""
+        self.goal_state = board.Board(goal)
+        self.max_depth = max_depth
+        if pruner is None:
+            pruner = pagoda.PagodaPruner(self.goal_state.pegs)
+        self.pruner = pruner
+        if ordering is None:
+            ordering = move_order.ScanOrder()
+        self.ordering = ordering
+        self.leaves = 0
+        self.instrument = instrument
+        self.token = token
+        self.check_at = -1
+        self.solution_moves = []
+
+    def search(self, root):
+        """Iterative Deepening Search method.
+
+        Args:
+            root: A list of numbers representing initial state.
+
+        Returns:
+            i: A number representing the depth of the solution.
+            total_count: A number representing the total number if nodes
+                expanded.
+            solution_moves: A list of tuples representing the moves required
+                to reach goal state, or None if it can not be reached.
+
+        Raises:
+            board.Unsolvable: board.is_solvable rules out root and goal
+                state, which are then not searched at all.
+        """
         root_state = board.Board(root)
-        count = 0
-        root_hash, count = depth_limited_search(root_state, goal_state, i,
-                                                count)
-        # print "Depth: ", i, "\tNumber of nodes expanded: ", count
-        total_count += count
-        i += 1
-        if i > 30:
-            print "Breaking. Depth > 30"
-            break
-    return i, total_count
+        board.check_solvable(root_state.pegs, self.goal_state.pegs)
+        instrument = self.instrument
+        if instrument is not None:
+            instrument.start(self.name, self.pruner)
+        root_hash = hash(root_state)
+        goal_hash = hash(self.goal_state)
+        max_depth = self.max_depth
+        if max_depth is None:
+            # Every jump removes one peg, so no solution is deeper.
+            max_depth = (root_state.count_pegs() -
+                         self.goal_state.count_pegs())
+        i = 0
+        total_count = 0
+        moves = []
+        try:
+            if self.token is not None:
+                self.token.check()
+            while root_hash != goal_hash:
+                count, moves = self.search_depth(root_state, i)
+                if moves is not None:
+                    root_hash = goal_hash
+                # print "Depth: ", i, "\tNumber of nodes expanded: ", count
+                total_count += count
+                if instrument is not None:
+                    instrument.progress(total_count, total_count,
+                                        self.get_duplicates())
+                i += 1
+                if i > max_depth:
+                    print "Breaking. Depth > %d" % max_depth
+                    break
+        except cancellation.SearchStopped as error:
+            error.count += total_count
+            error.depth = i
+            if instrument is not None:
+                instrument.finish(error.count, error.count,
+                                  self.get_duplicates())
+            raise
+        if instrument is not None:
+            instrument.finish(total_count, total_count, self.get_duplicates())
+        return i, total_count, moves
+
+    def get_duplicates(self):
+        """Returns the number of states skipped as already searched, or None
+        if the search does not detect them."""
+        return None
 
+    def search_depth(self, node_state, depth):
+        """Runs one depth limited search from node_state.
 
-def depth_limited_search(node_state, goal_state, depth, count):
-    """Depth Limited Search method.
+        Returns: A tuple containing the number of nodes expanded and a list
+        of tuples representing the moves required to reach goal state, or
+        None if it is deeper than depth.
+        """
+        self.solution_moves = []
+        self.pruner.reset(node_state.pegs)
+        if self.token is not None:
+            self.check_at = self.token.interval
+        ans_hash, count = self.depth_limited_search(node_state, depth, 0)
+        if ans_hash:
+            return count, self.solution_moves[::-1]
+        return count, None
+
+    def depth_limited_search(self, node_state, depth, count):
+        """Depth Limited Search method.
+
+        Args:
+            node_state: An object of Board class with the intermediate state.
+                Moves are made and taken back on this object, it holds the
+                same state again when the method returns.
+            depth: A number which represents the maximum depth that the
+                method can go to.
+            count: A number representing the total number if nodes expanded
+                till the method was called.
+
+        Returns: A tuple containing the child_state hash and updated number
+            of nodes explored. The moves are added to solution_moves.
+        """
+        if hash(node_state) == hash(self.goal_state):
+            return hash(node_state), count
+        elif depth >= 0:
+            for transition in self.ordering.order(
+                    node_state, node_state.get_possible_transitions()):
+                if not self.pruner.make_move(transition):
+                    continue
+                count += 1
+                if count == self.check_at:
+                    self.check_at = self.token.check(count)
+                leaves = self.leaves
+                node_state.make_move(*transition)
+                ans_hash, count = self.depth_limited_search(node_state,
+                                                            depth - 1, count)
+                node_state.unmake_move(*transition)
+                self.pruner.unmake_move()
+                if ans_hash or self.leaves > leaves:
+                    self.ordering.record(node_state, transition, depth)
+                if ans_hash:
+                    self.solution_moves.append(transition)
+                    return ans_hash, count
+        else:
+            self.leaves += 1
+        return False, count
+
+
+def iterative_deepening_search(root, goal, pruner=None, ordering=None,
+                               instrument=None, cache=None,
+                               max_depth=MAX_DEPTH, token=None):
+    """Iterative Deepening Search method.
 
     Args:
-        node_state: An object of Board class with the intermediate state.
-        goal_state: An object of Board class with the goal state.
-        depth: A number which represents the maximum depth that the method
-            can go to.
-        count: A number representing the total number if nodes expanded till
-            the method was called.
+        root: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            moves. One is created for goal state if it is None.
+        ordering: An object of ScanOrder class or a subclass of it, as
+            returned by move_order.get_ordering. The order of the jump
+            table is used if it is None.
+        instrument: An object of SearchInstrument class or None.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for root and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+        max_depth: A number representing the depth after which the search
+            gives up, or None for the only depth a solution can have.
+        token: An object of CancellationToken class or None.
+
+    Returns:
+        i: A number representing the depth of the solution.
+        total_count: A number representing the total number if nodes expanded.
         solution_moves: A list of tuples representing the moves required to
-            reach goal state.
+            reach goal state, or None if it can not be reached.
 
-    Returns: A tuple containing the child_state hash, updated number of nodes
-        explored ans updated solution_moves list.
+    Raises:
+        board.Unsolvable: board.is_solvable rules out root and goal state,
+            which are then not searched at all.
     """
-    if hash(node_state) == hash(goal_state):
-        return hash(node_state), count
-    elif depth >= 0:
-        for transition in node_state.get_possible_transitions():
-            count += 1
-            child_state = node_state.copy()
-            child_state.move(*transition)
-            if hash(child_state) == hash(goal_state):
-                solution_moves.append(transition)
-                return hash(child_state), count
-            ans_hash, count = depth_limited_search(child_state, goal_state,
-                                                   depth-1, count)
-            if ans_hash:
-                solution_moves.append(transition)
-                return ans_hash, count
-    return False, count
+    if cache is not None:
+        moves = cache.get(root, goal, "ids")
+        if moves is not None:
+            return len(moves), 0, moves
+    depth, count, moves = IterativeDeepeningSearch(
+        goal, max_depth, pruner=pruner, ordering=ordering,
+        instrument=instrument, token=token).search(root)
+    if cache is not None and moves is not None:
+        cache.put(root, goal, "ids", moves)
+    return depth, count, moves
 
 
 def main():
+    from guppy import hpy
+
     # Cross Configuration
     root = board.translate_input_to_array(['--000--',
                                            '--0X0--',
@@ -140,16 +296,16 @@ def main():
     hp = hpy()
     before = hp.heap()
     start_time = time.time()
-    depth, count = iterative_deepening_search(root, goal)
+    depth, count, moves = iterative_deepening_search(
+        root, goal, cache=solution_cache.SolutionCache())
     after = hp.heap()
     end_time = time.time()
     leftover = after - before
 
-    moves = solution_moves[::-1]
     print "Total number of nodes expanded: %d" % count
     print "Answer depth: %d" % depth
     print "Moves: %s" % moves
-    print "Time: %d seconds\n" % (end_time - start_time)
+    print "Time: %.3f seconds\n" % (end_time - start_time)
     print leftover
 
     # board.plot_answer(root, moves)
@@ -0,0 +1,266 @@
+import resource
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 has no tracemalloc unless the pytracemalloc backport is
+    # installed; the peak resident set size is reported instead.
+    tracemalloc = None
+
+# Number of nodes expanded between two progress snapshots of the searches
+# that expand nodes one at a time.
+SNAPSHOT_INTERVAL = 100000
+
+# The counters of a snapshot, in the order PrintObserver shows them.
+COUNTERS = ("expanded", "generated", "duplicates", "pruned", "frontier")
+
+
+class SearchObserver(object):
+    """SearchObserver class that models a listener of SearchInstrument.
+
+    Every method is a no-op; subclasses override the ones they need. A
+    snapshot is a python dictionary as returned by
+    SearchInstrument.get_snapshot.
+    """
+    def on_start(self, solver):
+        """Called when the search named solver starts."""
+        pass
+
+    def on_progress(self, snapshot):
+        """Called with a snapshot at every checkpoint of the search."""
+        pass
+
+    def on_finish(self, snapshot):
+        """Called with the final snapshot when the search ends."""
+        pass
+
+
+class CallbackObserver(SearchObserver):
+    """CallbackObserver class that calls a function with every progress
+    snapshot and the final one.
+
+    Attributes:
+        callback: A function taking a snapshot.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+
+    def on_progress(self, snapshot):
+        self.callback(snapshot)
+
+    def on_finish(self, snapshot):
+        self.callback(snapshot)
+
+
+class PrintObserver(SearchObserver):
+    """PrintObserver class that prints one line per snapshot."""
+    def on_start(self, solver):
+        print "%s: started" % solver
+
+    def on_progress(self, snapshot):
+        print format_snapshot(snapshot)
+
+    def on_finish(self, snapshot):
+        print "%s (done)" % format_snapshot(snapshot)
+
+
+class SearchInstrument(object):
+    """SearchInstrument class that collects the metrics of one search run at
+    a time and passes snapshots of them to observers.
+
+    A search takes an instrument argument which is None by default, in
+    which case nothing is measured and the search runs exactly as before.
+    Given an instrument, a search calls start once, progress at its own
+    checkpoints (every interval nodes for A*, every iteration for the
+    iterative deepening searches, every layer for the layered searches)
+    and finish once. The hot loops keep their counters in local variables
+    and only hand over totals at checkpoints. A counter a search does not
+    keep is left as None.
+
+    Attributes:
+        observers: A list of SearchObserver objects.
+        interval: A number of nodes expanded between two snapshots, for the
+            searches that check it.
+        trace_memory: A boolean which is true if peak memory is measured
+            with tracemalloc when it is available.
+        solver: The name of the current search.
+        expanded, generated, duplicates, pruned, frontier: The latest
+            totals handed over by the search, or None.
+        heuristic_calls: A number representing how many heuristic
+            evaluations were timed.
+        heuristic_time: A number representing the seconds spent in them.
+        frontier_sizes: A python list of (elapsed seconds, frontier size)
+            tuples, one per snapshot which had a frontier size.
+        pruner: The PagodaPruner of the search or None; its pruned count
+            is read at every snapshot.
+    """
+    def __init__(self, observers=(), interval=SNAPSHOT_INTERVAL,
+                 trace_memory=True):
+        self.observers = list(observers)
+        self.interval = interval
+        self.trace_memory = trace_memory and tracemalloc is not None
+        self.reset(None)
+
+    def reset(self, solver, pruner=None):
+        """Clears the metrics for a new run of the search named solver."""
+        self.solver = solver
+        self.expanded = None
+        self.generated = None
+        self.duplicates = None
+        self.pruned = None
+        self.frontier = None
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0
+        self.frontier_sizes = []
+        self.pruner = pruner
+        self.pruned_before = 0
+        if pruner is not None:
+            self.pruned_before = pruner.pruned
+        self.start_time = time.time()
+        self.started_tracing = False
+
+    def start(self, solver, pruner=None):
+        """Starts measuring the search named solver, which prunes moves with
+        pruner.
+
+        Returns: The number of nodes expanded at the first checkpoint.
+        """
+        self.reset(solver, pruner)
+        if self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.clear_traces()
+            else:
+                tracemalloc.start()
+                self.started_tracing = True
+        for observer in self.observers:
+            observer.on_start(solver)
+        return self.interval
+
+    def update(self, expanded=None, generated=None, duplicates=None,
+               frontier=None):
+        """Takes the totals of the search; the counters passed as None keep
+        their value."""
+        if expanded is not None:
+            self.expanded = expanded
+        if generated is not None:
+            self.generated = generated
+        if duplicates is not None:
+            self.duplicates = duplicates
+        if frontier is not None:
+            self.frontier = frontier
+            self.frontier_sizes.append((time.time() - self.start_time,
+                                        frontier))
+        if self.pruner is not None:
+            self.pruned = self.pruner.pruned - self.pruned_before
+
+    def progress(self, expanded=None, generated=None, duplicates=None,
+                 frontier=None):
+        """Takes the totals of the search at a checkpoint and passes a
+        snapshot to the observers.
+
+        Returns: The number of nodes expanded at the next checkpoint.
+        """
+        self.update(expanded, generated, duplicates, frontier)
+        snapshot = self.get_snapshot()
+        for observer in self.observers:
+            observer.on_progress(snapshot)
+        return (self.expanded or 0) + self.interval
+
+    def finish(self, expanded=None, generated=None, duplicates=None,
+               frontier=None):
+        """Takes the final totals of the search, stops measuring memory and
+        passes the final snapshot to the observers.
+
+        Returns: The final snapshot.
+        """
+        self.update(expanded, generated, duplicates, frontier)
+        snapshot = self.get_snapshot()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        for observer in self.observers:
+            observer.on_finish(snapshot)
+        return snapshot
+
+    def get_peak_memory(self):
+        """Returns the peak memory in bytes, traced since start if
+        tracemalloc is in use, else the peak resident set size of the
+        process."""
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def get_snapshot(self):
+        """Returns a python dictionary of the current metrics."""
+        elapsed = time.time() - self.start_time
+        snapshot = dict((name, getattr(self, name)) for name in COUNTERS)
+        snapshot.update({
+            "solver": self.solver,
+            "elapsed": elapsed,
+            "nodes_per_second": (self.expanded / elapsed
+                                 if self.expanded and elapsed else None),
+            "heuristic_calls": self.heuristic_calls,
+            "heuristic_time": self.heuristic_time,
+            "frontier_sizes": list(self.frontier_sizes),
+            "peak_memory": self.get_peak_memory(),
+            "memory_source": ("tracemalloc" if self.trace_memory
+                              else "rss"),
+        })
+        return snapshot
+
+    def wrap_heuristic(self, heuristic):
+        """Returns heuristic wrapped so that the time of its evaluations is
+        added to heuristic_time."""
+        return TimedHeuristic(heuristic, self)
+
+
+class TimedHeuristic(object):
+    """TimedHeuristic class that times the calls made to a heuristic with
+    the methods of astar.WeightHeuristic.
+
+    Only searches given an instrument use it, so the clock is never read
+    otherwise.
+
+    Attributes:
+        heuristic: The heuristic object timed.
+        instrument: The SearchInstrument the time is added to.
+    """
+    def __init__(self, heuristic, instrument):
+        self.heuristic = heuristic
+        self.instrument = instrument
+
+    def get_values(self, pegs):
+        start_time = time.time()
+        values = self.heuristic.get_values(pegs)
+        self.instrument.heuristic_time += time.time() - start_time
+        self.instrument.heuristic_calls += 1
+        return values
+
+    def get_child_values(self, values, transition):
+        start_time = time.time()
+        child_values = self.heuristic.get_child_values(values, transition)
+        self.instrument.heuristic_time += time.time() - start_time
+        self.instrument.heuristic_calls += 1
+        return child_values
+
+    def get_cost(self, values):
+        start_time = time.time()
+        cost = self.heuristic.get_cost(values)
+        self.instrument.heuristic_time += time.time() - start_time
+        return cost
+
+
+def format_snapshot(snapshot):
+    """Returns a one line summary of snapshot."""
+    fields = ["%s: %.3f s" % (snapshot["solver"], snapshot["elapsed"])]
+    for name in COUNTERS:
+        if snapshot[name] is not None:
+            fields.append("%s %d" % (name, snapshot[name]))
+    if snapshot["nodes_per_second"] is not None:
+        fields.append("%.0f nodes/s" % snapshot["nodes_per_second"])
+    if snapshot["heuristic_calls"]:
+        fields.append("heuristic %.3f s" % snapshot["heuristic_time"])
+    fields.append("peak memory %.1f MB (%s)" % (
+        snapshot["peak_memory"] / 1e6, snapshot["memory_source"]))
+    return ", ".join(fields)
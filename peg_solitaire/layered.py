@@ -0,0 +1,187 @@
+import board
+import pagoda
+import time
+
+
+def layered_search(start, goal, pruner=None, instrument=None, cache=None):
+    """Layered Frontier Search method.
+
+    Every jump removes exactly one peg, so the states reachable from start
+    form layers by peg count and every solution has depth equal to the
+    difference between the number of pegs in start and goal. The search
+    builds one layer at a time from the previous one, deduplicating states
+    within the layer by their canonical key, and only keeps two layers in
+    memory. Instead of parent pointers every state of the second half of the
+    search remembers its ancestor in the middle layer. Once the goal layer is
+    built the path is recomputed by solving the two halves on each side of
+    that ancestor in the same way. States which can not reach goal state
+    according to the pagoda functions of pruner are left out of the layers.
+
+    Args:
+        start: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            moves. One is created for goal state if it is None.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every layer of the full search;
+            the searches recomputing the path are only counted in the
+            final snapshot.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for start and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+
+    Returns: A tuple containing the number of nodes expanded and a list of
+    tuples representing the moves required to reach goal state, or None if
+    goal state can not be reached.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out start and goal state,
+            which are then not searched at all.
+    """
+    if cache is not None:
+        moves = cache.get(start, goal, "layered")
+        if moves is not None:
+            return 0, moves
+    start_state = board.Board(start)
+    goal_state = board.Board(goal)
+    board.check_solvable(start_state.pegs, goal_state.pegs)
+    symmetries = board.get_symmetries(goal_state.pegs)
+    depth = start_state.count_pegs() - goal_state.count_pegs()
+    if pruner is None:
+        pruner = pagoda.PagodaPruner(goal_state.pegs)
+    if instrument is not None:
+        instrument.start("Layered Frontier Search", pruner)
+    goal_key = goal_state.canonical_key(symmetries)
+    count, moves = solve_layers(start_state.pegs, goal_key, depth, symmetries,
+                                pruner, instrument)
+    if instrument is not None:
+        instrument.finish(count)
+    if cache is not None and moves is not None:
+        cache.put(start, goal, "layered", moves)
+    return count, moves
+
+
+def solve_layers(start, goal_key, depth, symmetries, pruner,
+                 instrument=None):
+    """Returns the moves from a start state to a state with a given
+    canonical key, found by layered frontier search.
+
+    Args:
+        start: A bitboard representing the start state.
+        goal_key: The canonical key of the state to reach.
+        depth: A number representing the number of moves from start state
+            to the state to reach.
+        symmetries: A tuple of the symmetries states are reduced by.
+        pruner: An object of PagodaPruner class for the final goal state.
+            The states on a path to goal_key can reach it, so the pruner
+            never cuts them.
+        instrument: An object of SearchInstrument class or None, which
+            gets a snapshot after every layer.
+
+    Returns: A tuple containing the number of nodes expanded and a list of
+    tuples representing the moves, made on start state and the states
+    following it, or None if no state with goal_key can be reached.
+    """
+    start_state = board.Board.from_bitboard(start)
+    if depth == 0:
+        if start_state.canonical_key(symmetries) == goal_key:
+            return 0, []
+        return 0, None
+    if depth == 1:
+        for transition in start_state.get_possible_transitions():
+            start_state.make_move(*transition)
+            child_key = start_state.canonical_key(symmetries)
+            start_state.unmake_move(*transition)
+            if child_key == goal_key:
+                return 1, [transition]
+        return 1, None
+
+    middle = depth // 2
+    count = 0
+    # Every layer maps the canonical key of a state, which is also the
+    # bitboard of its canonical image, to its ancestor in the middle layer.
+    layer = {start_state.canonical_key(symmetries): None}
+    for level in range(1, depth + 1):
+        next_layer = {}
+        for key, relay in layer.iteritems():
+            count += 1
+            slacks = pruner.get_slacks(key)
+            for transition, source, target in board.JUMP_TABLE:
+                if ((key & source) == source and not key & target and
+                        pruner.get_child_slacks(slacks, transition)
+                        is not None):
+                    child_key = board.get_canonical_key(key ^ source ^ target,
+                                                        symmetries)
+                    if child_key not in next_layer:
+                        if level == middle:
+                            next_layer[child_key] = child_key
+                        else:
+                            next_layer[child_key] = relay
+        layer = next_layer
+        if instrument is not None:
+            instrument.progress(count, frontier=len(layer))
+        if not layer:
+            return count, None
+    if goal_key not in layer:
+        return count, None
+    relay = layer[goal_key]
+    del layer
+
+    # The two halves expand states this search already expanded, so the
+    # moves they prune are not counted again.
+    pruned = pruner.pruned
+    first_count, first_moves = solve_layers(start, relay, middle, symmetries,
+                                            pruner)
+    for transition in first_moves:
+        start_state.make_move(*transition)
+    second_count, second_moves = solve_layers(start_state.pegs, goal_key,
+                                              depth - middle, symmetries,
+                                              pruner)
+    pruner.pruned = pruned
+    count += first_count + second_count
+    return count, first_moves + second_moves
+
+
+def main():
+    from guppy import hpy
+
+    # Cross Configuration
+    root = board.translate_input_to_array(['--000--',
+                                           '--0X0--',
+                                           '00XXX00',
+                                           '000X000',
+                                           '000X000',
+                                           '--000--',
+                                           '--000--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    count, moves = layered_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Total number of nodes expanded: %d" % count
+    if moves is None:
+        print "No solution"
+    else:
+        print "Answer depth: %d" % len(moves)
+        print "Moves: %s" % moves
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
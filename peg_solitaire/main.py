@@ -1,12 +1,29 @@
-from guppy import hpy
 import board
 import pruned_ids
 import ids
+import idastar
+import parallel_ids
 import astar
+import bidirectional
+import layered
+import move_order
+import external
+import parallel
+import pattern_database
 import time
+import transposition
+
+
+def get_depth(moves):
+    """Returns the number of moves, or "no solution" if moves is None."""
+    if moves is None:
+        return "no solution"
+    return len(moves)
 
 
 def main():
+    from guppy import hpy
+
     # Cross Configuration
     root = board.translate_input_to_array(['--000--',
                                            '--0X0--',
@@ -73,66 +90,186 @@ def main():
     hp = hpy()
     before = hp.heap()
     start_time = time.time()
-    count, parent = astar.a_star_search(root, goal)
+    count, store = astar.a_star_search(root, goal)
     end_time = time.time()
     after = hp.heap()
-    answer = astar.backtrack(parent, root, goal)
+    answer = astar.backtrack(store, root, goal)
+    moves = answer and [move for move, _ in answer]
     leftover = after - before
 
     print "A* Search: Total Manhattan distance heuristic"
     print "Total number of nodes expanded: %d" % count
-    print "Answer depth: %d" % len([move for move, _ in answer])
-    print "Moves: %s" % [move for move, _ in answer]
-    print "Time: %d seconds" % (end_time - start_time)
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
     # print leftover
     print "---\n"
 
 
     before = hp.heap()
     start_time = time.time()
-    count, parent = astar.a_star_search(root, goal, simple=True)
+    count, store = astar.a_star_search(root, goal, simple=True)
     end_time = time.time()
     after = hp.heap()
-    answer = astar.backtrack(parent, root, goal)
+    answer = astar.backtrack(store, root, goal)
+    moves = answer and [move for move, _ in answer]
     leftover = after - before
 
     print "A* Search: Number of pegs heuristic"
     print "Total number of nodes expanded: %d" % count
-    print "Answer depth: %d" % len([move for move, _ in answer])
-    print "Moves: %s" % [move for move, _ in answer]
-    print "Time: %d seconds" % (end_time - start_time)
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    database = pattern_database.get_pattern_database(
+        board.get_bitboard_from_state(goal))
+    before = hp.heap()
+    start_time = time.time()
+    count, store = astar.a_star_search(root, goal, database=database)
+    end_time = time.time()
+    after = hp.heap()
+    answer = astar.backtrack(store, root, goal)
+    moves = answer and [move for move, _ in answer]
+    leftover = after - before
+
+    print "A* Search: Pattern database heuristic"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
     # print leftover
     print "---\n"
 
+    table = transposition.TranspositionTable()
     before = hp.heap()
     start_time = time.time()
-    depth, count = pruned_ids.iterative_deepening_search(root, goal)
+    depth, count, moves = idastar.ida_star_search(root, goal,
+                                                  database=database,
+                                                  table=table)
     end_time = time.time()
     after = hp.heap()
     leftover = after - before
 
-    moves = pruned_ids.solution_moves[::-1]
-    print "Pruned Iterative Deepening Search:"
+    print "IDA* Search: Pattern database heuristic"
     print "Total number of nodes expanded: %d" % count
     print "Answer depth: %d" % depth
     print "Moves: %s" % moves
-    print "Time: %d seconds" % (end_time - start_time)
+    print "Time: %.3f seconds" % (end_time - start_time)
     # print leftover
     print "---\n"
 
     before = hp.heap()
     start_time = time.time()
-    depth, count = ids.iterative_deepening_search(root, goal)
+    count, moves = layered.layered_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Layered Frontier Search:"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    before = hp.heap()
+    start_time = time.time()
+    count, moves = bidirectional.bidirectional_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Bidirectional Layered Search:"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    before = hp.heap()
+    start_time = time.time()
+    count, moves, io_stats = external.external_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Disk Backed Layered Search:"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Disk bytes read: %d" % sum(layer["bytes_read"]
+                                      for layer in io_stats)
+    print "Disk bytes written: %d" % sum(layer["bytes_written"]
+                                         for layer in io_stats)
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    before = hp.heap()
+    start_time = time.time()
+    count, moves = parallel.parallel_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Multi Process Sharded Breadth First Search:"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %s" % get_depth(moves)
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    before = hp.heap()
+    start_time = time.time()
+    depth, count, moves = pruned_ids.iterative_deepening_search(
+        root, goal, ordering=move_order.get_ordering("history"))
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Pruned Iterative Deepening Search: History move ordering"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %d" % depth
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+    before = hp.heap()
+    start_time = time.time()
+    depth, count, moves = ids.iterative_deepening_search(root, goal)
     end_time = time.time()
     after = hp.heap()
     leftover = after - before
 
-    moves = ids.solution_moves[::-1]
     print "Iterative Deepening Search:"
     print "Total number of nodes expanded: %d" % count
     print "Answer depth: %d" % depth
     print "Moves: %s" % moves
-    print "Time: %d seconds" % (end_time - start_time)
+    print "Time: %.3f seconds" % (end_time - start_time)
+    # print leftover
+    print "---\n"
+
+
+    before = hp.heap()
+    start_time = time.time()
+    depth, count, moves = \
+        parallel_ids.parallel_iterative_deepening_search(root, goal,
+                                                         pruned=True)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Parallel Pruned Iterative Deepening Search:"
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %d" % depth
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds" % (end_time - start_time)
     # print leftover
     print "---\n"
 
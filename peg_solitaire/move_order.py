@@ -0,0 +1,110 @@
+import board
+
+# The center hole of the board, which the static ordering steers jumps to.
+CENTER = (board.BOARD_SIZE * board.BOARD_SIZE + 1) // 2
+
+
+def get_center_distance(number):
+    """Returns the manhattan distance of the hole number from the center."""
+    row, col = divmod(number - 1, board.BOARD_SIZE)
+    center_row, center_col = divmod(CENTER - 1, board.BOARD_SIZE)
+    return abs(row - center_row) + abs(col - center_col)
+
+
+# Rank of every (init_pos, final_pos) move for the static ordering: jumps
+# landing nearer the center come first and, among those, the ones removing
+# a peg further out.
+CENTER_RANKS = dict(
+    ((init_pos, final_pos), rank)
+    for rank, (init_pos, _, final_pos) in enumerate(sorted(
+        board.JUMPS, key=lambda jump: (get_center_distance(jump[2]),
+                                       -get_center_distance(jump[1])))))
+
+
+class ScanOrder(object):
+    """ScanOrder class that models the move ordering of a depth first
+    search.
+
+    A search calls order with the moves of a state to get the order it
+    tries them in, and record with a move whose subtree reached the depth
+    limit of the search, or goal state. ScanOrder keeps the order of the
+    jump table and learns nothing; subclasses change either method.
+    """
+    def order(self, node_state, transitions):
+        """Returns the moves transitions of node_state in the order they
+        should be tried."""
+        return transitions
+
+    def record(self, node_state, transition, depth):
+        """Records that the subtree below the move transition from
+        node_state, searched depth moves deep, reached the depth limit."""
+        pass
+
+
+class CenterOrder(ScanOrder):
+    """CenterOrder class that tries the jumps towards the center first, as
+    ranked by CENTER_RANKS."""
+    def order(self, node_state, transitions):
+        """Returns the moves transitions sorted by CENTER_RANKS."""
+        return sorted(transitions, key=CENTER_RANKS.__getitem__)
+
+
+class HistoryOrder(CenterOrder):
+    """HistoryOrder class that orders moves by what earlier searches
+    learned, falling back to CenterOrder.
+
+    Every move whose subtree reached the depth limit gets a history score
+    of depth squared added, so moves that led deep in one iteration of
+    iterative deepening are tried first in the next. A state with p pegs is
+    always p - goal pegs moves away from the goal, so the peg count names a
+    level of the tree in every iteration; the last two such moves of every
+    level are kept as killer moves and tried before all others when legal.
+
+    Attributes:
+        history: A python dictionary containing the score of every move.
+        killers: A python dictionary containing a list of up to two killer
+            moves, most recent first, keyed by peg count.
+    """
+    def __init__(self):
+        """Initializes the ordering with no history."""
+        self.history = dict((transition, 0) for transition in CENTER_RANKS)
+        self.killers = {}
+
+    def order(self, node_state, transitions):
+        """Returns the legal killer moves of the level of node_state, then
+        the other moves transitions by decreasing history score."""
+        history = self.history
+        ordered = sorted(transitions,
+                         key=lambda transition: (-history[transition],
+                                                 CENTER_RANKS[transition]))
+        killers = [killer for killer
+                   in self.killers.get(node_state.count_pegs(), ())
+                   if killer in transitions]
+        if not killers:
+            return ordered
+        return killers + [transition for transition in ordered
+                          if transition not in killers]
+
+    def record(self, node_state, transition, depth):
+        """Adds depth squared to the history score of transition and makes
+        it the first killer move of the level of node_state."""
+        self.history[transition] += depth * depth
+        killers = self.killers.setdefault(node_state.count_pegs(), [])
+        if transition in killers:
+            killers.remove(transition)
+        killers.insert(0, transition)
+        del killers[2:]
+
+
+# Move orderings a search can be run with, by name.
+ORDERINGS = {
+    "scan": ScanOrder,
+    "center": CenterOrder,
+    "history": HistoryOrder,
+}
+
+
+def get_ordering(name):
+    """Returns a new move ordering object of the kind name, one of the keys
+    of ORDERINGS."""
+    return ORDERINGS[name]()
@@ -0,0 +1,194 @@
+import board
+
+
+def get_fibonacci_weights(distances):
+    """Returns pagoda weights from the distance of every hole to a target.
+
+    The weight of a hole at distance d is F(n - d), where F is the Fibonacci
+    sequence and n is one more than the largest distance. A jump towards the
+    target from distance d + 2 over d + 1 to d keeps the total weight, as
+    F(k - 2) + F(k - 1) = F(k), and any other jump lowers it.
+
+    Args:
+        distances: A list of numbers holding the distance of every hole to
+            the target, indexed by bit.
+    """
+    fibonacci = [0, 1]
+    while len(fibonacci) <= max(distances) + 1:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+    top = max(distances) + 1
+    return tuple(fibonacci[top - distance] for distance in distances)
+
+
+def get_distance_pagoda(target):
+    """Returns the pagoda weights that decrease with the manhattan distance
+    from the hole target."""
+    target_row, target_col = divmod(target - 1, board.BOARD_SIZE)
+    distances = []
+    for number in board.HOLES:
+        row, col = divmod(number - 1, board.BOARD_SIZE)
+        distances.append(abs(row - target_row) + abs(col - target_col))
+    return get_fibonacci_weights(distances)
+
+
+def get_row_pagoda(row):
+    """Returns the pagoda weights that decrease with the distance from a row,
+    numbered from 1."""
+    return get_fibonacci_weights(
+        [abs((number - 1) // board.BOARD_SIZE + 1 - row)
+         for number in board.HOLES])
+
+
+def get_col_pagoda(col):
+    """Returns the pagoda weights that decrease with the distance from a
+    column, numbered from 1."""
+    return get_fibonacci_weights(
+        [abs((number - 1) % board.BOARD_SIZE + 1 - col)
+         for number in board.HOLES])
+
+
+def is_pagoda(weights):
+    """Checks that no jump can increase the total weight of the pegs."""
+    return all(weights[board.HOLES.index(init_pos)] +
+               weights[board.HOLES.index(middle_peg)] >=
+               weights[board.HOLES.index(final_pos)]
+               for init_pos, middle_peg, final_pos in board.JUMPS)
+
+
+def get_pagoda_value(weights, pegs):
+    """Returns the total weight of the pegs of the bitboard pegs."""
+    value = 0
+    for bit, weight in enumerate(weights):
+        if pegs >> bit & 1:
+            value += weight
+    return value
+
+
+def get_value_tables(weights):
+    """Returns the lookup tables that give the total weight of the pegs of a
+    bitboard 11 bits at a time, like board.SYMMETRY_TABLES."""
+    size = board.SYMMETRY_CHUNK_SIZE
+    tables = []
+    for offset in range(0, 3 * size, size):
+        table = [0]
+        for weight in weights[offset:offset + size]:
+            table += [entry + weight for entry in table]
+        tables.append(table)
+    return tuple(tables)
+
+
+# Library of pagoda functions for the board geometry: the weights
+# decreasing with the distance to every hole, row and column, keyed by
+# (kind, hole or row or column number). Each one is checked against the jump
+# table.
+PAGODAS = dict([(("distance", number), get_distance_pagoda(number))
+                for number in board.HOLES] +
+               [(("row", line), get_row_pagoda(line))
+                for line in range(1, board.BOARD_SIZE + 1)] +
+               [(("col", line), get_col_pagoda(line))
+                for line in range(1, board.BOARD_SIZE + 1)])
+assert all(is_pagoda(weights) for weights in PAGODAS.values())
+
+
+class PagodaPruner(object):
+    """PagodaPruner class that cuts states which can never reach the goal
+    state.
+
+    A pagoda function gives every hole a weight such that no jump increases
+    the total weight of the pegs. A state whose total weight is already
+    below the total weight of the goal state can not reach it. The pruner
+    keeps, for every pagoda function in use, the slack between the value of
+    the current state and the value of the goal state. A jump lowers every
+    slack by a precomputed amount, so the values are never recomputed; a
+    move that makes a slack negative is pruned.
+
+    The slacks follow moves like Board.make_move and Board.unmake_move, so a
+    depth first search calls reset once for the root and then make_move and
+    unmake_move along with the board. get_slacks and get_child_slacks give
+    the same checks without this stack, for searches that expand states in
+    any order.
+
+    Attributes:
+        pagodas: A list of the pagoda weights in use.
+        goal_values: A list of the values of the goal state.
+        value_tables: A list of the lookup tables of every pagoda, as
+            returned by get_value_tables.
+        deltas: A python dictionary containing the decrease of every value
+            keyed by (init_pos, final_pos) move.
+        slacks: A list of the slacks of the current state.
+        pruned: A number representing how many moves were pruned.
+    """
+    def __init__(self, goal, pagodas=None):
+        """Initializes the pruner for the goal state bitboard.
+
+        Args:
+            goal: A bitboard representing the goal state.
+            pagodas: A list of pagoda weights to use. By default the
+                pagodas of the library whose largest weight lies under a
+                peg of the goal state are used, the others rarely prune.
+        """
+        if pagodas is None:
+            pagodas = [weights for _, weights in sorted(PAGODAS.items())
+                       if any(goal >> bit & 1 and weight == max(weights)
+                              for bit, weight in enumerate(weights))]
+        self.pagodas = pagodas
+        self.goal_values = [get_pagoda_value(weights, goal)
+                            for weights in pagodas]
+        self.value_tables = [get_value_tables(weights) for weights in pagodas]
+        self.deltas = {}
+        for init_pos, middle_peg, final_pos in board.JUMPS:
+            self.deltas[(init_pos, final_pos)] = tuple(
+                weights[board.HOLES.index(init_pos)] +
+                weights[board.HOLES.index(middle_peg)] -
+                weights[board.HOLES.index(final_pos)]
+                for weights in pagodas)
+        self.slacks = ()
+        self.stack = []
+        self.pruned = 0
+
+    def get_slacks(self, pegs):
+        """Returns the slacks of the state bitboard pegs."""
+        size = board.SYMMETRY_CHUNK_SIZE
+        mask = board.SYMMETRY_CHUNK_MASK
+        return tuple(low[pegs & mask] + middle[pegs >> size & mask] +
+                     high[pegs >> 2 * size] - goal_value
+                     for (low, middle, high), goal_value
+                     in zip(self.value_tables, self.goal_values))
+
+    def is_reachable(self, pegs):
+        """Checks that no pagoda function rules out reaching the goal state
+        from the state bitboard pegs."""
+        return all(slack >= 0 for slack in self.get_slacks(pegs))
+
+    def get_child_slacks(self, slacks, transition):
+        """Returns the slacks after the move transition from a state with
+        slacks, or None if the move is pruned."""
+        child_slacks = tuple(slack - delta for slack, delta
+                             in zip(slacks, self.deltas[transition]))
+        for slack in child_slacks:
+            if slack < 0:
+                self.pruned += 1
+                return None
+        return child_slacks
+
+    def reset(self, pegs):
+        """Sets the current state to the state bitboard pegs."""
+        self.slacks = self.get_slacks(pegs)
+        self.stack = []
+
+    def make_move(self, transition):
+        """Updates the slacks for the move transition from the current state.
+
+        Returns: A boolean which is false if the move is pruned, in which
+        case the current state is unchanged.
+        """
+        child_slacks = self.get_child_slacks(self.slacks, transition)
+        if child_slacks is None:
+            return False
+        self.stack.append(self.slacks)
+        self.slacks = child_slacks
+        return True
+
+    def unmake_move(self):
+        """Takes back the last move accepted by make_move."""
+        self.slacks = self.stack.pop()
@@ -0,0 +1,194 @@
+import board
+import external
+import multiprocessing
+import numpy as np
+import pagoda
+import shutil
+import tempfile
+import time
+
+
+def parallel_search(start, goal, processes=None, shards=None, directory=None,
+                    chunk_size=1 << 18, pruner=None, instrument=None,
+                    cache=None):
+    """Multi Process Sharded Breadth First Search method.
+
+    The peg count layers are built as in external.external_search, with the
+    states of every layer partitioned by hash into shards. Building a layer
+    takes two rounds of tasks on a pool of worker processes. First every
+    worker expands its shard of the current layer and routes each child to
+    the unsorted file of the shard that owns it, then every worker sorts and
+    deduplicates the children routed to its shard of the next layer. The
+    workers share nothing but the layer directory, so the search scales
+    with the number of processes. States which can not reach goal state
+    according to the pagoda functions of pruner are left out of the layers.
+
+    Args:
+        start: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        processes: A number indicating the number of worker processes. It
+            defaults to the number of CPUs.
+        shards: A power of 2 indicating the number of shards per layer. It
+            defaults to 4 shards per process so that the pool stays busy
+            when shards are uneven.
+        directory: The directory the layers are written to. A temporary
+            directory is created and removed afterwards if it is None.
+        chunk_size: A number indicating how many states a worker expands at
+            once.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            states. One is created for goal state if it is None.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every layer. Its peak memory is
+            the one of this process, not of the workers.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for start and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+
+    Returns: A tuple containing the number of nodes expanded and a list of
+    tuples representing the moves required to reach goal state, or None if
+    goal state can not be reached.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out start and goal state,
+            which are then not searched at all.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if shards is None:
+        shards = 1
+        while shards < 4 * processes:
+            shards *= 2
+    if shards & (shards - 1):
+        raise ValueError("shards must be a power of 2, got %d" % shards)
+    if cache is not None:
+        moves = cache.get(start, goal, "parallel")
+        if moves is not None:
+            return 0, moves
+    start_state = board.Board(start)
+    goal_state = board.Board(goal)
+    board.check_solvable(start_state.pegs, goal_state.pegs)
+    symmetries = board.get_symmetries(goal_state.pegs)
+    goal_key = goal_state.canonical_key(symmetries)
+    start_pegs = start_state.count_pegs()
+    goal_pegs = goal_state.count_pegs()
+    if pruner is None:
+        pruner = pagoda.PagodaPruner(goal_state.pegs)
+    filters = external.get_pagoda_filters(pruner)
+    if instrument is not None:
+        instrument.start("Multi Process Sharded Breadth First Search", pruner)
+
+    remove_directory = directory is None
+    if remove_directory:
+        directory = tempfile.mkdtemp(prefix="peg_solitaire_")
+    pool = multiprocessing.Pool(processes)
+    try:
+        layers = external.LayerStore(directory, shards)
+        layers.write_layer(
+            start_pegs, [np.array([start_state.canonical_key(symmetries)],
+                                  dtype=external.KEY_TYPE)])
+        count = 0
+        for pegs in range(start_pegs - 1, goal_pegs - 1, -1):
+            layers.create_layer(pegs)
+            pruner.pruned += sum(pool.map(
+                _expand_shard,
+                [(directory, shards, pegs + 1, shard, symmetries, filters,
+                  chunk_size) for shard in range(shards)]))
+            pool.map(_gather_shard,
+                     [(directory, shards, pegs, shard)
+                      for shard in range(shards)])
+            count += layers.count_states(pegs + 1)
+            if instrument is not None:
+                instrument.progress(count,
+                                    frontier=layers.count_states(pegs))
+            if not layers.count_states(pegs):
+                return count, None
+        if not layers.contains(goal_pegs, goal_key):
+            return count, None
+        moves = external.backtrack(layers, start_state, goal_key, goal_pegs,
+                                   symmetries)
+        if cache is not None:
+            cache.put(start, goal, "parallel", moves)
+        return count, moves
+    finally:
+        pool.terminate()
+        pool.join()
+        if remove_directory:
+            shutil.rmtree(directory)
+        if instrument is not None:
+            instrument.finish()
+
+
+def _expand_shard(args):
+    """Expands a shard of a layer in a worker process and routes the children
+    to their shards of the next layer. Returns the number of children
+    pruned."""
+    directory, shards, pegs, shard, symmetries, filters, chunk_size = args
+    layers = external.LayerStore(directory, shards)
+    pruned = 0
+    for keys in layers.read_bucket_chunks(pegs, shard, chunk_size):
+        children, chunk_pruned = external.expand_keys(keys, symmetries,
+                                                      filters)
+        pruned += chunk_pruned
+        layers.scatter(pegs - 1, [children], source=shard)
+    return pruned
+
+
+def _gather_shard(args):
+    """Sorts and deduplicates the children routed to a shard of a layer in a
+    worker process."""
+    directory, shards, pegs, shard = args
+    return external.LayerStore(directory, shards).gather(pegs, shard)
+
+
+def main():
+    from guppy import hpy
+
+    # Pyramid Configuration
+    root = board.translate_input_to_array(['--000--',
+                                           '--0X0--',
+                                           '00XXX00',
+                                           '0XXXXX0',
+                                           'XXXXXXX',
+                                           '--000--',
+                                           '--000--'])
+
+    # Start Configuration
+    # root = board.translate_input_to_array(['--XXX--',
+    #                                        '--XXX--',
+    #                                        'XXXXXXX',
+    #                                        'XXX0XXX',
+    #                                        'XXXXXXX',
+    #                                        '--XXX--',
+    #                                        '--XXX--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    count, moves = parallel_search(root, goal)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    print "Total number of nodes expanded: %d" % count
+    if moves is None:
+        print "No solution"
+    else:
+        print "Answer depth: %d" % len(moves)
+        print "Moves: %s" % moves
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
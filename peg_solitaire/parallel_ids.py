@@ -0,0 +1,256 @@
+import board
+import cancellation
+import ids
+import multiprocessing
+import pruned_ids
+import time
+
+# The solver of a worker process, built once by _init_worker, so that the
+# subtrees a worker searches share its pruner, transposition table and move
+# ordering, and the tasks only carry a subtree.
+_worker_solver = None
+
+
+def parallel_iterative_deepening_search(root, goal, processes=None,
+                                        split_depth=3, pruned=False,
+                                        max_depth=ids.MAX_DEPTH, pruner=None,
+                                        instrument=None, cache=None,
+                                        ordering=None, token=None):
+    """Parallel Iterative Deepening Search method.
+
+    The search tree is split at split_depth into the independent subtrees
+    below the states reached after split_depth moves. Depths up to
+    split_depth are searched in this process; for every deeper depth limit
+    the subtrees are searched by a pool of worker processes, and the
+    remaining subtrees are cancelled as soon as one worker finds a solution.
+
+    Args:
+        root: A list of numbers representing initial state.
+        goal: A list of numbers representing final goal state.
+        processes: A number indicating the number of worker processes. It
+            defaults to the number of CPUs.
+        split_depth: A number indicating the depth the tree is split at.
+        pruned: A boolean which is used to switch between the two searches.
+            If this is set as true, every subtree is searched by pruned
+            iterative deepening search and states symmetric to an earlier
+            one are dropped from the split depth; otherwise plain iterative
+            deepening search is used.
+        max_depth: A number representing the depth after which the search
+            gives up, or None for the only depth a solution can have.
+        pruner: An object of PagodaPruner class that cuts the moves to
+            states which can not reach goal state. Every worker gets a copy
+            of it once and the moves they prune are added to its count.
+        instrument: An object of SearchInstrument class or None. If it is
+            given, it gets a snapshot after every depth limit. Its peak
+            memory is the one of this process, not of the workers.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for root and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+        ordering: An object of a move_order class or None. Every worker
+            gets a copy of it once, which learns from the subtrees that
+            worker searches.
+        token: An object of CancellationToken class or None. It is checked
+            by this process and, through copies, by every worker, so it is
+            cancelled across processes through its event or deadline only;
+            cancellation.SearchStopped is raised with the nodes expanded and
+            the depth limit being searched once it tells the search to stop.
+
+    Returns:
+        i: A number representing the depth of the solution.
+        total_count: A number representing the total number if nodes expanded.
+        solution_moves: A list of tuples representing the moves required to
+            reach goal state, or None if it can not be reached.
+
+    Raises:
+        board.Unsolvable: board.is_solvable rules out root and goal state,
+            which are then not searched at all.
+    """
+    if cache is not None:
+        options = "parallel_pruned_ids" if pruned else "parallel_ids"
+        moves = cache.get(root, goal, options)
+        if moves is not None:
+            return len(moves), 0, moves
+        depth, count, moves = parallel_iterative_deepening_search(
+            root, goal, processes, split_depth, pruned, max_depth, pruner,
+            instrument, ordering=ordering, token=token)
+        if moves is not None:
+            cache.put(root, goal, options, moves)
+        return depth, count, moves
+    solver = _get_solver(goal, pruned, max_depth, pruner, ordering, token)
+    pruner = solver.pruner
+    root_state = board.Board(root)
+    if root_state == solver.goal_state:
+        return 0, 0, []
+    board.check_solvable(root_state.pegs, solver.goal_state.pegs)
+    if max_depth is None:
+        # Every jump removes one peg, so no solution is deeper.
+        max_depth = root_state.count_pegs() - solver.goal_state.count_pegs()
+    if instrument is not None:
+        instrument.start("Parallel " + solver.name, pruner)
+
+    i = 0
+    total_count = 0
+    pool = None
+    try:
+        if token is not None:
+            token.check()
+        while i < min(split_depth, max_depth + 1):
+            count, moves = solver.search_depth(root_state, i)
+            total_count += count
+            i += 1
+            if instrument is not None:
+                instrument.progress(total_count, total_count)
+            if moves is not None:
+                return i, total_count, moves
+
+        symmetries = None
+        if pruned:
+            symmetries = solver.symmetries
+        frontier, split_count = get_frontier(root_state, split_depth,
+                                             symmetries)
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (goal, pruned, pruner, ordering, token))
+        while i <= max_depth:
+            tasks = [(index, pegs, i - split_depth)
+                     for index, (_, pegs) in enumerate(frontier)]
+            total_count += split_count
+            for index, count, moves, pruned_count, reason in \
+                    pool.imap_unordered(_search_subtree, tasks):
+                total_count += count
+                pruner.pruned += pruned_count
+                if reason is not None:
+                    raise cancellation.SearchStopped(reason)
+                if moves is not None:
+                    return i + 1, total_count, frontier[index][0] + moves
+            if instrument is not None:
+                instrument.progress(total_count, total_count,
+                                    frontier=len(frontier))
+            i += 1
+        print "Breaking. Depth > %d" % max_depth
+        return i, total_count, None
+    except cancellation.SearchStopped as error:
+        total_count += error.count
+        error.count = total_count
+        error.depth = i
+        raise
+    finally:
+        if pool is not None:
+            # Cancels the subtrees still queued or being searched.
+            pool.terminate()
+            pool.join()
+        if instrument is not None:
+            instrument.finish(total_count, total_count)
+
+
+def get_frontier(root_state, split_depth, symmetries=None):
+    """Returns the states split_depth moves away from root_state.
+
+    If symmetries is given, only the first of the states sharing a
+    canonical key is kept.
+
+    Returns: A tuple containing a list of tuples with the moves leading to
+    each state and its bitboard, and the number of nodes expanded on the
+    way.
+    """
+    frontier = []
+    explored = set()
+
+    def collect(moves, depth):
+        count = 0
+        for transition in root_state.get_possible_transitions():
+            root_state.make_move(*transition)
+            if symmetries is not None:
+                key = root_state.canonical_key(symmetries)
+                if key in explored:
+                    root_state.unmake_move(*transition)
+                    continue
+                explored.add(key)
+            count += 1
+            if depth == 1:
+                frontier.append((moves + [transition], root_state.pegs))
+            else:
+                count += collect(moves + [transition], depth - 1)
+            root_state.unmake_move(*transition)
+        return count
+
+    split_count = collect([], split_depth)
+    return frontier, split_count
+
+
+def _get_solver(goal, pruned, max_depth=ids.MAX_DEPTH, pruner=None,
+                ordering=None, token=None):
+    """Returns an iterative deepening search object towards goal."""
+    if pruned:
+        return pruned_ids.PrunedIterativeDeepeningSearch(
+            goal, max_depth, pruner, ordering=ordering, token=token)
+    return ids.IterativeDeepeningSearch(goal, max_depth, pruner, ordering,
+                                        token=token)
+
+
+def _init_worker(goal, pruned, pruner, ordering, token):
+    """Builds the solver of a worker process."""
+    global _worker_solver
+    _worker_solver = _get_solver(goal, pruned, pruner=pruner,
+                                 ordering=ordering, token=token)
+
+
+def _search_subtree(args):
+    """Searches a subtree to a depth limit in a worker process.
+
+    Returns: A tuple of the task index, the number of nodes expanded, the
+    moves found or None, the number of moves pruned, and the reason the
+    token stopped the search or None.
+    """
+    index, pegs, depth = args
+    pruner = _worker_solver.pruner
+    pruned_before = pruner.pruned
+    try:
+        count, moves = _worker_solver.search_depth(
+            board.Board.from_bitboard(pegs), depth)
+    except cancellation.SearchStopped as error:
+        return (index, error.count, None, pruner.pruned - pruned_before,
+                error.reason)
+    return index, count, moves, pruner.pruned - pruned_before, None
+
+
+def main():
+    from guppy import hpy
+
+    # Fireplace Configuration
+    root = board.translate_input_to_array(['--XXX--',
+                                           '--XXX--',
+                                           '00XXX00',
+                                           '00X0X00',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    depth, count, moves = parallel_iterative_deepening_search(root, goal,
+                                                              pruned=True)
+    after = hp.heap()
+    end_time = time.time()
+    leftover = after - before
+
+    print "Total number of nodes expanded: %d" % count
+    print "Answer depth: %d" % depth
+    print "Moves: %s" % moves
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+    # board.plot_answer(root, moves)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import board
+import numpy as np
+import os
+import tempfile
+import time
+
+# The pattern databases are built over regions of the board, given as the
+# mask of their holes: the four halves of the board, each made of 4 rows or
+# columns and holding 20 holes, so that a table has 2 ** 20 entries.
+REGIONS = tuple(
+    sum(board.HOLE_BITS[number] for number in board.HOLES
+        if in_region(*divmod(number - 1, board.BOARD_SIZE)))
+    for in_region in (lambda r, c: r <= 3,
+                      lambda r, c: r >= 3,
+                      lambda r, c: c <= 3,
+                      lambda r, c: c >= 3))
+
+# Binary file layout: a header of HEADER_TYPE words holding FILE_MAGIC, the
+# goal bitboard, the number of regions and the mask of every region, then
+# one table of DISTANCE_TYPE entries per region.
+FILE_MAGIC = 0x3142445047455000
+HEADER_TYPE = np.uint64
+DISTANCE_TYPE = np.uint8
+UNREACHABLE = np.iinfo(DISTANCE_TYPE).max
+
+
+def get_region_holes(mask):
+    """Returns the bits of the holes of a region mask, in the order they
+    are packed in a pattern."""
+    return [bit for bit in range(len(board.HOLES)) if mask >> bit & 1]
+
+
+def get_pattern(pegs, mask):
+    """Returns the pattern of the bitboard pegs in a region: the bits of the
+    holes of the region, packed together."""
+    pattern = 0
+    for index, bit in enumerate(get_region_holes(mask)):
+        if pegs >> bit & 1:
+            pattern |= 1 << index
+    return pattern
+
+
+def get_index_tables(mask):
+    """Returns the lookup tables that give the pattern of a bitboard in a
+    region 11 bits at a time, like board.SYMMETRY_TABLES."""
+    size = board.SYMMETRY_CHUNK_SIZE
+    holes = get_region_holes(mask)
+    tables = []
+    for offset in range(0, 3 * size, size):
+        table = [0]
+        for bit in range(offset, offset + size):
+            image = 1 << holes.index(bit) if bit in holes else 0
+            table += [entry | image for entry in table]
+        tables.append(table)
+    return tuple(tables)
+
+
+def get_abstract_jumps(mask):
+    """Returns the jumps of the board as seen from a region.
+
+    Holes outside the region are not known, so a jump is taken to be
+    possible whenever its holes inside the region allow it. Jumps missing
+    the region are left out.
+
+    Returns: A list of tuples holding the pattern of the holes that must
+    hold pegs and of the hole that must be empty, among those inside the
+    region.
+    """
+    jumps = []
+    for _, source, target in board.JUMP_TABLE:
+        if (source | target) & mask:
+            jumps.append((get_pattern(source, mask),
+                          get_pattern(target, mask)))
+    return jumps
+
+
+def build_table(goal, mask):
+    """Builds the pattern database of a region by retrograde search.
+
+    The search goes backwards from the pattern of goal, taking back the
+    jumps of get_abstract_jumps one breadth first layer at a time on all
+    the patterns of the layer at once.
+
+    Returns: A numpy array indexed by pattern holding the least number of
+    jumps touching the region needed to turn the pattern into the pattern
+    of goal. Every jump of the board is also a jump of the region, so this
+    never exceeds the number of moves left. Patterns that can not reach the
+    pattern of goal hold UNREACHABLE.
+    """
+    jumps = get_abstract_jumps(mask)
+    table = np.empty(1 << len(get_region_holes(mask)), dtype=DISTANCE_TYPE)
+    table.fill(UNREACHABLE)
+    frontier = np.array([get_pattern(goal, mask)], dtype=np.int64)
+    table[frontier] = 0
+    distance = 0
+    while len(frontier):
+        distance += 1
+        parents = []
+        for source, target in jumps:
+            # The jump made the pattern: the source holes are now empty
+            # and the target hole is filled.
+            made = (frontier & source == 0) & (frontier & target == target)
+            parents.append(frontier[made] ^ (source | target))
+        parents = np.unique(np.concatenate(parents))
+        frontier = parents[table[parents] == UNREACHABLE]
+        table[frontier] = distance
+    return table
+
+
+def save(path, goal, masks, tables):
+    """Writes pattern database tables to a binary file at path.
+
+    The tables are written to a temporary file in the directory of path
+    which is then renamed to path, so that another process never maps a
+    partly written file.
+    """
+    header = np.array([FILE_MAGIC, goal, len(masks)] + list(masks),
+                      dtype=HEADER_TYPE)
+    descriptor, temporary_path = tempfile.mkstemp(
+        suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(descriptor, "wb") as database_file:
+            header.tofile(database_file)
+            for table in tables:
+                table.astype(DISTANCE_TYPE).tofile(database_file)
+        os.rename(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+class PatternDatabase(object):
+    """PatternDatabase class that looks up the pattern databases of a goal
+    state in a memory mapped file.
+
+    Attributes:
+        goal: A bitboard representing the goal state.
+        masks: A list of the masks of the regions.
+        index_tables: A list of the lookup tables of every region, as
+            returned by get_index_tables.
+        tables: A list of the memory mapped tables of every region, as built
+            by build_table.
+        flips: A python dictionary containing the patterns of the holes
+            every (init_pos, final_pos) move changes in every region.
+    """
+    def __init__(self, path):
+        """Memory maps the pattern database file at path.
+
+        Raises:
+            ValueError: The file is not a pattern database file or is
+                shorter than its tables.
+        """
+        header = np.fromfile(path, dtype=HEADER_TYPE, count=3)
+        if len(header) < 3 or header[0] != FILE_MAGIC:
+            raise ValueError("%s is not a pattern database file" % path)
+        self.goal = int(header[1])
+        region_count = int(header[2])
+        self.masks = [int(mask) for mask in np.fromfile(
+            path, dtype=HEADER_TYPE, count=3 + region_count)[3:]]
+        self.index_tables = [get_index_tables(mask) for mask in self.masks]
+        self.tables = []
+        offset = (3 + region_count) * np.dtype(HEADER_TYPE).itemsize
+        for mask in self.masks:
+            size = 1 << len(get_region_holes(mask))
+            self.tables.append(np.memmap(path, dtype=DISTANCE_TYPE, mode="r",
+                                         offset=offset, shape=(size,)))
+            offset += size * np.dtype(DISTANCE_TYPE).itemsize
+        self.flips = dict(
+            (transition, tuple(get_pattern(source | target, mask)
+                               for mask in self.masks))
+            for transition, source, target in board.JUMP_TABLE)
+
+    def get_patterns(self, pegs):
+        """Returns the pattern of the bitboard pegs in every region."""
+        size = board.SYMMETRY_CHUNK_SIZE
+        mask = board.SYMMETRY_CHUNK_MASK
+        return tuple(low[pegs & mask] | middle[pegs >> size & mask] |
+                     high[pegs >> 2 * size]
+                     for low, middle, high in self.index_tables)
+
+    def get_child_patterns(self, patterns, transition):
+        """Returns the patterns after the move transition from a state with
+        patterns."""
+        return tuple(pattern ^ flip for pattern, flip
+                     in zip(patterns, self.flips[transition]))
+
+    def get_distances(self, pegs):
+        """Returns the distance of the bitboard pegs in every region."""
+        return [table[pattern] for pattern, table
+                in zip(self.get_patterns(pegs), self.tables)]
+
+    def get_patterns_cost(self, patterns):
+        """Returns the sum of the distances of the patterns over the
+        regions, or None if a region shows that goal state can not be
+        reached.
+
+        Every distance is a lower bound of the number of moves left, but
+        the regions overlap so their sum is not. It is lowest for the states
+        whose every region is close to its pattern in goal state.
+        """
+        cost = 0
+        for pattern, table in zip(patterns, self.tables):
+            distance = table[pattern]
+            if distance == UNREACHABLE:
+                return None
+            cost += int(distance)
+        return cost
+
+    def get_cost(self, pegs):
+        """Returns the cost of the bitboard pegs, see get_patterns_cost."""
+        return self.get_patterns_cost(self.get_patterns(pegs))
+
+
+def get_default_path(goal):
+    """Returns the file the pattern database of goal is kept in by
+    default, in the current directory."""
+    return "pattern_database_%09x.bin" % goal
+
+
+def get_pattern_database(goal, path=None, masks=REGIONS):
+    """Returns the PatternDatabase of the bitboard goal, building it and
+    saving it to path first if the file is missing or built for another
+    goal state or other regions, or is not a whole pattern database file.
+
+    Build the database once before starting processes that use it or
+    timing a search, as benchmark.prepare_solver does; processes building
+    it at the same time each write their own temporary file, and the last
+    one renamed to path wins.
+    """
+    if path is None:
+        path = get_default_path(goal)
+    if os.path.exists(path):
+        try:
+            database = PatternDatabase(path)
+        except ValueError:
+            database = None
+        if (database is not None and database.goal == goal and
+                database.masks == list(masks)):
+            return database
+        del database
+    save(path, goal, masks, [build_table(goal, mask) for mask in masks])
+    return PatternDatabase(path)
+
+
+def main():
+    from guppy import hpy
+
+    # Goal Configuration
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+    goal_pegs = board.get_bitboard_from_state(goal)
+
+    hp = hpy()
+    before = hp.heap()
+    start_time = time.time()
+    tables = [build_table(goal_pegs, mask) for mask in REGIONS]
+    save(get_default_path(goal_pegs), goal_pegs, REGIONS, tables)
+    end_time = time.time()
+    after = hp.heap()
+    leftover = after - before
+
+    for mask, table in zip(REGIONS, tables):
+        print "Region %09x: %d patterns, %d can reach goal" % (
+            mask, len(table), np.count_nonzero(table != UNREACHABLE))
+    print "Saved to %s" % get_default_path(goal_pegs)
+    print "Time: %.3f seconds\n" % (end_time - start_time)
+    print leftover
+
+
+if __name__ == '__main__':
+    main()
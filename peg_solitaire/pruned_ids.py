@@ -1,85 +1,188 @@
-from guppy import hpy
-
 import board
+import ids
+import solution_cache
 import time
+import transposition
+
+# The default transposition table of a search from a state with p pegs has
+# 2 ** (p + TABLE_EXTRA_BITS) slots, between 2 ** MIN_TABLE_BITS and
+# 2 ** MAX_TABLE_BITS, the 12 MB of the TranspositionTable default.
+TABLE_EXTRA_BITS = 4
+MIN_TABLE_BITS = 8
+MAX_TABLE_BITS = 20
+
+
+def get_table_size_bits(pegs):
+    """Returns the size_bits of the default transposition table of a search
+    from a state with pegs pegs.
+
+    The states searched grow several times over with every peg, so the
+    small configurations get a table of a few KB instead of 12 MB, while
+    the table stays large enough that their states are not evicted.
+    """
+    return max(MIN_TABLE_BITS, min(pegs + TABLE_EXTRA_BITS, MAX_TABLE_BITS))
+
+
+class PrunedIterativeDeepeningSearch(ids.IterativeDeepeningSearch):
+    """PrunedIterativeDeepeningSearch class that models an iterative
+    deepening search which skips states already searched at least as deep,
+    or symmetric to one.
+
+    The searched states are kept in a transposition table with the depth
+    left below them, across the depth limited searches. A state with p pegs
+    can only reach goal state in exactly p minus the pegs of goal state
+    moves, so the depth left is capped one below that: a state searched
+    that deep is skipped by every later search.
+
+    Attributes:
+        table: An object of TranspositionTable class holding the canonical
+            keys of the searched states, or None until the first search if
+            none was given.
+        symmetries: A tuple of the symmetries states are reduced by.
+        goal_pegs: A number indicating how many pegs goal state has.
+        hits_before: A number representing the table hits before the
+            current search.
+    """
+    name = "Pruned Iterative Deepening Search"
+
+    def __init__(self, goal, max_depth=ids.MAX_DEPTH, pruner=None,
+                 table=None, ordering=None, instrument=None, token=None):
+        """Initializes the search using the goal state list. A PagodaPruner
+        for goal state is used if pruner is None, a TranspositionTable
+        sized by get_table_size_bits for the first state searched if table
+        is None and the order of the jump table if ordering is None."""
+        super(PrunedIterativeDeepeningSearch, self).__init__(
+            goal, max_depth, pruner, ordering, instrument, token)
+        self.table = table
+        self.symmetries = board.get_symmetries(self.goal_state.pegs)
+        self.goal_pegs = self.goal_state.count_pegs()
+        self.hits_before = 0
 
-solution_moves = []
-explored = set()
+    def search(self, root):
+        """Iterative Deepening Search method, as in
+        IterativeDeepeningSearch.search."""
+        self.create_table(board.Board(root).count_pegs())
+        self.hits_before = self.table.hits
+        return super(PrunedIterativeDeepeningSearch, self).search(root)
 
+    def search_depth(self, node_state, depth):
+        """Runs one depth limited search from node_state, as in
+        IterativeDeepeningSearch.search_depth."""
+        self.create_table(node_state.count_pegs())
+        return super(PrunedIterativeDeepeningSearch, self).search_depth(
+            node_state, depth)
 
-def iterative_deepening_search(root, goal):
+    def create_table(self, pegs):
+        """Creates the default TranspositionTable for a search from a state
+        with pegs pegs, unless the search already has a table."""
+        if self.table is None:
+            self.table = transposition.TranspositionTable(
+                get_table_size_bits(pegs))
+
+    def get_duplicates(self):
+        """Returns the number of states found in the table during the
+        current search."""
+        return self.table.hits - self.hits_before
+
+    def depth_limited_search(self, node_state, depth, count):
+        """Depth Limited Search method.
+
+        Args:
+            node_state: An object of Board class with the intermediate state.
+                Moves are made and taken back on this object, it holds the
+                same state again when the method returns.
+            depth: A number which represents the maximum depth that the
+                method can go to.
+            count: A number representing the total number if nodes expanded
+                till the method was called.
+
+        Returns: A tuple containing the child_state hash and updated number
+            of nodes explored. The moves are added to solution_moves.
+        """
+        if hash(node_state) == hash(self.goal_state):
+            return hash(node_state), count
+        elif depth >= 0:
+            for transition in self.ordering.order(
+                    node_state, node_state.get_possible_transitions()):
+                if not self.pruner.make_move(transition):
+                    continue
+                node_state.make_move(*transition)
+                child_key = node_state.canonical_key(self.symmetries)
+                child_depth = min(depth - 1,
+                                  node_state.count_pegs() - self.goal_pegs - 1)
+                if self.table.lookup(child_key) >= child_depth:
+                    node_state.unmake_move(*transition)
+                    self.pruner.unmake_move()
+                    continue
+                count += 1
+                if count == self.check_at:
+                    self.check_at = self.token.check(count)
+                leaves = self.leaves
+                ans_hash, count = self.depth_limited_search(node_state,
+                                                            depth - 1, count)
+                if not ans_hash:
+                    self.table.store(child_key, child_depth)
+                node_state.unmake_move(*transition)
+                self.pruner.unmake_move()
+                if ans_hash or self.leaves > leaves:
+                    self.ordering.record(node_state, transition, depth)
+                if ans_hash:
+                    self.solution_moves.append(transition)
+                    return ans_hash, count
+        else:
+            self.leaves += 1
+        return False, count
+
+
+def iterative_deepening_search(root, goal, pruner=None, table=None,
+                               ordering=None, instrument=None, cache=None,
+                               max_depth=ids.MAX_DEPTH, token=None):
     """Iterative Deepening Search method.
 
     Args:
         root: A list of numbers representing initial state.
         goal: A list of numbers representing final goal state.
+        pruner: An object of PagodaPruner class, which counts the pruned
+            moves. One is created for goal state if it is None.
+        table: An object of TranspositionTable class for the searched
+            states. One sized by get_table_size_bits for root is created if
+            it is None.
+        ordering: An object of ScanOrder class or a subclass of it, as
+            returned by move_order.get_ordering. The order of the jump
+            table is used if it is None.
+        instrument: An object of SearchInstrument class or None.
+        cache: An object of SolutionCache class or None. If it holds a
+            solution for root and goal state it is returned without
+            searching; otherwise the solution found is added to it.
+        max_depth: A number representing the depth after which the search
+            gives up, or None for the only depth a solution can have.
+        token: An object of CancellationToken class or None.
 
     Returns:
         i: A number representing the depth of the solution.
         total_count: A number representing the total number if nodes expanded.
         solution_moves: A list of tuples representing the moves required to
-            reach goal state.
-    """
-    root_state = board.Board(root)
-    goal_state = board.Board(goal)
-    root_hash = hash(root_state)
-    goal_hash = hash(goal_state)
-    global explored
-    explored = set()
-    i = 0
-    total_count = 0
-    while root_hash != goal_hash:
-        root_state = board.Board(root)
-        count = 0
-        explored = set()
-        root_hash, count = depth_limited_search(root_state, goal_state, i,
-                                                count)
-        # print "Depth: ", i, "\tNumber of nodes expanded: ", count
-        i += 1
-        total_count += count
-        if i > 30:
-            print "Breaking. Depth > 30"
-            break
-    return i, total_count
-
-
-def depth_limited_search(node_state, goal_state, depth, count):
-    """Depth Limited Search method.
+            reach goal state, or None if it can not be reached.
 
-    Args:
-        node_state: An object of Board class with the intermediate state.
-        goal_state: An object of Board class with the goal state.
-        depth: A number which represents the maximum depth that the method
-            can go to.
-        count: A number representing the total number if nodes expanded till
-            the method was called.
-        solution_moves: A list of tuples representing the moves required to
-            reach goal state.
-
-    Returns: A tuple containing the child_state hash, updated number of nodes
-        explored ans updated solution_moves list.
+    Raises:
+        board.Unsolvable: board.is_solvable rules out root and goal state,
+            which are then not searched at all.
     """
-    if hash(node_state) == hash(goal_state):
-        return hash(node_state), count
-    elif depth >= 0:
-        for transition in node_state.get_possible_transitions():
-            child_state = node_state.copy()
-            child_state.move(*transition)
-            if board.is_explored(hash(child_state), explored):
-                continue
-            count += 1
-            for es in board.get_rotated_states(child_state.get_board_state()):
-                temp = board.Board(es)
-                explored.update([hash(temp)])
-            ans_hash, count = depth_limited_search(child_state, goal_state,
-                                                   depth - 1, count)
-            if ans_hash:
-                solution_moves.append(transition)
-                return ans_hash, count
-    return False, count
+    if cache is not None:
+        moves = cache.get(root, goal, "pruned_ids")
+        if moves is not None:
+            return len(moves), 0, moves
+    depth, count, moves = PrunedIterativeDeepeningSearch(
+        goal, max_depth, pruner=pruner, table=table, ordering=ordering,
+        instrument=instrument, token=token).search(root)
+    if cache is not None and moves is not None:
+        cache.put(root, goal, "pruned_ids", moves)
+    return depth, count, moves
 
 
 def main():
+    from guppy import hpy
+
     # Cross Configuration
     # root = board.translate_input_to_array(['--000--',
     #                                        '--0X0--',
@@ -146,16 +249,16 @@ def main():
     hp = hpy()
     before = hp.heap()
     start_time = time.time()
-    depth, count = iterative_deepening_search(root, goal)
+    depth, count, moves = iterative_deepening_search(
+        root, goal, cache=solution_cache.SolutionCache())
     after = hp.heap()
     end_time = time.time()
     leftover = after - before
 
-    moves = solution_moves[::-1]
     print "Total number of nodes expanded: %d" % count
     print "Answer depth: %d" % depth
     print "Moves: %s" % moves
-    print "Time: %d seconds\n" % (end_time - start_time)
+    print "Time: %.3f seconds\n" % (end_time - start_time)
 
     print leftover
 
@@ -0,0 +1,302 @@
+from matplotlib import pyplot as plt
+from matplotlib import rc
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import argparse
+import board
+import json
+import matplotlib.image
+import multiprocessing
+import numpy as np
+import os
+import seaborn
+
+try:
+    from PIL import Image
+except ImportError:
+    # Animated GIFs are written with Pillow; without it only sprite sheets
+    # can be written.
+    Image = None
+
+# configure plot parameters
+rc("figure", facecolor="white")
+rc("axes", facecolor="white")
+rc("axes", edgecolor="grey")
+rc("grid", alpha=0.9)
+rc("grid", linewidth=0.2)
+rc("grid", linestyle=":")
+colors = seaborn.color_palette()
+
+# Output formats of SolutionRenderer.render, by file extension.
+FORMATS = ("gif", "png")
+DEFAULT_FORMAT = "gif" if Image is not None else "png"
+
+# Resolution of the frames in dots per inch of their figure size.
+DPI = 80
+
+# Milliseconds every frame of a GIF is shown.
+FRAME_DURATION = 500
+
+# Number of frames per row of a sprite sheet.
+SHEET_COLUMNS = 8
+
+# SolutionRenderer objects of a worker process of render_batch, by the text
+# option, so the figure of a process is built once.
+_worker_renderers = {}
+
+
+def plot_board(state, text=True, name=None):
+    """ Plots a state of the board as a grid.
+
+    Args:
+        state: A list of numbers representing the board state.
+        text: A boolean which indicates whether to overlay the plot with
+            numbers.
+        name: The name of the PNG file the plot is saved to, without its
+            extension, or None. The figure is closed once saved.
+    """
+    n_rows, n_cols = board.BOARD_SIZE, board.BOARD_SIZE
+    x = np.arange(n_rows + 1)
+    y = np.arange(n_cols + 1)
+    x, y = np.meshgrid(x, y)
+    z = np.array(state).reshape((n_rows, n_cols))
+
+    fig = plt.figure(figsize=(3, 3))
+    ax = fig.add_subplot(111, aspect='equal')
+    ax.invert_yaxis()
+
+    ax.pcolormesh(x, y, z,
+                  edgecolor='1',
+                  linewidth=1.5)
+    ax.axis('off')
+
+    width = 1
+    if text:
+        for r in range(1, n_rows + 1):
+            for c in range(1, n_cols + 1):
+                plt.text((c - 1) + width / 2.,
+                         (r - 1) + width / 2.,
+                         str(((r - 1) * n_cols) + c),
+                         horizontalalignment='center',
+                         verticalalignment='center',
+                         fontsize=9,
+                         color="white")
+
+    plt.xticks([])
+    plt.yticks([])
+    if name:
+        plt.savefig(name + '.png', bbox_inches='tight')
+        plt.close(fig)
+    # else:
+    #     plt.show()
+
+
+class SolutionRenderer(object):
+    """SolutionRenderer class that draws the states of solutions on one
+    figure and writes every solution to a single file.
+
+    The figure, its grid and the hole numbers are built once, outside of
+    pyplot so that nothing is registered globally; every state only
+    replaces the cell values of the grid before the figure is drawn again.
+
+    Attributes:
+        figure: The matplotlib Figure drawn on.
+        canvas: The FigureCanvasAgg of figure.
+        mesh: The QuadMesh of the board cells.
+    """
+    def __init__(self, text=True, size=3, dpi=DPI):
+        """Builds a figure of size inches square, overlaid with the hole
+        numbers if text is true."""
+        n_rows, n_cols = board.BOARD_SIZE, board.BOARD_SIZE
+        self.figure = Figure(figsize=(size, size), dpi=dpi,
+                             facecolor="white")
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.figure.add_axes([0.02, 0.02, 0.96, 0.96], aspect='equal')
+        ax.invert_yaxis()
+        ax.axis('off')
+        x, y = np.meshgrid(np.arange(n_rows + 1), np.arange(n_cols + 1))
+        self.mesh = ax.pcolormesh(x, y, np.zeros((n_rows, n_cols)),
+                                  edgecolor='1', linewidth=1.5,
+                                  vmin=board.BLANK, vmax=board.FILLED_PEG)
+        if text:
+            for r in range(n_rows):
+                for c in range(n_cols):
+                    ax.text(c + 0.5, r + 0.5, str(r * n_cols + c + 1),
+                            horizontalalignment='center',
+                            verticalalignment='center',
+                            fontsize=9, color="white")
+
+    def get_frame(self, state):
+        """Returns the image of the state list as an array of RGB rows."""
+        self.mesh.set_array(np.asarray(state).ravel())
+        self.canvas.draw()
+        width, height = self.canvas.get_width_height()
+        rgba = np.frombuffer(self.canvas.buffer_rgba(), np.uint8)
+        return rgba.reshape((height, width, 4))[:, :, :3].copy()
+
+    def get_frames(self, start, moves):
+        """Yields the image of the start state list and of the state after
+        every move of moves."""
+        my_board = board.Board(start)
+        yield self.get_frame(my_board.board)
+        for move in moves:
+            my_board.move(*move)
+            yield self.get_frame(my_board.board)
+
+    def render(self, start, moves, path, duration=FRAME_DURATION,
+               columns=SHEET_COLUMNS):
+        """Writes the solution made of moves from the start state list to
+        path, as an animated GIF showing every state for duration
+        milliseconds if it ends in .gif, or else as a PNG sprite sheet of
+        columns states per row.
+
+        Returns: The path written.
+        """
+        frames = list(self.get_frames(start, moves))
+        if path.lower().endswith(".gif"):
+            save_gif(frames, path, duration)
+        else:
+            save_sprite_sheet(frames, path, columns)
+        return path
+
+
+def save_gif(frames, path, duration=FRAME_DURATION):
+    """Writes the list of RGB frames to path as an animated GIF that loops
+    forever, showing every frame for duration milliseconds."""
+    if Image is None:
+        raise ImportError("writing a GIF needs Pillow; write a .png sprite "
+                          "sheet instead")
+    # Frames hold few colours, so they are quantized without dithering,
+    # which keeps the cells flat and the file small.
+    images = [Image.fromarray(frame).quantize(dither=Image.NONE)
+              for frame in frames]
+    images[0].save(path, save_all=True, append_images=images[1:],
+                   duration=duration, loop=0)
+
+
+def save_sprite_sheet(frames, path, columns=SHEET_COLUMNS):
+    """Writes the list of RGB frames of the same size to path as one PNG
+    image with columns frames per row, padded with white."""
+    height, width, _ = frames[0].shape
+    columns = min(columns, len(frames))
+    rows = (len(frames) + columns - 1) // columns
+    sheet = np.full((rows * height, columns * width, 3), 255, np.uint8)
+    for index, frame in enumerate(frames):
+        row, column = divmod(index, columns)
+        sheet[row * height:(row + 1) * height,
+              column * width:(column + 1) * width] = frame
+    matplotlib.image.imsave(path, sheet, format="png")
+
+
+def plot_answer(start, moves, path="moves." + DEFAULT_FORMAT):
+    """Plots step by step moves made on board to a single file.
+
+    Args:
+        start: A list of numbers representing initial state.
+        moves: A list of tuples representing moves.
+        path: The file written, an animated GIF if it ends in .gif, or else
+            a PNG sprite sheet.
+    """
+    return SolutionRenderer().render(start, moves, path)
+
+
+def plot_path(answer, start, path="moves." + DEFAULT_FORMAT):
+    """Plots the path to a single file showing moves taken to reach goal
+    state from start state.
+
+    Args:
+        answer: A list of (move, state) tuples as returned by
+            astar.backtrack.
+        start: A list of numbers representing initial state.
+        path: The file written, as for plot_answer.
+    """
+    return plot_answer(start, [move for move, _ in answer], path)
+
+
+def _render_solution(args):
+    """Renders one solution in a worker process of render_batch."""
+    name, start, moves, path, text = args
+    if text not in _worker_renderers:
+        _worker_renderers[text] = SolutionRenderer(text)
+    return name, _worker_renderers[text].render(start, moves, path)
+
+
+def render_batch(solutions, directory, extension=DEFAULT_FORMAT,
+                 processes=None, text=True):
+    """Renders many solutions on a pool of worker processes, each of which
+    builds its figure once.
+
+    Args:
+        solutions: An iterable of tuples of a name, the start state list
+            and the moves of a solution.
+        directory: The directory the files are written to, named after the
+            solutions.
+        extension: One of FORMATS.
+        processes: A number indicating the number of worker processes. It
+            defaults to the number of CPUs.
+        text: A boolean which indicates whether to overlay the frames with
+            hole numbers.
+
+    Returns: A python dictionary mapping the name of every solution to the
+    path of its file.
+    """
+    if extension not in FORMATS:
+        raise ValueError("unknown format: %s" % extension)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    tasks = ((name, start, moves,
+              os.path.join(directory, "%s.%s" % (name, extension)), text)
+             for name, start, moves in solutions)
+    pool = multiprocessing.Pool(processes)
+    try:
+        paths = dict(pool.imap_unordered(_render_solution, tasks))
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    return paths
+
+
+def read_solutions(puzzles, results):
+    """Yields the solved puzzles of a batch run.
+
+    Args:
+        puzzles: A file object of the puzzles given to batch.py.
+        results: A file object of the JSON lines batch.py wrote.
+
+    Yields: Tuples of the puzzle id, its start state list and its moves.
+    """
+    import batch
+    boards = dict((str(puzzle_id), rows)
+                  for puzzle_id, rows, _, error in batch.read_puzzles(puzzles)
+                  if error is None)
+    for line in results:
+        result = json.loads(line)
+        if result.get("status") == "solved":
+            puzzle_id = str(result["id"])
+            yield (puzzle_id, batch.get_state(boards[puzzle_id]),
+                   [tuple(move) for move in result["moves"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Renders the solutions of a batch run, one file each.")
+    parser.add_argument("puzzles", help="puzzle file given to batch.py")
+    parser.add_argument("results", help="JSONL file batch.py wrote")
+    parser.add_argument("--output-dir", default="solutions")
+    parser.add_argument("--format", choices=FORMATS, default=DEFAULT_FORMAT)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--no-text", action="store_true",
+                        help="leave out the hole numbers")
+    args = parser.parse_args()
+
+    with open(args.puzzles) as puzzles, open(args.results) as results:
+        paths = render_batch(read_solutions(puzzles, results),
+                             args.output_dir, args.format, args.processes,
+                             not args.no_text)
+    print "Rendered %d solutions to %s" % (len(paths), args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
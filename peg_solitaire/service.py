@@ -0,0 +1,215 @@
+import astar
+import board
+import cancellation
+import ids
+import multiprocessing
+import pruned_ids
+import time
+
+
+def run_a_star(root, goal, token, **options):
+    count, store = astar.a_star_search(root, goal, token=token, **options)
+    answer = astar.backtrack(store, root, goal)
+    return count, answer and [move for move, _ in answer]
+
+
+def run_ids(root, goal, token, **options):
+    _, count, moves = ids.iterative_deepening_search(
+        root, goal, max_depth=None, token=token, **options)
+    return count, moves
+
+
+def run_pruned_ids(root, goal, token, **options):
+    _, count, moves = pruned_ids.iterative_deepening_search(
+        root, goal, max_depth=None, token=token, **options)
+    return count, moves
+
+
+# Solvers by name, each a function of the start and goal state lists, a
+# CancellationToken and keyword options of the search, returning the number
+# of nodes expanded and the moves found, or None.
+SOLVERS = [
+    ("astar", run_a_star),
+    ("ids", run_ids),
+    ("pruned_ids", run_pruned_ids),
+]
+SOLVER_NAMES = [name for name, _ in SOLVERS]
+
+
+def _solve(args):
+    """Runs one solve request in a worker process.
+
+    Args:
+        args: A tuple of the solver name, the start and goal state lists,
+            the time.time() after which the search stops or None, the event
+            that cancels it and a python dictionary of solver options.
+
+    Returns: A python dictionary holding a status of "solved",
+    "unsolvable", "cancelled", "deadline" or "error", the moves or None,
+    the number of nodes expanded, the depth of the solution or the deepest
+    depth reached by a stopped search, and the seconds taken. An
+    "unsolvable" result also holds the reason: the message of the
+    board.Unsolvable raised before searching, or "no solution found".
+    """
+    solver, root, goal, deadline, event, options = args
+    result = {"solver": solver, "moves": None, "nodes": 0, "depth": None}
+    start_time = time.time()
+    try:
+        token = cancellation.CancellationToken(deadline, event)
+        # A request cancelled or out of time while queued is not started.
+        token.check()
+        count, moves = dict(SOLVERS)[solver](root, goal, token, **options)
+        if moves is None:
+            result.update({"status": "unsolvable", "nodes": count,
+                           "reason": "no solution found"})
+        else:
+            result.update({"status": "solved", "moves": moves,
+                           "nodes": count, "depth": len(moves)})
+    except board.Unsolvable as error:
+        result.update({"status": "unsolvable", "reason": str(error)})
+    except cancellation.SearchStopped as error:
+        result.update({"status": error.reason, "nodes": error.count,
+                       "depth": error.depth})
+    except Exception as error:
+        result.update({"status": "error", "error": str(error)})
+    result["time"] = time.time() - start_time
+    return result
+
+
+class SolveRequest(object):
+    """SolveRequest class that models a handle on one submitted search.
+
+    Attributes:
+        result: The multiprocessing AsyncResult of the search.
+        event: The shared event which cancels the search once set.
+    """
+    def __init__(self, result, event):
+        self.result = result
+        self.event = event
+
+    def cancel(self):
+        """Stops the search at its next token check, or before it starts if
+        it is still queued. Its result then has the status "cancelled"."""
+        self.event.set()
+
+    def ready(self):
+        """Returns true once the result is available."""
+        return self.result.ready()
+
+    def get(self, timeout=None):
+        """Returns the result python dictionary of the search, waiting at
+        most timeout seconds if it is not None; multiprocessing.TimeoutError
+        is raised if it is not ready by then."""
+        return self.result.get(timeout)
+
+
+class SolverService(object):
+    """SolverService class that runs many concurrent solve requests on one
+    bounded pool of worker processes.
+
+    submit never blocks: the request is queued until a worker is free, and
+    the returned SolveRequest can be waited on, polled or cancelled. A
+    callback given to submit is called with the result in a thread of the
+    service, so an event loop can hand the result over to its own thread
+    (e.g. with call_soon_threadsafe). Every search checks a
+    CancellationToken while it expands nodes, so cancelling a request or
+    reaching its deadline ends it with the nodes expanded and the deepest
+    depth reached instead of running on.
+
+    Attributes:
+        pool: The multiprocessing.Pool the searches run on.
+        manager: The multiprocessing.Manager holding the cancel events.
+    """
+    def __init__(self, processes=None):
+        """Starts processes worker processes, one per CPU if it is None."""
+        self.pool = multiprocessing.Pool(processes)
+        self.manager = multiprocessing.Manager()
+
+    def submit(self, solver, root, goal, timeout=None, callback=None,
+               **options):
+        """Queues a search from the root to the goal state list.
+
+        Args:
+            solver: A name of SOLVER_NAMES.
+            root: A list of numbers representing initial state.
+            goal: A list of numbers representing final goal state.
+            timeout: The number of seconds allowed from now, including the
+                time spent queued, or None for no limit.
+            callback: A function called with the result python dictionary,
+                or None.
+            options: Keyword arguments passed on to the search, such as
+                ordering for the iterative deepening searches.
+
+        Returns: An object of SolveRequest class.
+        """
+        if solver not in SOLVER_NAMES:
+            raise ValueError("unknown solver: %s" % solver)
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        event = self.manager.Event()
+        result = self.pool.apply_async(
+            _solve, [(solver, root, goal, deadline, event, options)],
+            callback=callback)
+        return SolveRequest(result, event)
+
+    def close(self):
+        """Waits for the queued searches and stops the worker processes."""
+        self.pool.close()
+        self.pool.join()
+        self.manager.shutdown()
+
+    def terminate(self):
+        """Stops the worker processes without waiting for the searches."""
+        self.pool.terminate()
+        self.pool.join()
+        self.manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+
+def main():
+    goal = board.translate_input_to_array(['--000--',
+                                           '--000--',
+                                           '0000000',
+                                           '000X000',
+                                           '0000000',
+                                           '--000--',
+                                           '--000--'])
+    pyramid = board.translate_input_to_array(['--000--',
+                                              '--0X0--',
+                                              '00XXX00',
+                                              '0XXXXX0',
+                                              'XXXXXXX',
+                                              '--000--',
+                                              '--000--'])
+    full = board.translate_input_to_array(['--XXX--',
+                                           '--XXX--',
+                                           'XXXXXXX',
+                                           'XXX0XXX',
+                                           'XXXXXXX',
+                                           '--XXX--',
+                                           '--XXX--'])
+    with SolverService(2) as service:
+        requests = [
+            ("Pyramid, A* Search", service.submit("astar", pyramid, goal)),
+            ("Full board, IDS, 5 seconds",
+             service.submit("ids", full, goal, timeout=5)),
+            ("Full board, pruned IDS, cancelled",
+             service.submit("pruned_ids", full, goal)),
+        ]
+        time.sleep(1)
+        requests[2][1].cancel()
+        for name, request in requests:
+            result = request.get()
+            print "%s: %s, %d nodes, depth %s, %.3f seconds" % (
+                name, result["status"], result["nodes"], result["depth"],
+                result["time"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import board
+import json
+import sqlite3
+
+# Number of solutions kept by default before the least recently used ones
+# are evicted.
+MAX_ENTRIES = 10000
+
+
+def get_default_path():
+    """Returns the file the solution cache is kept in by default, in the
+    current directory."""
+    return "solution_cache.sqlite"
+
+
+def get_canonical_pair(start, goal):
+    """Returns the symmetry that maps the bitboards start and goal to the
+    canonical form of the pair, with the images of start and goal.
+
+    The canonical form is the image of the pair under the symmetry that
+    gives the smallest (goal, start) images, so a pair and its symmetric
+    images share one cache entry.
+    """
+    return min((board.get_symmetric_bitboard(goal, symmetry),
+                board.get_symmetric_bitboard(start, symmetry), symmetry)
+               for symmetry in board.ALL_SYMMETRIES)[::-1]
+
+
+class SolutionCache(object):
+    """SolutionCache class that models an on-disk store of solutions.
+
+    Solutions are kept in a single SQLite file, keyed by the canonical form
+    of their start and goal states and by a string of the solver options.
+    The moves are stored in the canonical orientation and mapped back onto
+    the orientation of the caller's start state when looked up. Every
+    lookup hit and store marks the entry as used; once more than
+    max_entries solutions are held the least recently used ones are
+    evicted.
+
+    Attributes:
+        path: The path of the cache file.
+        max_entries: A number indicating how many solutions are kept.
+        connection: The sqlite3 connection to the cache file.
+        hits: A number representing how many lookups found a solution.
+        misses: A number representing how many lookups found none.
+    """
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        if path is None:
+            path = get_default_path()
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, "
+            "moves TEXT NOT NULL, last_used INTEGER NOT NULL)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS solutions_last_used "
+            "ON solutions (last_used)")
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        """Closes the cache file."""
+        self.connection.close()
+
+    @staticmethod
+    def get_key(canonical_start, canonical_goal, options):
+        """Returns the key of the canonical start and goal bitboards solved
+        with the solver options string."""
+        return "%09x:%09x:%s" % (canonical_start, canonical_goal, options)
+
+    def get_next_use(self):
+        """Returns a number larger than the last use of every entry."""
+        last_use = self.connection.execute(
+            "SELECT MAX(last_used) FROM solutions").fetchone()[0]
+        return (last_use or 0) + 1
+
+    def get(self, start, goal, options):
+        """Returns the cached moves from the start state list to the goal
+        state list for the solver options string, made on start itself, or
+        None if no solution is cached."""
+        symmetry, canonical_start, canonical_goal = get_canonical_pair(
+            board.get_bitboard_from_state(start),
+            board.get_bitboard_from_state(goal))
+        key = self.get_key(canonical_start, canonical_goal, options)
+        row = self.connection.execute(
+            "SELECT moves FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE solutions SET last_used = ? WHERE key = ?",
+            (self.get_next_use(), key))
+        self.connection.commit()
+        inverse = board.INVERSE_SYMMETRIES[symmetry]
+        return [board.get_symmetric_transition(tuple(move), inverse)
+                for move in json.loads(row[0])]
+
+    def put(self, start, goal, options, moves):
+        """Stores the moves from the start state list to the goal state list
+        found with the solver options string, evicting the least recently
+        used solutions over max_entries."""
+        symmetry, canonical_start, canonical_goal = get_canonical_pair(
+            board.get_bitboard_from_state(start),
+            board.get_bitboard_from_state(goal))
+        key = self.get_key(canonical_start, canonical_goal, options)
+        canonical_moves = [board.get_symmetric_transition(move, symmetry)
+                           for move in moves]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO solutions (key, moves, last_used) "
+            "VALUES (?, ?, ?)",
+            (key, json.dumps(canonical_moves), self.get_next_use()))
+        self.connection.execute(
+            "DELETE FROM solutions WHERE key IN (SELECT key FROM solutions "
+            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+        self.connection.commit()
@@ -0,0 +1,123 @@
+import array
+import board
+
+# Slots are picked by multiplicative hashing of the key, like the slots of
+# transposition.TranspositionTable.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+
+# Index of the move byte of every (init_pos, final_pos) move in the jump
+# table.
+_MOVE_INDEX = dict((transition, index) for index, (transition, _, _)
+                   in enumerate(board.JUMP_TABLE))
+
+# Returned by find for a key that is not stored, and held in an empty slot.
+NOT_FOUND = -1
+# Parent index of a state stored without a parent.
+NO_PARENT = -1
+# Move byte of a state stored without a move.
+NO_MOVE = 255
+
+
+class StateStore(object):
+    """StateStore class that models a compact table of search states.
+
+    A state is stored by its key, the bitboard of its canonical image, so
+    two distinct states never share an entry. Entries are numbered in the
+    order they are added and their fields are kept in packed arrays: the
+    key, the index of the parent entry, the g cost and the move made from
+    the parent as a byte indexing board.JUMP_TABLE, 14 bytes in all. An open
+    addressing table of entry indices, kept at most half full, finds the
+    entry of a key.
+
+    Attributes:
+        keys: An array of the key of every entry.
+        parents: An array of the parent index of every entry, NO_PARENT for
+            a state without a parent.
+        g_costs: An array of the g cost of every entry.
+        moves: An array of the move byte of every entry.
+        slots: An array of the entry index held in every slot of the open
+            addressing table, NOT_FOUND if the slot is empty.
+        slot_bits: A number such that there are 2 ** slot_bits slots.
+    """
+    def __init__(self, slot_bits=16):
+        """Initializes an empty store with 2 ** slot_bits slots."""
+        self.keys = array.array("L")
+        self.parents = array.array("i")
+        self.g_costs = array.array("B")
+        self.moves = array.array("B")
+        self.slot_bits = slot_bits
+        self.slots = array.array("i", [NOT_FOUND]) * (1 << slot_bits)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self.find(key) != NOT_FOUND
+
+    def get_slot(self, key):
+        """Returns the first slot probed for key."""
+        return ((key * _HASH_MULTIPLIER) & _HASH_MASK) >> (64 - self.slot_bits)
+
+    def find(self, key):
+        """Returns the index of the entry of key, or NOT_FOUND."""
+        slots = self.slots
+        mask = len(slots) - 1
+        slot = self.get_slot(key)
+        while True:
+            index = slots[slot]
+            if index == NOT_FOUND or self.keys[index] == key:
+                return index
+            slot = (slot + 1) & mask
+
+    def add(self, key, parent=NO_PARENT, g_cost=0, transition=None):
+        """Adds an entry for key, which must not be stored yet, and returns
+        its index.
+
+        Args:
+            key: The key of the state.
+            parent: The index of the entry of the parent state.
+            g_cost: A number representing the cost of reaching the state.
+            transition: A tuple representing the move made from the parent
+                state, or None.
+        """
+        index = len(self.keys)
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.g_costs.append(g_cost)
+        self.moves.append(NO_MOVE if transition is None
+                          else _MOVE_INDEX[transition])
+        if 2 * len(self.keys) > len(self.slots):
+            self.resize(self.slot_bits + 1)
+        else:
+            self.insert_slot(key, index)
+        return index
+
+    def update(self, index, parent, g_cost, transition):
+        """Replaces the parent, g cost and move of the entry index."""
+        self.parents[index] = parent
+        self.g_costs[index] = g_cost
+        self.moves[index] = _MOVE_INDEX[transition]
+
+    def get_transition(self, index):
+        """Returns the move made from the parent of the entry index, or
+        None."""
+        move = self.moves[index]
+        if move == NO_MOVE:
+            return None
+        return board.JUMP_TABLE[move][0]
+
+    def insert_slot(self, key, index):
+        """Puts the entry index of key in the first empty slot probed."""
+        mask = len(self.slots) - 1
+        slot = self.get_slot(key)
+        while self.slots[slot] != NOT_FOUND:
+            slot = (slot + 1) & mask
+        self.slots[slot] = index
+
+    def resize(self, slot_bits):
+        """Rebuilds the open addressing table with 2 ** slot_bits slots."""
+        self.slot_bits = slot_bits
+        self.slots = array.array("i", [NOT_FOUND]) * (1 << slot_bits)
+        for index, key in enumerate(self.keys):
+            self.insert_slot(key, index)
@@ -0,0 +1,135 @@
+import astar
+import board
+import layered
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+# Known solvable configurations, as in benchmark.
+CONFIGURATIONS = {
+    "Cross": ['--000--',
+              '--0X0--',
+              '00XXX00',
+              '000X000',
+              '000X000',
+              '--000--',
+              '--000--'],
+    "Plus": ['--000--',
+             '--0X0--',
+             '000X000',
+             '0XXXXX0',
+             '000X000',
+             '--0X0--',
+             '--000--'],
+    "Fireplace": ['--XXX--',
+                  '--XXX--',
+                  '00XXX00',
+                  '00X0X00',
+                  '0000000',
+                  '--000--',
+                  '--000--'],
+}
+
+
+def get_solution_positions(rows):
+    """Returns (bitboard, moves left) tuples of the positions along a
+    solution of the configuration rows."""
+    start = board.translate_input_to_array(rows)
+    _, moves = layered.layered_search(start,
+                                      board.translate_input_to_array(GOAL))
+    state = board.Board(start)
+    positions = [(state.pegs, len(moves))]
+    for index, move in enumerate(moves):
+        state.make_move(*move)
+        positions.append((state.pegs, len(moves) - index - 1))
+    return positions
+
+
+class HeuristicTest(unittest.TestCase):
+    def setUp(self):
+        self.goal = board.get_bitboard_from_state(
+            board.translate_input_to_array(GOAL))
+
+    def test_simple_heuristic_never_overestimates(self):
+        heuristic = astar.get_heuristic(self.goal, simple=True)
+        for rows in CONFIGURATIONS.values():
+            for pegs, moves_left in get_solution_positions(rows):
+                cost = heuristic.get_cost(heuristic.get_values(pegs))
+                self.assertTrue(0 <= cost <= moves_left)
+
+    def test_child_values(self):
+        for simple in (True, False):
+            heuristic = astar.get_heuristic(self.goal, simple)
+            state = board.Board(board.translate_input_to_array(
+                CONFIGURATIONS["Fireplace"]))
+            values = heuristic.get_values(state.pegs)
+            for transition in state.get_possible_transitions():
+                child = state.copy()
+                child.make_move(*transition)
+                self.assertEqual(
+                    heuristic.get_child_values(values, transition),
+                    heuristic.get_values(child.pegs))
+
+    def test_manhattan_weights(self):
+        heuristic = astar.get_heuristic(self.goal)
+        state = board.Board(board.translate_input_to_array(
+            CONFIGURATIONS["Cross"]))
+        self.assertEqual(heuristic.get_cost(heuristic.get_values(state.pegs)),
+                         8)
+        self.assertEqual(heuristic.get_cost(heuristic.get_values(self.goal)),
+                         0)
+
+
+class BucketQueueTest(unittest.TestCase):
+    def test_order(self):
+        fringe = astar.BucketQueue()
+        for item, priority, depth in [("a", 3, 1), ("b", 2, 0), ("c", 3, 2),
+                                      ("d", 2, 1), ("e", 2, 1)]:
+            fringe.put(item, priority, depth)
+        self.assertEqual(len(fringe), 5)
+        popped = []
+        while not fringe.is_empty():
+            popped.append(fringe.get())
+        # Least priority first, then deepest, then last put.
+        self.assertEqual(popped, ["e", "d", "b", "c", "a"])
+
+    def test_stale_entries(self):
+        fringe = astar.BucketQueue()
+        fringe.put("a", 5, 0)
+        fringe.put("b", 4, 0)
+        fringe.put("a", 3, 1)
+        self.assertEqual(len(fringe), 2)
+        self.assertEqual(fringe.get(), "a")
+        self.assertEqual(fringe.get(), "b")
+        self.assertTrue(fringe.is_empty())
+        fringe.put("c", 6, 0)
+        self.assertEqual(fringe.get(), "c")
+        self.assertEqual(fringe.stale, 1)
+        self.assertTrue(fringe.is_empty())
+
+    def test_same_solution_length(self):
+        goal = board.translate_input_to_array(GOAL)
+        for rows in CONFIGURATIONS.values():
+            start = board.translate_input_to_array(rows)
+            lengths = []
+            for fringe in (astar.PriorityQueue(), astar.BucketQueue()):
+                _, store = astar.a_star_search(start, goal, fringe=fringe)
+                answer = astar.backtrack(store, start, goal)
+                state = board.Board(start)
+                for move, _ in answer:
+                    self.assertTrue(state.is_valid(*move))
+                    state.make_move(*move)
+                self.assertEqual(state.pegs,
+                                 board.get_bitboard_from_state(goal))
+                lengths.append(len(answer))
+            self.assertEqual(lengths[0], lengths[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import batch
+import json
+import unittest
+
+CROSS = ['--000--',
+         '--0X0--',
+         '00XXX00',
+         '000X000',
+         '000X000',
+         '--000--',
+         '--000--']
+
+
+class ReadPuzzlesTest(unittest.TestCase):
+    def test_jsonl(self):
+        lines = [json.dumps({"id": "cross", "board": CROSS}),
+                 json.dumps({"board": CROSS, "goal": CROSS})]
+        self.assertEqual(list(batch.read_puzzles(lines)),
+                         [("cross", CROSS, None, None),
+                          (2, CROSS, CROSS, None)])
+
+    def test_text(self):
+        lines = ["# a comment"] + CROSS + [""] + CROSS
+        self.assertEqual(list(batch.read_puzzles(lines)),
+                         [(1, CROSS, None, None), (2, CROSS, None, None)])
+
+    def test_malformed_records(self):
+        lines = ([json.dumps({"id": "no board"}),
+                  '{"board": [',
+                  json.dumps({"id": "short", "board": CROSS[:2]})] +
+                 CROSS[:3] + [""] + CROSS + CROSS[:2])
+        puzzles = list(batch.read_puzzles(lines))
+        self.assertEqual([error is None for _, _, _, error in puzzles],
+                         [False, False, True, False, True, False])
+        self.assertEqual([puzzle_id for puzzle_id, _, _, _ in puzzles],
+                         [1, 2, "short", 4, 5, 6])
+
+    def test_malformed_results(self):
+        lines = [json.dumps({"id": "no board"}),
+                 json.dumps({"id": "short", "board": CROSS[:2]}),
+                 json.dumps({"id": "cross", "board": CROSS})]
+        results = [batch.solve_puzzle(puzzle + ("layered", None))
+                   for puzzle in batch.read_puzzles(lines)]
+        self.assertEqual([result["status"] for result in results],
+                         ["error", "error", "solved"])
+        self.assertEqual(len(results[2]["moves"]), 5)
+
+    def test_unsolvable(self):
+        # One peg next to the center is in another position class.
+        rows = ['--000--', '--000--', '0000000', '00X0000', '0000000',
+                '--000--', '--000--']
+        for solver in ("astar", "ids", "layered", "bidirectional"):
+            result = batch.solve_puzzle((1, rows, None, None, solver, None))
+            self.assertEqual(result["status"], "unsolvable")
+            self.assertEqual(result["moves"], None)
+            self.assertEqual(result["nodes"], 0)
+            self.assertTrue("position class" in result["reason"])
+
+
+class GetStateTest(unittest.TestCase):
+    def test_board(self):
+        self.assertEqual(len(batch.get_state(CROSS)), 49)
+
+    def test_not_a_board(self):
+        for rows in (None, CROSS[:6], [1, 2, 3, 4, 5, 6, 7],
+                     ['XXXXXXX'] + CROSS[1:]):
+            self.assertRaises(ValueError, batch.get_state, rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
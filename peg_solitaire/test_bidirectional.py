@@ -0,0 +1,78 @@
+import board
+import bidirectional
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+# Known solvable configurations, as in benchmark.
+CONFIGURATIONS = {
+    "Cross": ['--000--',
+              '--0X0--',
+              '00XXX00',
+              '000X000',
+              '000X000',
+              '--000--',
+              '--000--'],
+    "Plus": ['--000--',
+             '--0X0--',
+             '000X000',
+             '0XXXXX0',
+             '000X000',
+             '--0X0--',
+             '--000--'],
+    "Fireplace": ['--XXX--',
+                  '--XXX--',
+                  '00XXX00',
+                  '00X0X00',
+                  '0000000',
+                  '--000--',
+                  '--000--'],
+}
+
+
+def play(start, moves):
+    """Returns the bitboard reached by making moves on the start state
+    list, checking that every move is legal."""
+    state = board.Board(start)
+    for move in moves:
+        assert state.is_valid(*move), move
+        state.make_move(*move)
+    return state.pegs
+
+
+class BidirectionalSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def test_solutions(self):
+        for name, rows in sorted(CONFIGURATIONS.items()):
+            start = board.translate_input_to_array(rows)
+            count, moves = bidirectional.bidirectional_search(start, self.goal)
+            self.assertTrue(count > 0, name)
+            self.assertEqual(len(moves), board.Board(start).count_pegs() - 1)
+            self.assertEqual(play(start, moves),
+                             board.get_bitboard_from_state(self.goal))
+
+    def test_no_solution(self):
+        # Two pegs that can not jump, in the position class of the goal.
+        start = board.translate_input_to_array(
+            ['--X0X--', '--000--', '0000000', '0000000', '0000000',
+             '--000--', '--000--'])
+        _, moves = bidirectional.bidirectional_search(start, self.goal)
+        self.assertEqual(moves, None)
+
+    def test_unsolvable(self):
+        start = board.translate_input_to_array(
+            ['--000--', '--000--', '0000000', '00X0000', '0000000',
+             '--000--', '--000--'])
+        self.assertRaises(board.Unsolvable, bidirectional.bidirectional_search, start, self.goal)
+
+
+if __name__ == '__main__':
+    unittest.main()
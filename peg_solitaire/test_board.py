@@ -0,0 +1,160 @@
+import board
+import random
+import unittest
+
+START = ['--XXX--',
+         '--XXX--',
+         'XXXXXXX',
+         'XXX0XXX',
+         'XXXXXXX',
+         '--XXX--',
+         '--XXX--']
+
+
+def get_random_bitboards(count, seed=0):
+    """Returns count random bitboards of the board geometry."""
+    generator = random.Random(seed)
+    return [generator.getrandbits(len(board.HOLES)) for _ in range(count)]
+
+
+class BitboardTest(unittest.TestCase):
+    def test_geometry(self):
+        self.assertEqual(len(board.HOLES), 33)
+        self.assertEqual(len(board.JUMPS), 76)
+
+    def test_state_round_trip(self):
+        for pegs in get_random_bitboards(100) + [0, (1 << 33) - 1]:
+            state = board.get_state_from_bitboard(pegs)
+            self.assertEqual(board.get_bitboard_from_state(state), pegs)
+            self.assertEqual(board.Board(state).pegs, pegs)
+            self.assertEqual(board.Board.from_bitboard(pegs).board, state)
+
+    def test_start_state(self):
+        state = board.translate_input_to_array(START)
+        start = board.Board(state)
+        self.assertEqual(start.count_pegs(), 32)
+        self.assertEqual(start.get_string_state(), START)
+        self.assertEqual(sorted(start.get_possible_transitions()),
+                         [(11, 25), (23, 25), (27, 25), (39, 25)])
+
+    def test_make_and_unmake_move(self):
+        start = board.Board(board.translate_input_to_array(START))
+        pegs = start.pegs
+        start.make_move(11, 25)
+        self.assertEqual(start.count_pegs(), 31)
+        self.assertEqual(start.board[11 - 1], board.EMPTY_PEG)
+        self.assertEqual(start.board[18 - 1], board.EMPTY_PEG)
+        self.assertEqual(start.board[25 - 1], board.FILLED_PEG)
+        start.unmake_move(11, 25)
+        self.assertEqual(start.pegs, pegs)
+        self.assertEqual(start.count_pegs(), 32)
+
+    def test_is_valid(self):
+        start = board.Board(board.translate_input_to_array(START))
+        self.assertTrue(start.is_valid(11, 25))
+        self.assertFalse(start.is_valid(4, 18))
+        self.assertFalse(start.is_valid(1, 3))
+
+
+class SymmetryTest(unittest.TestCase):
+    def test_inverse_symmetries(self):
+        for pegs in get_random_bitboards(20):
+            for symmetry in board.ALL_SYMMETRIES:
+                image = board.get_symmetric_bitboard(pegs, symmetry)
+                self.assertEqual(board.get_symmetric_bitboard(
+                    image, board.INVERSE_SYMMETRIES[symmetry]), pegs)
+
+    def test_symmetries_keep_peg_count(self):
+        for pegs in get_random_bitboards(20):
+            for symmetry in board.ALL_SYMMETRIES:
+                self.assertEqual(
+                    bin(board.get_symmetric_bitboard(pegs, symmetry)).count(
+                        "1"), bin(pegs).count("1"))
+
+    def test_canonical_key_is_shared_by_images(self):
+        for pegs in get_random_bitboards(20):
+            key = board.get_canonical_key(pegs)
+            images = [board.get_symmetric_bitboard(pegs, symmetry)
+                      for symmetry in board.ALL_SYMMETRIES]
+            self.assertEqual(key, min(images))
+            for image in images:
+                self.assertEqual(board.get_canonical_key(image), key)
+
+    def test_symmetric_transition(self):
+        start = board.Board(board.translate_input_to_array(START))
+        start.make_move(11, 25)
+        for symmetry in board.ALL_SYMMETRIES:
+            image = board.Board.from_bitboard(
+                board.get_symmetric_bitboard(start.pegs, symmetry))
+            for transition in start.get_possible_transitions():
+                child = start.copy()
+                child.make_move(*transition)
+                image_transition = board.get_symmetric_transition(
+                    transition, symmetry)
+                self.assertTrue(image.is_valid(*image_transition))
+                image.make_move(*image_transition)
+                self.assertEqual(image.pegs, board.get_symmetric_bitboard(
+                    child.pegs, symmetry))
+                image.unmake_move(*image_transition)
+
+    def test_symmetries_of_the_center(self):
+        center = board.Board(board.translate_input_to_array(
+            ['--000--', '--000--', '0000000', '000X000', '0000000',
+             '--000--', '--000--']))
+        self.assertEqual(board.get_symmetries(center.pegs),
+                         board.ALL_SYMMETRIES)
+        self.assertEqual(center.canonical_key(), center.pegs)
+
+    def test_symmetry_between(self):
+        for pegs in get_random_bitboards(20):
+            for symmetry in board.ALL_SYMMETRIES:
+                image = board.get_symmetric_bitboard(pegs, symmetry)
+                found = board.get_symmetry_between(pegs, image)
+                self.assertEqual(
+                    board.get_symmetric_bitboard(pegs, found), image)
+
+
+class SolvableTest(unittest.TestCase):
+    def setUp(self):
+        self.start = board.Board(board.translate_input_to_array(START)).pegs
+        self.center = board.HOLE_BITS[25]
+
+    def test_solvable_pair(self):
+        self.assertTrue(board.is_solvable(self.start, self.center))
+        self.assertEqual(board.get_position_class(self.start),
+                         board.get_position_class(self.center))
+        board.check_solvable(self.start, self.center)
+
+    def test_identity(self):
+        for pegs in get_random_bitboards(20) + [self.start, self.center]:
+            self.assertTrue(board.is_solvable(pegs, pegs))
+
+    def test_mismatched_classes(self):
+        # A single peg next to the center has the same peg count as the
+        # center but another position class.
+        other = board.HOLE_BITS[24]
+        self.assertNotEqual(board.get_position_class(other),
+                            board.get_position_class(self.center))
+        self.assertFalse(board.is_solvable(other, self.center))
+        self.assertRaises(board.Unsolvable, board.check_solvable, other,
+                          self.center)
+
+    def test_more_pegs_in_goal(self):
+        self.assertFalse(board.is_solvable(self.center, self.start))
+        self.assertRaises(board.Unsolvable, board.check_solvable,
+                          self.center, self.start)
+
+    def test_moves_keep_position_class(self):
+        state = board.Board(board.translate_input_to_array(START))
+        generator = random.Random(0)
+        position_class = board.get_position_class(state.pegs)
+        transitions = state.get_possible_transitions()
+        while transitions:
+            state.make_move(*generator.choice(transitions))
+            self.assertEqual(board.get_position_class(state.pegs),
+                             position_class)
+            transitions = state.get_possible_transitions()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import astar
+import board
+import cancellation
+import ids
+import time
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+START = ['--XXX--',
+         '--XXX--',
+         'XXXXXXX',
+         'XXX0XXX',
+         'XXXXXXX',
+         '--XXX--',
+         '--XXX--']
+
+
+class Event(object):
+    """Event stand-in with the is_set method a token polls."""
+    def __init__(self):
+        self.value = False
+
+    def is_set(self):
+        return self.value
+
+
+class CancellationTokenTest(unittest.TestCase):
+    def test_check(self):
+        token = cancellation.CancellationToken(interval=10)
+        self.assertEqual(token.get_reason(), None)
+        self.assertEqual(token.check(25), 35)
+        token.cancel()
+        try:
+            token.check(40, 3)
+        except cancellation.SearchStopped as error:
+            self.assertEqual((error.reason, error.count, error.depth),
+                             (cancellation.CANCELLED, 40, 3))
+        else:
+            self.fail("SearchStopped not raised")
+
+    def test_event(self):
+        event = Event()
+        token = cancellation.CancellationToken(event=event)
+        self.assertEqual(token.get_reason(), None)
+        event.value = True
+        self.assertEqual(token.get_reason(), cancellation.CANCELLED)
+
+    def test_deadline(self):
+        self.assertEqual(
+            cancellation.CancellationToken.from_timeout(None).deadline, None)
+        token = cancellation.CancellationToken.from_timeout(-1)
+        self.assertEqual(token.get_reason(), cancellation.DEADLINE)
+        # Cancelling wins over a passed deadline.
+        token.cancel()
+        self.assertEqual(token.get_reason(), cancellation.CANCELLED)
+
+
+class SearchStoppedTest(unittest.TestCase):
+    def setUp(self):
+        self.start = board.translate_input_to_array(START)
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def test_cancelled_ids(self):
+        token = cancellation.CancellationToken()
+        token.cancel()
+        try:
+            ids.iterative_deepening_search(self.start, self.goal,
+                                           max_depth=None, token=token)
+        except cancellation.SearchStopped as error:
+            self.assertEqual((error.reason, error.count, error.depth),
+                             (cancellation.CANCELLED, 0, 0))
+        else:
+            self.fail("SearchStopped not raised")
+
+    def test_cancelled_a_star(self):
+        token = cancellation.CancellationToken()
+        token.cancel()
+        try:
+            astar.a_star_search(self.start, self.goal, token=token)
+        except cancellation.SearchStopped as error:
+            self.assertEqual((error.reason, error.count),
+                             (cancellation.CANCELLED, 0))
+        else:
+            self.fail("SearchStopped not raised")
+
+    def test_deadline_ids(self):
+        token = cancellation.CancellationToken(time.time() + 0.2,
+                                               interval=100)
+        start_time = time.time()
+        try:
+            ids.iterative_deepening_search(self.start, self.goal,
+                                           max_depth=None, token=token)
+        except cancellation.SearchStopped as error:
+            self.assertEqual(error.reason, cancellation.DEADLINE)
+            self.assertTrue(error.count > 0)
+            self.assertTrue(error.depth > 0)
+        else:
+            self.fail("SearchStopped not raised")
+        self.assertTrue(time.time() - start_time < 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
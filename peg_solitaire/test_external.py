@@ -0,0 +1,80 @@
+import board
+import external
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+FIREPLACE = ['--XXX--',
+             '--XXX--',
+             '00XXX00',
+             '00X0X00',
+             '0000000',
+             '--000--',
+             '--000--']
+
+
+def play(start, moves):
+    """Returns the bitboard reached by making moves on the start state
+    list, checking that every move is legal."""
+    state = board.Board(start)
+    for move in moves:
+        assert state.is_valid(*move), move
+        state.make_move(*move)
+    return state.pegs
+
+
+class ExternalSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.start = board.translate_input_to_array(FIREPLACE)
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_moves(self, moves):
+        self.assertEqual(len(moves), board.Board(self.start).count_pegs() - 1)
+        self.assertEqual(play(self.start, moves),
+                         board.get_bitboard_from_state(self.goal))
+
+    def test_temporary_directory_is_removed(self):
+        tempdir = tempfile.tempdir
+        tempfile.tempdir = self.directory
+        try:
+            count, moves, io_stats = external.external_search(
+                self.start, self.goal, buckets=4, chunk_size=16)
+        finally:
+            tempfile.tempdir = tempdir
+        self.check_moves(moves)
+        # Every layer but the goal layer is expanded.
+        self.assertEqual(count, sum(layer["states"]
+                                    for layer in io_stats[:-1]))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_given_directory_keeps_the_runs_only(self):
+        _, moves, io_stats = external.external_search(
+            self.start, self.goal, self.directory, buckets=4, chunk_size=16)
+        self.check_moves(moves)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ["layer_%02d" % layer["pegs"]
+                          for layer in reversed(io_stats)])
+        self.assertEqual(
+            glob.glob(os.path.join(self.directory, "*", "*.tmp")), [])
+
+    def test_buckets_must_be_a_power_of_2(self):
+        self.assertRaises(ValueError, external.external_search, self.start,
+                          self.goal, self.directory, buckets=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
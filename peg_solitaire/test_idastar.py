@@ -0,0 +1,76 @@
+import board
+import idastar
+import transposition
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+# Known solvable configurations, as in benchmark.
+CONFIGURATIONS = {
+    "Cross": ['--000--',
+              '--0X0--',
+              '00XXX00',
+              '000X000',
+              '000X000',
+              '--000--',
+              '--000--'],
+    "Plus": ['--000--',
+             '--0X0--',
+             '000X000',
+             '0XXXXX0',
+             '000X000',
+             '--0X0--',
+             '--000--'],
+    "Fireplace": ['--XXX--',
+                  '--XXX--',
+                  '00XXX00',
+                  '00X0X00',
+                  '0000000',
+                  '--000--',
+                  '--000--'],
+}
+
+
+def play(start, moves):
+    """Returns the bitboard reached by making moves on the start state
+    list, checking that every move is legal."""
+    state = board.Board(start)
+    for move in moves:
+        assert state.is_valid(*move), move
+        state.make_move(*move)
+    return state.pegs
+
+
+class IterativeDeepeningAStarTest(unittest.TestCase):
+    def setUp(self):
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def test_with_and_without_table(self):
+        for name, rows in sorted(CONFIGURATIONS.items()):
+            start = board.translate_input_to_array(rows)
+            results = []
+            for table in (None, transposition.TranspositionTable(12)):
+                depth, count, moves = idastar.ida_star_search(
+                    start, self.goal, table=table)
+                self.assertEqual(depth, len(moves), name)
+                self.assertEqual(play(start, moves),
+                                 board.get_bitboard_from_state(self.goal))
+                results.append((depth, moves))
+            self.assertEqual(results[0], results[1], name)
+
+    def test_unsolvable(self):
+        start = board.translate_input_to_array(
+            ['--000--', '--000--', '0000000', '00X0000', '0000000',
+             '--000--', '--000--'])
+        self.assertRaises(board.Unsolvable, idastar.ida_star_search, start,
+                          self.goal, table=transposition.TranspositionTable(8))
+
+
+if __name__ == '__main__':
+    unittest.main()
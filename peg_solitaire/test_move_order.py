@@ -0,0 +1,116 @@
+import board
+import ids
+import move_order
+import random
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+FIREPLACE = ['--XXX--',
+             '--XXX--',
+             '00XXX00',
+             '00X0X00',
+             '0000000',
+             '--000--',
+             '--000--']
+
+
+def get_random_states(count, seed=0):
+    """Returns count random Board objects with at least one move."""
+    generator = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = board.Board.from_bitboard(
+            generator.getrandbits(len(board.HOLES)))
+        if state.get_possible_transitions():
+            states.append(state)
+    return states
+
+
+def get_state_with_moves(count):
+    """Returns a random Board object with at least count moves."""
+    for state in get_random_states(100):
+        if len(state.get_possible_transitions()) >= count:
+            return state
+
+
+class GetOrderingTest(unittest.TestCase):
+    def test_names(self):
+        for name, kind in move_order.ORDERINGS.items():
+            ordering = move_order.get_ordering(name)
+            self.assertEqual(type(ordering), kind)
+            self.assertFalse(ordering is move_order.get_ordering(name))
+
+    def test_unknown_name(self):
+        self.assertRaises(KeyError, move_order.get_ordering, "random")
+
+
+class OrderTest(unittest.TestCase):
+    def test_permutation(self):
+        for name in move_order.ORDERINGS:
+            ordering = move_order.get_ordering(name)
+            for state in get_random_states(50):
+                transitions = state.get_possible_transitions()
+                ordered = ordering.order(state, transitions)
+                self.assertEqual(sorted(ordered), sorted(transitions))
+                ordering.record(state, ordered[-1], 3)
+
+    def test_center_order(self):
+        ordering = move_order.CenterOrder()
+        for state in get_random_states(50):
+            ranks = [move_order.CENTER_RANKS[transition] for transition
+                     in ordering.order(state,
+                                       state.get_possible_transitions())]
+            self.assertEqual(ranks, sorted(ranks))
+
+    def test_killer_moves(self):
+        ordering = move_order.HistoryOrder()
+        state = get_state_with_moves(3)
+        transitions = state.get_possible_transitions()
+        first, second = ordering.order(state, transitions)[-2:]
+        ordering.record(state, first, 1)
+        ordering.record(state, second, 1)
+        self.assertEqual(ordering.order(state, transitions)[:2],
+                         [second, first])
+        ordering.record(state, first, 1)
+        self.assertEqual(ordering.order(state, transitions)[:2],
+                         [first, second])
+        self.assertEqual(len(ordering.killers[state.count_pegs()]), 2)
+
+    def test_history(self):
+        ordering = move_order.HistoryOrder()
+        state = get_state_with_moves(3)
+        transitions = state.get_possible_transitions()
+        last = ordering.order(state, transitions)[-1]
+        # Recorded at another level, the move is not a killer move of the
+        # level of state but its history score puts it first.
+        other = board.Board.from_bitboard(state.pegs)
+        other.make_move(*transitions[0])
+        ordering.record(other, last, 4)
+        self.assertEqual(ordering.history[last], 16)
+        self.assertFalse(state.count_pegs() in ordering.killers)
+        self.assertEqual(ordering.order(state, transitions)[0], last)
+
+
+class SearchTest(unittest.TestCase):
+    def test_orderings_solve(self):
+        start = board.translate_input_to_array(FIREPLACE)
+        goal = board.translate_input_to_array(GOAL)
+        for name in sorted(move_order.ORDERINGS):
+            _, _, moves = ids.iterative_deepening_search(
+                start, goal, ordering=move_order.get_ordering(name))
+            state = board.Board(start)
+            for move in moves:
+                self.assertTrue(state.is_valid(*move), name)
+                state.make_move(*move)
+            self.assertEqual(state.pegs, board.get_bitboard_from_state(goal))
+
+
+if __name__ == '__main__':
+    unittest.main()
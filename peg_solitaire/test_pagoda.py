@@ -0,0 +1,72 @@
+import board
+import pagoda
+import random
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+
+class PagodaTest(unittest.TestCase):
+    def test_library_is_pagoda(self):
+        for weights in pagoda.PAGODAS.values():
+            self.assertTrue(pagoda.is_pagoda(weights))
+
+    def test_value_tables(self):
+        generator = random.Random(0)
+        weights = pagoda.PAGODAS[("distance", 25)]
+        pruner = pagoda.PagodaPruner(0, [weights])
+        for _ in range(50):
+            pegs = generator.getrandbits(len(board.HOLES))
+            self.assertEqual(pruner.get_slacks(pegs),
+                             (pagoda.get_pagoda_value(weights, pegs),))
+
+    def test_no_state_on_a_solution_is_pruned(self):
+        goal = board.Board(board.translate_input_to_array(GOAL))
+        pruner = pagoda.PagodaPruner(goal.pegs)
+        # Plays a game backwards from the goal by reverse jumps: every state
+        # on the way reaches the goal, so no pagoda may rule it out.
+        generator = random.Random(0)
+        for _ in range(20):
+            pegs = goal.pegs
+            for _ in range(15):
+                self.assertTrue(pruner.is_reachable(pegs))
+                reverse = [(source, target) for _, source, target
+                           in board.JUMP_TABLE
+                           if not pegs & source and pegs & target]
+                if not reverse:
+                    break
+                source, target = generator.choice(reverse)
+                pegs ^= source | target
+
+    def test_child_slacks_follow_moves(self):
+        goal = board.Board(board.translate_input_to_array(GOAL))
+        pruner = pagoda.PagodaPruner(goal.pegs)
+        state = board.Board.from_bitboard((1 << len(board.HOLES)) - 1 ^
+                                          board.HOLE_BITS[25])
+        pruner.reset(state.pegs)
+        for transition in state.get_possible_transitions():
+            slacks = pruner.get_child_slacks(pruner.slacks, transition)
+            state.make_move(*transition)
+            if slacks is not None:
+                self.assertEqual(slacks, pruner.get_slacks(state.pegs))
+            else:
+                self.assertFalse(pruner.is_reachable(state.pegs))
+            state.unmake_move(*transition)
+
+    def test_pruned_count(self):
+        goal = board.Board(board.translate_input_to_array(GOAL))
+        pruner = pagoda.PagodaPruner(goal.pegs)
+        # The jump leaves a lone peg on the top row, far from the center.
+        pruner.reset(board.HOLE_BITS[3] | board.HOLE_BITS[4])
+        self.assertFalse(pruner.make_move((3, 5)))
+        self.assertEqual(pruner.pruned, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
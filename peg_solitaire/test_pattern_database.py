@@ -0,0 +1,86 @@
+import board
+import layered
+import os
+import pattern_database
+import shutil
+import tempfile
+import unittest
+
+CENTER = board.HOLE_BITS[25]
+
+# A region of the row of the center and the one above it, small enough to
+# build quickly.
+MASKS = (sum(board.HOLE_BITS[number] for number in range(15, 29)
+             if number in board.HOLE_BITS),)
+
+
+class GetPatternDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "database.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_database(self, database, goal):
+        self.assertEqual(database.goal, goal)
+        self.assertEqual(database.masks, list(MASKS))
+        self.assertEqual(database.get_cost(goal), 0)
+        expected = pattern_database.build_table(goal, MASKS[0])
+        self.assertTrue((database.tables[0] == expected).all())
+        self.assertEqual(os.listdir(self.directory), ["database.bin"])
+
+    def test_missing_file(self):
+        database = pattern_database.get_pattern_database(CENTER, self.path,
+                                                         MASKS)
+        self.check_database(database, CENTER)
+
+    def test_stale_file(self):
+        other = board.HOLE_BITS[24]
+        pattern_database.get_pattern_database(other, self.path, MASKS)
+        database = pattern_database.get_pattern_database(CENTER, self.path,
+                                                         MASKS)
+        self.check_database(database, CENTER)
+
+    def test_truncated_file(self):
+        pattern_database.get_pattern_database(CENTER, self.path, MASKS)
+        with open(self.path, "rb+") as database_file:
+            database_file.truncate(os.path.getsize(self.path) // 2)
+        self.assertRaises(ValueError, pattern_database.PatternDatabase,
+                          self.path)
+        database = pattern_database.get_pattern_database(CENTER, self.path,
+                                                         MASKS)
+        self.check_database(database, CENTER)
+
+    def test_not_a_database(self):
+        with open(self.path, "wb") as database_file:
+            database_file.write("not a pattern database")
+        database = pattern_database.get_pattern_database(CENTER, self.path,
+                                                         MASKS)
+        self.check_database(database, CENTER)
+
+
+class BuildTableTest(unittest.TestCase):
+    def test_distances_never_overestimate(self):
+        start = board.translate_input_to_array(['--XXX--',
+                                                '--XXX--',
+                                                '00XXX00',
+                                                '00X0X00',
+                                                '0000000',
+                                                '--000--',
+                                                '--000--'])
+        _, moves = layered.layered_search(
+            start, board.get_state_from_bitboard(CENTER))
+        table = pattern_database.build_table(CENTER, MASKS[0])
+        state = board.Board(start)
+        for index, move in enumerate(moves):
+            distance = table[pattern_database.get_pattern(state.pegs,
+                                                          MASKS[0])]
+            self.assertTrue(distance <= len(moves) - index)
+            state.make_move(*move)
+        self.assertEqual(table[pattern_database.get_pattern(state.pegs,
+                                                            MASKS[0])], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
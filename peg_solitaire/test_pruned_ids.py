@@ -0,0 +1,69 @@
+import board
+import ids
+import pruned_ids
+import transposition
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+PLUS = ['--000--',
+        '--0X0--',
+        '000X000',
+        '0XXXXX0',
+        '000X000',
+        '--0X0--',
+        '--000--']
+
+FIREPLACE = ['--XXX--',
+             '--XXX--',
+             '00XXX00',
+             '00X0X00',
+             '0000000',
+             '--000--',
+             '--000--']
+
+
+class PrunedIterativeDeepeningSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def test_table_size_bits(self):
+        self.assertEqual(pruned_ids.get_table_size_bits(1),
+                         pruned_ids.MIN_TABLE_BITS)
+        self.assertEqual(pruned_ids.get_table_size_bits(11), 15)
+        self.assertEqual(pruned_ids.get_table_size_bits(32),
+                         pruned_ids.MAX_TABLE_BITS)
+
+    def test_default_table(self):
+        start = board.translate_input_to_array(FIREPLACE)
+        search = pruned_ids.PrunedIterativeDeepeningSearch(self.goal, None)
+        self.assertEqual(search.table, None)
+        search.search(start)
+        self.assertEqual(search.table.size_bits, 15)
+        table = transposition.TranspositionTable(8)
+        search = pruned_ids.PrunedIterativeDeepeningSearch(self.goal, None,
+                                                           table=table)
+        search.search(start)
+        self.assertTrue(search.table is table)
+
+    def test_fewer_nodes_than_ids(self):
+        for rows in (PLUS, FIREPLACE):
+            start = board.translate_input_to_array(rows)
+            depth, count, moves = ids.iterative_deepening_search(
+                start, self.goal, max_depth=None)
+            pruned_depth, pruned_count, pruned_moves = \
+                pruned_ids.iterative_deepening_search(start, self.goal,
+                                                      max_depth=None)
+            self.assertEqual(pruned_depth, depth)
+            self.assertEqual(len(pruned_moves), len(moves))
+            self.assertTrue(pruned_count < count)
+
+
+if __name__ == '__main__':
+    unittest.main()
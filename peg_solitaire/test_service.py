@@ -0,0 +1,82 @@
+import board
+import service
+import time
+import unittest
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+CROSS = ['--000--',
+         '--0X0--',
+         '00XXX00',
+         '000X000',
+         '000X000',
+         '--000--',
+         '--000--']
+
+START = ['--XXX--',
+         '--XXX--',
+         'XXXXXXX',
+         'XXX0XXX',
+         'XXXXXXX',
+         '--XXX--',
+         '--XXX--']
+
+
+class SolverServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.service = service.SolverService(2)
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def tearDown(self):
+        self.service.terminate()
+
+    def test_solved(self):
+        cross = board.translate_input_to_array(CROSS)
+        results = []
+        for solver in service.SOLVER_NAMES:
+            result = self.service.submit(solver, cross, self.goal,
+                                         callback=results.append).get(60)
+            self.assertEqual(result["status"], "solved")
+            self.assertEqual(result["depth"], 5)
+            self.assertEqual(len(result["moves"]), 5)
+        self.assertEqual(len(results), len(service.SOLVER_NAMES))
+
+    def test_deadline(self):
+        start = board.translate_input_to_array(START)
+        result = self.service.submit("ids", start, self.goal,
+                                     timeout=0.5).get(60)
+        self.assertEqual(result["status"], "deadline")
+        self.assertTrue(result["nodes"] > 0)
+        self.assertEqual(result["moves"], None)
+
+    def test_cancelled(self):
+        start = board.translate_input_to_array(START)
+        request = self.service.submit("pruned_ids", start, self.goal)
+        time.sleep(0.5)
+        self.assertFalse(request.ready())
+        request.cancel()
+        result = request.get(60)
+        self.assertEqual(result["status"], "cancelled")
+        self.assertEqual(result["moves"], None)
+
+    def test_unsolvable(self):
+        start = board.translate_input_to_array(
+            ['--000--', '--000--', '0000000', '00X0000', '0000000',
+             '--000--', '--000--'])
+        result = self.service.submit("astar", start, self.goal).get(60)
+        self.assertEqual(result["status"], "unsolvable")
+        self.assertTrue("position class" in result["reason"])
+
+    def test_unknown_solver(self):
+        self.assertRaises(ValueError, self.service.submit, "dfs", GOAL,
+                          GOAL)
+
+
+if __name__ == '__main__':
+    unittest.main()
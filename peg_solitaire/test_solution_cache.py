@@ -0,0 +1,82 @@
+import board
+import layered
+import solution_cache
+import unittest
+
+CROSS = ['--000--',
+         '--0X0--',
+         '00XXX00',
+         '000X000',
+         '000X000',
+         '--000--',
+         '--000--']
+
+GOAL = ['--000--',
+        '--000--',
+        '0000000',
+        '000X000',
+        '0000000',
+        '--000--',
+        '--000--']
+
+
+def play(start, moves):
+    """Returns the bitboard reached by making moves on the start state
+    list, checking that every move is legal."""
+    state = board.Board(start)
+    for move in moves:
+        assert state.is_valid(*move), move
+        state.make_move(*move)
+    return state.pegs
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = solution_cache.SolutionCache(":memory:")
+        self.start = board.translate_input_to_array(CROSS)
+        self.goal = board.translate_input_to_array(GOAL)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.cache.get(self.start, self.goal, "layered"),
+                         None)
+        _, moves = layered.layered_search(self.start, self.goal)
+        self.cache.put(self.start, self.goal, "layered", moves)
+        self.assertEqual(self.cache.get(self.start, self.goal, "layered"),
+                         moves)
+        self.assertEqual(self.cache.get(self.start, self.goal, "astar"),
+                         None)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_symmetric_hits(self):
+        _, moves = layered.layered_search(self.start, self.goal)
+        self.cache.put(self.start, self.goal, "layered", moves)
+        start_pegs = board.get_bitboard_from_state(self.start)
+        goal_pegs = board.get_bitboard_from_state(self.goal)
+        for symmetry in board.ALL_SYMMETRIES:
+            start = board.get_state_from_bitboard(
+                board.get_symmetric_bitboard(start_pegs, symmetry))
+            goal = board.get_state_from_bitboard(
+                board.get_symmetric_bitboard(goal_pegs, symmetry))
+            cached = self.cache.get(start, goal, "layered")
+            self.assertEqual(len(cached), len(moves))
+            self.assertEqual(play(start, cached),
+                             board.get_bitboard_from_state(goal))
+        self.assertEqual(len(self.cache), 1)
+
+    def test_least_recently_used_eviction(self):
+        cache = solution_cache.SolutionCache(":memory:", max_entries=2)
+        for options in ("first", "second"):
+            cache.put(self.start, self.goal, options, [])
+        cache.get(self.start, self.goal, "first")
+        cache.put(self.start, self.goal, "third", [])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(self.start, self.goal, "second"), None)
+        self.assertEqual(cache.get(self.start, self.goal, "first"), [])
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
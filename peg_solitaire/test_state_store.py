@@ -0,0 +1,49 @@
+import board
+import random
+import state_store
+import unittest
+
+
+class StateStoreTest(unittest.TestCase):
+    def test_add_and_find(self):
+        store = state_store.StateStore(2)
+        generator = random.Random(0)
+        keys = list(set(generator.getrandbits(len(board.HOLES))
+                        for _ in range(1000)))
+        for index, key in enumerate(keys):
+            self.assertEqual(store.find(key), state_store.NOT_FOUND)
+            self.assertEqual(store.add(key, index - 1, index % 32), index)
+        self.assertEqual(len(store), len(keys))
+        # The slot table grew and stays at most half full.
+        self.assertTrue(2 * len(store) <= len(store.slots))
+        for index, key in enumerate(keys):
+            self.assertEqual(store.find(key), index)
+            self.assertTrue(key in store)
+            self.assertEqual(store.parents[index], index - 1)
+            self.assertEqual(store.g_costs[index], index % 32)
+
+    def test_colliding_keys(self):
+        store = state_store.StateStore(4)
+        slot = store.get_slot(1)
+        keys = [key for key in range(1, 5000)
+                if store.get_slot(key) == slot][:3]
+        for key in keys:
+            store.add(key)
+        for index, key in enumerate(keys):
+            self.assertEqual(store.find(key), index)
+
+    def test_transitions(self):
+        store = state_store.StateStore()
+        root = store.add(1)
+        self.assertEqual(store.parents[root], state_store.NO_PARENT)
+        self.assertEqual(store.get_transition(root), None)
+        for transition, _, _ in board.JUMP_TABLE:
+            index = store.add(len(store) + 1, root, 1, transition)
+            self.assertEqual(store.get_transition(index), transition)
+        store.update(1, root, 2, board.JUMP_TABLE[5][0])
+        self.assertEqual(store.get_transition(1), board.JUMP_TABLE[5][0])
+        self.assertEqual(store.g_costs[1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
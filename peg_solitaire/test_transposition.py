@@ -0,0 +1,63 @@
+import transposition
+import unittest
+
+
+def get_colliding_keys(table, count):
+    """Returns count distinct keys hashing to the slot of key 1."""
+    slot = table.get_slot(1)
+    keys = [1]
+    key = 2
+    while len(keys) < count:
+        if table.get_slot(key) == slot:
+            keys.append(key)
+        key += 1
+    return keys
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_lookup(self):
+        table = transposition.TranspositionTable(8)
+        self.assertEqual(table.lookup(12345), transposition.EMPTY)
+        table.store(12345, 7)
+        self.assertEqual(table.lookup(12345), 7)
+        self.assertEqual(table.hits, 1)
+        table.store(12345, 3)
+        self.assertEqual(table.lookup(12345), 3)
+        self.assertEqual(table.evictions, 0)
+
+    def test_always_replace(self):
+        table = transposition.TranspositionTable(
+            8, transposition.ALWAYS_REPLACE)
+        first, second = get_colliding_keys(table, 2)
+        table.store(first, 9)
+        table.store(second, 1)
+        self.assertEqual(table.lookup(first), transposition.EMPTY)
+        self.assertEqual(table.lookup(second), 1)
+        self.assertEqual(table.evictions, 1)
+
+    def test_depth_preferred(self):
+        table = transposition.TranspositionTable(
+            8, transposition.DEPTH_PREFERRED)
+        first, second, third = get_colliding_keys(table, 3)
+        table.store(first, 5)
+        table.store(second, 4)
+        self.assertEqual(table.lookup(first), 5)
+        self.assertEqual(table.lookup(second), transposition.EMPTY)
+        self.assertEqual(table.rejections, 1)
+        table.store(third, 5)
+        self.assertEqual(table.lookup(third), 5)
+        self.assertEqual(table.evictions, 1)
+
+    def test_clear(self):
+        table = transposition.TranspositionTable(8)
+        table.store(12345, 7)
+        table.clear()
+        self.assertEqual(table.lookup(12345), transposition.EMPTY)
+
+    def test_unknown_policy(self):
+        self.assertRaises(ValueError, transposition.TranspositionTable, 8,
+                          "never")
+
+
+if __name__ == '__main__':
+    unittest.main()
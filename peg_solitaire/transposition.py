@@ -0,0 +1,88 @@
+import array
+
+# Slots are picked by multiplicative hashing of the canonical key, like the
+# buckets of external.LayerStore.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+
+# Depth of an empty slot, below any depth a search stores.
+EMPTY = -(1 << 31)
+
+# Replacement policies: when a state hashes to a slot holding another one,
+# ALWAYS_REPLACE stores it anyway while DEPTH_PREFERRED only stores it if
+# its depth is at least the depth held in the slot.
+ALWAYS_REPLACE = "always"
+DEPTH_PREFERRED = "depth"
+
+
+class TranspositionTable(object):
+    """TranspositionTable class that models a fixed size table of the states
+    a depth first search has already searched.
+
+    Every state is kept as its canonical key with a depth, a number whose
+    meaning is up to the search, for instance how deep below the state was
+    searched. The table never grows: a state goes in the one slot its key
+    hashes to and the replacement policy decides whether it takes the place
+    of the state held there. Keys and depths are kept in two flat arrays,
+    12 bytes per slot.
+
+    Attributes:
+        size_bits: A number such that the table has 2 ** size_bits slots.
+        policy: ALWAYS_REPLACE or DEPTH_PREFERRED.
+        keys: An array of the canonical key held in every slot.
+        depths: An array of the depth held in every slot, EMPTY if the slot
+            holds no state.
+        hits: A number representing how many lookups found their state.
+        stores: A number representing how many states were stored.
+        evictions: A number representing how many stored states were
+            replaced by another state.
+        rejections: A number representing how many states were not stored
+            because of the replacement policy.
+    """
+    def __init__(self, size_bits=20, policy=ALWAYS_REPLACE):
+        """Initializes an empty table with 2 ** size_bits slots.
+
+        Raises:
+            ValueError: policy is not a known replacement policy.
+        """
+        if policy not in (ALWAYS_REPLACE, DEPTH_PREFERRED):
+            raise ValueError("unknown replacement policy %r" % policy)
+        self.size_bits = size_bits
+        self.policy = policy
+        self.keys = array.array("L", [0]) * (1 << size_bits)
+        self.depths = array.array("i", [EMPTY]) * (1 << size_bits)
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def get_slot(self, key):
+        """Returns the slot of the canonical key key."""
+        return ((key * _HASH_MULTIPLIER) & _HASH_MASK) >> (64 - self.size_bits)
+
+    def lookup(self, key):
+        """Returns the depth stored with the canonical key key, or EMPTY if
+        it is not in the table."""
+        slot = self.get_slot(key)
+        if self.depths[slot] != EMPTY and self.keys[slot] == key:
+            self.hits += 1
+            return self.depths[slot]
+        return EMPTY
+
+    def store(self, key, depth):
+        """Stores the canonical key key with depth, if the replacement policy
+        allows it."""
+        slot = self.get_slot(key)
+        stored_depth = self.depths[slot]
+        if stored_depth != EMPTY and self.keys[slot] != key:
+            if self.policy == DEPTH_PREFERRED and depth < stored_depth:
+                self.rejections += 1
+                return
+            self.evictions += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.stores += 1
+
+    def clear(self):
+        """Empties the table."""
+        self.depths = array.array("i", [EMPTY]) * len(self.depths)